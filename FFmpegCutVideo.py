@@ -1,11 +1,32 @@
 import os
-import subprocess
-
-# 正确的 VideoFromFile 导入位置（和官方 comfy_api 节点一致）
-try:
-    from comfy_api.input_impl import VideoFromFile
-except Exception:
-    VideoFromFile = None
+import shutil
+import tempfile
+
+from .comfy_compat import video_from_file_class
+from .ffmpeg_cache import lookup_result, make_cache_key, store_result
+from .ffmpeg_encoders import (
+    INBAND_CODECS,
+    PROFILE_NAMES,
+    audio_encoder_args,
+    delivery_pix_fmt_args,
+    is_intermediate,
+    match_video_args,
+    video_encoder_args,
+)
+from .ffmpeg_metrics import node_metrics
+from .ffmpeg_output import allocate_output_path, discard_output_path
+from .ffmpeg_parallel import MIN_CHUNK_SECONDS, encode_chunked, plan_jobs, run_ffmpeg_parallel
+from .ffmpeg_plan import (
+    describe,
+    execute_plan,
+    is_plan,
+    make_plan,
+    plan_input,
+    render_input,
+    trim_node,
+)
+from .ffmpeg_probe import probe_keyframes, probe_media
+from .ffmpeg_runner import ensure_ffmpeg, run_ffmpeg
 
 
 class CutVideo:
@@ -74,7 +95,37 @@ class CutVideo:
                 ], {
                     "default": "yes",
                 }),
-            }
+            },
+            "optional": {
+                # 编码方式
+                "cut_mode": ([
+                    "reencode",  # 整段重编码（默认，帧精确）
+                    "copy",      # 起点在关键帧上时直接流拷贝，否则退回 smart
+                    "smart",     # 只重编码首尾不完整的 GOP，中间流拷贝
+                ], {
+                    "default": "reencode",
+                }),
+                # 编码档位：default = 原来的 preset fast / crf 18
+                "encoder_profile": (PROFILE_NAMES, {
+                    "default": "default",
+                }),
+                # 相同输入 + 参数时直接复用上一次的输出文件
+                "use_cache": ("BOOLEAN", {
+                    "default": True,
+                }),
+                # reencode 分段并行编码的段数：1 = 单进程（默认），0 = 按 CPU 数自动；
+                # 适合小时级的长片段
+                "parallel_jobs": ("INT", {
+                    "default": 1,
+                    "min": 0,
+                    "max": 64,
+                }),
+                # 延迟执行：不编码，输出渲染计划交给下游（剪切 / 叠加 / 拼接 / Render Plan）
+                # 合并成一次 ffmpeg；此时 video 输出为空
+                "lazy": ("BOOLEAN", {
+                    "default": False,
+                }),
+            },
         }
 
     # 输出：video_path（字符串） + video（VideoFromFile 对象）
@@ -83,6 +134,12 @@ class CutVideo:
     FUNCTION = "cut_video"
     CATEGORY = "FFmpeg"
 
+    # encoder_profile = "default" 时使用的档位（preset fast / crf 18）
+    _DEFAULT_PROFILE = "fast"
+
+    # smart 剪切的中间文件用 MPEG-TS、参数集随码流携带的编码
+    _INBAND_CODECS = INBAND_CODECS
+
     # 输出到 comfyui/output（当前文件往上两层）
     @staticmethod
     def _get_output_dir():
@@ -97,44 +154,18 @@ class CutVideo:
     def _next_cut_path(cls):
         """
         在 ComfyUI/output 下自动生成 cut_01.mp4, cut_02.mp4 这样的文件名。
+        使用共享分配器：计数器 O(1) 递增 + 原子占位创建，并发时不会重名。
         """
-        output_dir = cls._get_output_dir()
-        prefix = "cut_"
-        ext = ".mp4"
+        return allocate_output_path(cls._get_output_dir(), "cut_", ".mp4", digits=2, sep="")
 
-        max_idx = 0
-        try:
-            for name in os.listdir(output_dir):
-                if not name.startswith(prefix) or not name.endswith(ext):
-                    continue
-                middle = name[len(prefix):-len(ext)]  # 取中间数字
-                if middle.isdigit():
-                    idx = int(middle)
-                    if idx > max_idx:
-                        max_idx = idx
-        except FileNotFoundError:
-            os.makedirs(output_dir, exist_ok=True)
-
-        next_idx = max_idx + 1
-        filename = f"{prefix}{next_idx:02d}{ext}"
-        return os.path.join(output_dir, filename)
-
-    def _ensure_ffmpeg(self):
-        """简单检测 ffmpeg 是否可用。"""
-        try:
-            subprocess.run(
-                ["ffmpeg", "-version"],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                check=True
-            )
-        except Exception as e:
-            raise RuntimeError("无法调用 ffmpeg，请确认已安装并加入系统 PATH。") from e
+    # 检测 ffmpeg 是否可用（结果在进程内缓存）
+    _ensure_ffmpeg = staticmethod(ensure_ffmpeg)
 
     def _make_video_object(self, path: str):
         """
         使用 comfy_api 的 VideoFromFile 生成 VIDEO 对象。
         """
+        VideoFromFile = video_from_file_class()
         if VideoFromFile is None:
             raise RuntimeError(
                 "未找到 comfy_api.input_impl.VideoFromFile，"
@@ -144,42 +175,313 @@ class CutVideo:
 
     def _get_video_fps(self, video_path: str) -> float:
         """
-        使用 ffprobe 读取原视频 fps，失败则返回 0。
+        通过共享的 ffprobe 缓存读取原视频 fps（r_frame_rate），失败则返回 0。
+        输入是渲染计划时，返回计划输出的 fps。
+        """
+        if is_plan(video_path):
+            return float(describe(plan_input(video_path))["fps"] or 0.0)
+        info = probe_media(video_path)
+        if info is None or info["video"] is None:
+            return 0.0
+        return info["video"]["r_fps"] or 0.0
+
+    def _run_ffmpeg(self, cmd, duration=None, outputs=()):
+        """
+        通过共享执行器运行 ffmpeg：实时进度、可中断，失败时删除未完成的输出。
+        """
+        return run_ffmpeg(
+            cmd,
+            duration=duration,
+            outputs=outputs,
+            error_prefix="ffmpeg 剪切失败",
+        )
+
+    @staticmethod
+    def _expected_duration(video, start_time_sec, duration_sec):
+        """输出的预计时长（秒），用于换算进度条；未知时返回 None。"""
+        if duration_sec > 0:
+            return duration_sec
+        info = probe_media(video)
+        if info is None or not info["duration"]:
+            return None
+        return max(0.0, info["duration"] - start_time_sec)
+
+    def _build_reencode_cmd(
+        self,
+        video,
+        start_time_sec,
+        duration_sec,
+        keep_audio,
+        out_path,
+        encoder_profile="default",
+    ):
+        """
+        reencode 模式：整段重编码。
+        """
+        cmd = ["ffmpeg", "-y"]
+
+        # 时间剪切：start_time_sec > 0 时才加 -ss
+        if start_time_sec > 0:
+            cmd.extend(["-ss", f"{start_time_sec}"])
+
+        cmd.extend(["-i", video])
+
+        # duration_sec > 0 时，加 -t；否则直到视频结束
+        if duration_sec > 0:
+            cmd.extend(["-t", f"{duration_sec}"])
+
+        # 视频编码（无损中间文件在这里做正式编码）
+        cmd.extend(video_encoder_args(encoder_profile, "mp4", self._DEFAULT_PROFILE))
+        cmd.extend(delivery_pix_fmt_args([probe_media(video)]))
+
+        # 音频：根据 keep_audio 选择保留或静音
+        if keep_audio == "yes":
+            cmd.extend(audio_encoder_args(encoder_profile, "mp4", self._DEFAULT_PROFILE))
+        else:
+            cmd.append("-an")  # no audio
+
+        cmd.append(out_path)
+        return cmd
+
+    @staticmethod
+    def _relative_keyframes(info):
+        """
+        关键帧时间点换算成相对文件起点（与 -ss 一致）的秒数。
+        """
+        offset = info.get("start_time") or 0.0
+        return [k - offset for k in probe_keyframes(info)]
+
+    @staticmethod
+    def _frame_tolerance(info):
+        """判断「是否落在关键帧上」的容差：半帧。"""
+        fps_val = info["video"]["fps"] or 0.0
+        return 0.5 / fps_val if fps_val > 0 else 0.001
+
+    def _cut_copy(self, video, info, start_time_sec, duration_sec, keep_audio, out_path):
+        """
+        copy 模式：起点是关键帧（或 0）时直接流拷贝，返回 True；
+        起点不在关键帧上时不做任何事，返回 False。
+        """
+        tol = self._frame_tolerance(info)
+        keyframes = self._relative_keyframes(info)
+        if start_time_sec <= tol:
+            seek = None
+        else:
+            k = next((k for k in keyframes if abs(k - start_time_sec) <= tol), None)
+            if k is None:
+                return False
+            # 关键帧时间是 6 位小数，稍微往后偏移，确保 seek 正好落在这个关键帧上
+            seek = k + tol / 2
+
+        cmd = ["ffmpeg", "-y"]
+        if seek is not None:
+            cmd.extend(["-ss", f"{seek}"])
+        cmd.extend(["-i", video])
+        if duration_sec > 0:
+            cmd.extend(["-t", f"{duration_sec}"])
+        cmd.extend(["-c:v", "copy"])
+        if keep_audio == "yes":
+            cmd.extend(["-c:a", "copy"])
+        else:
+            cmd.append("-an")
+        cmd.extend(["-avoid_negative_ts", "make_zero", out_path])
+
+        self._run_ffmpeg(
+            cmd,
+            duration=self._expected_duration(video, start_time_sec, duration_sec),
+            outputs=[out_path],
+        )
+        return True
+
+    def _cut_smart(
+        self,
+        video,
+        info,
+        start_time_sec,
+        duration_sec,
+        keep_audio,
+        out_path,
+        encoder_profile="default",
+    ):
         """
+        smart 模式：帧精确且接近流拷贝速度。
+        - [start, 第一个关键帧)：按源规格重编码；
+        - [第一个关键帧, 最后一个关键帧)：流拷贝；
+        - [最后一个关键帧, end)：按源规格重编码；
+        - 三段视频用 concat demuxer 流拷贝拼接，音频整段单独编码后一起封装。
+        中间文件用 MPEG-TS（h264 / hevc 为 Annex B）：每段的参数集（SPS/PPS 等）在码流里，
+        重编码的首尾段和拷贝的中间段各自用自己的参数集解码，
+        不会因为 mp4 只保存第一段的 avcC / hvcC 而花屏。
+        范围内没有完整 GOP、或源编码不支持对齐时返回 False（由调用方整段重编码）。
+        """
+        video_info = info["video"]
+        # vp9 没有带外参数集，放 mkv 即可
+        piece_ext = ".ts" if video_info["codec"] in self._INBAND_CODECS else ".mkv"
+        # 首尾段按中间文件的封装生成参数（MPEG-TS / mkv 没有 -video_track_timescale，
+        # timescale 在最后封装成 mp4 时再设置）
+        match_args = match_video_args(
+            video_info, piece_ext.lstrip("."), encoder_profile, self._DEFAULT_PROFILE
+        )
+        if match_args is None:
+            return False
+
+        tol = self._frame_tolerance(info)
+        keyframes = self._relative_keyframes(info)
+        total = info["duration"]
+
+        if duration_sec > 0:
+            end = start_time_sec + duration_sec
+            if total:
+                end = min(end, total)
+        elif total:
+            end = total
+        else:
+            return False
+        at_eof = not total or end >= total - tol
+
+        k1 = next((k for k in keyframes if k >= start_time_sec - tol), None)
+        if at_eof:
+            k2 = end
+        else:
+            k2 = max((k for k in keyframes if k <= end + tol), default=None)
+        if k1 is None or k2 is None or k2 - k1 <= tol:
+            return False
+
+        # 关键帧时间是 6 位小数，流拷贝时稍微偏移半个容差，确保 seek 正好落在 k1 上、
+        # 并且不会把 k2 那一帧拷进中间段
+        eps = tol / 2
+
+        tb = video_info.get("time_base") or ""
+        timescale = tb.split("/", 1)[1] if "/" in tb else ""
+
+        work_dir = tempfile.mkdtemp(prefix="cut_smart_", dir=self._get_output_dir())
         try:
-            # ffprobe 通常和 ffmpeg 一起安装
-            result = subprocess.run(
-                [
-                    "ffprobe",
-                    "-v", "error",
-                    "-select_streams", "v:0",
-                    "-show_entries", "stream=r_frame_rate",
-                    "-of", "default=noprint_wrappers=1:nokey=1",
-                    video_path,
-                ],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                check=True,
-            )
-            text = result.stdout.decode("utf-8", errors="ignore").strip()
-            if not text:
-                return 0.0
-
-            # 可能是 "30000/1001" 这种形式
-            if "/" in text:
-                num_str, den_str = text.split("/", 1)
-                num = float(num_str)
-                den = float(den_str)
-                if den == 0:
-                    return 0.0
-                return num / den
+            pieces = []
+
+            if k1 - start_time_sec > tol:
+                head = os.path.join(work_dir, "head" + piece_ext)
+                cmd = [
+                    "ffmpeg", "-y",
+                    "-ss", f"{start_time_sec}",
+                    "-i", video,
+                    "-t", f"{k1 - start_time_sec}",
+                    "-map", "0:v:0", "-an",
+                ] + match_args + [head]
+                self._run_ffmpeg(cmd, duration=k1 - start_time_sec)
+                pieces.append(head)
+
+            middle = os.path.join(work_dir, "middle" + piece_ext)
+            cmd = ["ffmpeg", "-y", "-ss", f"{k1 + eps}", "-i", video]
+            if not at_eof:
+                cmd.extend(["-t", f"{k2 - k1 - eps}"])
+            cmd.extend(["-map", "0:v:0", "-an", "-c:v", "copy"])
+            cmd.extend(["-avoid_negative_ts", "make_zero", middle])
+            self._run_ffmpeg(cmd, duration=k2 - k1)
+            pieces.append(middle)
+
+            if not at_eof and end - k2 > tol:
+                tail = os.path.join(work_dir, "tail" + piece_ext)
+                cmd = [
+                    "ffmpeg", "-y",
+                    "-ss", f"{k2}",
+                    "-i", video,
+                    "-t", f"{end - k2}",
+                    "-map", "0:v:0", "-an",
+                ] + match_args + [tail]
+                self._run_ffmpeg(cmd, duration=end - k2)
+                pieces.append(tail)
+
+            list_file = os.path.join(work_dir, "list.txt")
+            with open(list_file, "w", encoding="utf-8") as f:
+                for p in pieces:
+                    f.write(f"file '{os.path.abspath(p).replace(os.sep, '/')}'\n")
+
+            cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_file]
+            with_audio = keep_audio == "yes" and info["audio"] is not None
+            if with_audio:
+                if start_time_sec > 0:
+                    cmd.extend(["-ss", f"{start_time_sec}"])
+                cmd.extend(["-t", f"{end - start_time_sec}", "-i", video])
+                cmd.extend(["-map", "0:v:0", "-map", "1:a:0"])
+                cmd.extend(["-c:v", "copy"])
+                cmd.extend(audio_encoder_args(encoder_profile, "mp4", self._DEFAULT_PROFILE))
             else:
-                return float(text)
-        except Exception:
-            # 任何错误都返回 0，让外面走兜底逻辑
-            return 0.0
+                cmd.extend(["-map", "0:v:0", "-c:v", "copy", "-an"])
+            if timescale.isdigit():
+                cmd.extend(["-video_track_timescale", timescale])
+            cmd.append(out_path)
+            self._run_ffmpeg(cmd, duration=end - start_time_sec, outputs=[out_path])
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
 
-    def cut_video(
+        return True
+
+    def _cut_chunked(
+        self,
+        video,
+        start_time_sec,
+        duration_sec,
+        keep_audio,
+        out_path,
+        encoder_profile="default",
+        parallel_jobs=0,
+    ):
+        """
+        分段并行 reencode：按源关键帧把剪切范围切成多段同时编码（参数与单进程一致），
+        音频整段单独编码，最后流拷贝拼接并校验帧数 / 时长。
+        段数不足、执行失败或校验不通过时返回 False（由调用方单进程重编码）。
+        """
+        info = probe_media(video)
+        if info is None or info["video"] is None or not info["duration"]:
+            return False
+        end = info["duration"]
+        if duration_sec > 0:
+            end = min(end, start_time_sec + duration_sec)
+        max_chunks = int((end - start_time_sec) // MIN_CHUNK_SECONDS)
+        if max_chunks < 2:
+            return False
+        jobs, threads = plan_jobs(max_chunks, parallel_jobs)
+        if jobs < 2:
+            return False
+
+        def _video_cmd(seg_start, seg_duration, seg_threads, seg_path):
+            cmd = ["ffmpeg", "-y", "-threads", str(seg_threads)]
+            if seg_start > 0:
+                cmd.extend(["-ss", f"{seg_start}"])
+            cmd.extend(["-t", f"{seg_duration}", "-i", video, "-map", "0:v:0", "-an"])
+            cmd.extend(video_encoder_args(encoder_profile, "mp4", self._DEFAULT_PROFILE))
+            cmd.extend(delivery_pix_fmt_args([info]))
+            cmd.extend(["-threads", str(seg_threads), seg_path])
+            return cmd
+
+        def _audio_cmd(audio_path):
+            if keep_audio != "yes" or info["audio"] is None:
+                return None
+            cmd = ["ffmpeg", "-y"]
+            if start_time_sec > 0:
+                cmd.extend(["-ss", f"{start_time_sec}"])
+            cmd.extend(["-t", f"{end - start_time_sec}", "-i", video, "-map", "0:a:0", "-vn"])
+            cmd.extend(audio_encoder_args(encoder_profile, "mp4", self._DEFAULT_PROFILE))
+            cmd.append(audio_path)
+            return cmd
+
+        try:
+            return encode_chunked(
+                info,
+                start_time_sec,
+                end,
+                _video_cmd,
+                out_path,
+                jobs,
+                threads,
+                build_audio_cmd=_audio_cmd,
+                work_parent=self._get_output_dir(),
+                error_prefix="ffmpeg 剪切失败",
+            )
+        except (RuntimeError, OSError):
+            return False
+
+    def _resolve_range(
         self,
         video,
         mode,
@@ -189,13 +491,11 @@ class CutVideo:
         frame_count,
         fps_auto,
         fps,
-        keep_audio,
-        **kwargs,
     ):
-        # video 是通过小圆点连进来的路径字符串
-        if not video or not os.path.exists(video):
-            raise FileNotFoundError(f"视频文件不存在: {video}")
-
+        """
+        把 time / frame 两种模式的参数统一换算成 (start_time_sec, duration_sec)。
+        duration_sec <= 0 表示一直到视频结束。
+        """
         # 统一换算成「按时间剪切」所需的 start_time_sec / duration_sec
         if mode == "time":
             # ===== 按时间剪切 =====
@@ -251,61 +551,428 @@ class CutVideo:
             start_time_sec = start_frame / fps_val
             duration_sec = frame_count / fps_val if frame_count > 0 else 0.0
 
-        self._ensure_ffmpeg()
+        return start_time_sec, duration_sec
 
-        out_path = self._next_cut_path()
+    def _cut_plan(
+        self,
+        video,
+        mode,
+        start_time,
+        duration,
+        start_frame,
+        frame_count,
+        fps_auto,
+        fps,
+        keep_audio,
+        encoder_profile,
+        use_cache,
+        lazy,
+    ):
+        """
+        渲染计划模式：剪切作为 trim 节点加入计划；cut_mode / parallel_jobs 不生效
+        （整条链最后只编码一次）。
+        """
+        source = plan_input(video)
+        start_time_sec, duration_sec = self._resolve_range(
+            video, mode, start_time, duration,
+            start_frame, frame_count, fps_auto, fps,
+        )
+        plan = make_plan(
+            trim_node(source, start_time_sec, duration_sec, keep_audio == "yes"),
+            encoder_profile,
+            self._DEFAULT_PROFILE,
+            "mp4",
+        )
+        if lazy:
+            return (plan, None)
 
-        cmd = ["ffmpeg", "-y"]
+        self._ensure_ffmpeg()
+        out_path = execute_plan(
+            plan,
+            self._get_output_dir(),
+            "CutVideo",
+            self._next_cut_path,
+            use_cache=use_cache,
+            error_prefix="ffmpeg 剪切失败",
+        )
+        return (out_path, self._make_video_object(out_path))
 
-        # 时间剪切：start_time_sec > 0 时才加 -ss
-        if start_time_sec > 0:
-            cmd.extend(["-ss", f"{start_time_sec}"])
+    @node_metrics("CutVideo", "cut_mode")
+    def cut_video(
+        self,
+        video,
+        mode,
+        start_time,
+        duration,
+        start_frame,
+        frame_count,
+        fps_auto,
+        fps,
+        keep_audio,
+        cut_mode="reencode",
+        encoder_profile="default",
+        use_cache=True,
+        parallel_jobs=1,
+        lazy=False,
+        **kwargs,
+    ):
+        # 延迟执行：输出计划，或把上游计划和本次剪切合并成一次编码
+        if lazy or is_plan(video):
+            return self._cut_plan(
+                video, mode, start_time, duration, start_frame, frame_count,
+                fps_auto, fps, keep_audio, encoder_profile, use_cache, lazy,
+            )
 
-        cmd.extend(["-i", video])
+        # video 是通过小圆点连进来的路径字符串
+        if not video or not os.path.exists(video):
+            raise FileNotFoundError(f"视频文件不存在: {video}")
 
-        # duration_sec > 0 时，加 -t；否则直到视频结束
-        if duration_sec > 0:
-            cmd.extend(["-t", f"{duration_sec}"])
+        start_time_sec, duration_sec = self._resolve_range(
+            video, mode, start_time, duration,
+            start_frame, frame_count, fps_auto, fps,
+        )
 
-        # 视频编码
-        cmd.extend([
-            "-c:v", "libx264",
-            "-preset", "fast",
-            "-crf", "18",
-        ])
+        # 结果缓存：参数先归一化成秒，time / frame 两种写法得到同一个键
+        cache_key = None
+        if use_cache:
+            cache_key = make_cache_key(
+                "CutVideo",
+                {
+                    "video": os.path.abspath(video),
+                    "start": round(start_time_sec, 6),
+                    "duration": round(duration_sec, 6),
+                    "keep_audio": keep_audio,
+                    "cut_mode": cut_mode,
+                    "encoder_profile": encoder_profile,
+                },
+                [video],
+            )
+            cached = lookup_result(self._get_output_dir(), cache_key)
+            if cached is not None:
+                return (cached, self._make_video_object(cached))
 
-        # 音频：根据 keep_audio 选择保留或静音
-        if keep_audio == "yes":
-            cmd.extend(["-c:a", "aac", "-b:a", "192k"])
-        else:
-            cmd.append("-an")  # no audio
+        self._ensure_ffmpeg()
 
-        cmd.append(out_path)
+        out_path = self._next_cut_path()
 
         try:
-            subprocess.run(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                check=True,
-            )
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(
-                "ffmpeg 剪切失败：\n"
-                f"命令: {' '.join(cmd)}\n\n"
-                f"stderr:\n{e.stderr.decode('utf-8', errors='ignore')}"
-            ) from e
+            done = False
+            if cut_mode in ("copy", "smart"):
+                info = probe_media(video)
+                # 无损中间文件不能直接拷贝进输出，一律重编码
+                if info is not None and info["video"] is not None and not is_intermediate(info):
+                    if cut_mode == "copy":
+                        done = self._cut_copy(
+                            video, info, start_time_sec, duration_sec, keep_audio, out_path
+                        )
+                    # copy 模式起点不在关键帧上时，退回 smart 以保证帧精确
+                    if not done:
+                        done = self._cut_smart(
+                            video, info, start_time_sec, duration_sec, keep_audio, out_path,
+                            encoder_profile,
+                        )
+
+            # 长片段：分段并行编码，失败时退回单进程
+            if not done and parallel_jobs != 1:
+                done = self._cut_chunked(
+                    video, start_time_sec, duration_sec, keep_audio, out_path,
+                    encoder_profile, parallel_jobs,
+                )
+
+            if not done:
+                cmd = self._build_reencode_cmd(
+                    video, start_time_sec, duration_sec, keep_audio, out_path,
+                    encoder_profile,
+                )
+                self._run_ffmpeg(
+                    cmd,
+                    duration=self._expected_duration(video, start_time_sec, duration_sec),
+                    outputs=[out_path],
+                )
+        except BaseException:
+            # 失败时删除编号占位文件，避免留下 0 字节的输出
+            discard_output_path(out_path)
+            raise
+
+        if cache_key is not None:
+            store_result(self._get_output_dir(), cache_key, out_path)
 
         # 返回 video_path + video（VideoFromFile 对象）
         video_obj = self._make_video_object(out_path)
         return (out_path, video_obj)
 
 
+class CutVideoMulti(CutVideo):
+    """
+    一次从同一个视频里剪出多段：
+    - reencode：按起点排序分组，每组一次 ffmpeg（输入端 seek 到组内最早的起点），
+      split + trim 成多路输出，源视频每一帧只解码一次；
+    - copy：每段作为同一条命令里的一个输入（各自输入端 seek）流拷贝输出，
+      起点落在该位置之前最近的关键帧上。
+    输出为路径列表 / VIDEO 列表，另有一个换行分隔的路径字符串可直接接拼接节点的 video_paths。
+    输入是渲染计划时先渲染成文件。
+    """
+
+    # 每次 ffmpeg 最多同时输出的段数（每段一个编码器）
+    _MAX_OUTPUTS_PER_RUN = 16
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "video": ("STRING", {
+                    "multiline": False,
+                    "default": "",
+                    "forceInput": True,
+                }),
+                # 剪切模式：ranges 按时间（秒）还是按帧数
+                "mode": ([
+                    "time",
+                    "frame",
+                ], {
+                    "default": "time",
+                }),
+                # 每行一段：起点,长度（time 为秒，frame 为帧号 / 帧数）；
+                # 长度 <= 0 表示到视频结束；空行和 # 开头的行忽略
+                "ranges": ("STRING", {
+                    "multiline": True,
+                    "default": "0,5\n10,5",
+                }),
+                "fps_auto": ("BOOLEAN", {
+                    "default": True,
+                }),
+                "fps": ("FLOAT", {
+                    "default": 30.0,
+                    "min": 0.01,
+                    "max": 1000.0,
+                    "step": 0.01,
+                }),
+                "keep_audio": ([
+                    "yes",
+                    "no",
+                ], {
+                    "default": "yes",
+                }),
+            },
+            "optional": {
+                "cut_mode": ([
+                    "reencode",  # 帧精确，一次解码多路编码
+                    "copy",      # 流拷贝，起点对齐到关键帧
+                ], {
+                    "default": "reencode",
+                }),
+                "encoder_profile": (PROFILE_NAMES, {
+                    "default": "default",
+                }),
+                # 每段单独缓存：改动部分 ranges 时只重新剪切变化的段
+                "use_cache": ("BOOLEAN", {
+                    "default": True,
+                }),
+                # 同时运行的 ffmpeg 组数：0 = 按 CPU 数自动
+                "parallel_jobs": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 64,
+                }),
+            },
+        }
+
+    RETURN_TYPES = ("STRING", "VIDEO", "STRING")
+    RETURN_NAMES = ("video_paths", "videos", "path_list")
+    OUTPUT_IS_LIST = (True, True, False)
+    FUNCTION = "cut_multi"
+
+    @staticmethod
+    def _parse_ranges(ranges):
+        """
+        解析 ranges 文本：每行「起点,长度」（也可用空格分隔），返回 [(起点, 长度)]。
+        """
+        result = []
+        for n, line in enumerate(str(ranges or "").splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            fields = line.replace(",", " ").split()
+            try:
+                start = float(fields[0])
+                length = float(fields[1]) if len(fields) > 1 else 0.0
+            except (ValueError, IndexError):
+                raise ValueError(f"ranges 第 {n} 行格式错误（应为「起点,长度」）: {line}")
+            result.append((start, length))
+        return result
+
+    def _build_split_cmd(self, video, info, segments, keep_audio, encoder_profile, threads):
+        """
+        reencode：一组段（按起点排序）编译成一条 split + trim 的多输出命令。
+        segments：[(start_sec, duration_sec, out_path)]。
+        threads：本条命令的线程预算（plan_jobs 的 threads_per_job）。调度器只会给最后一个输出
+        加 -threads，这里自己写好：解码 / 滤镜用整份预算，各输出的编码器平分，
+        避免最多 16 个编码器各自按 CPU 数开线程。
+        """
+        seek = segments[0][0]
+        if all(d > 0 for _, d, _ in segments):
+            end = max(s + d for s, d, _ in segments)
+        else:
+            end = None
+        with_audio = keep_audio == "yes" and info is not None and info["audio"] is not None
+
+        n = len(segments)
+        enc_threads = str(max(1, threads // n))
+        cmd = ["ffmpeg", "-y", "-filter_complex_threads", str(threads), "-threads", str(threads)]
+        if seek > 0:
+            cmd += ["-ss", f"{seek}"]
+        cmd += ["-i", video]
+        if end is not None:
+            cmd += ["-t", f"{end - seek}"]
+
+        filters = ["[0:v:0]split=" + str(n) + "".join(f"[s{i}]" for i in range(n))]
+        if with_audio:
+            filters.append("[0:a:0]asplit=" + str(n) + "".join(f"[sa{i}]" for i in range(n)))
+        for i, (start, duration, _) in enumerate(segments):
+            opts = f"start={start - seek:.6f}" + (f":duration={duration:.6f}" if duration > 0 else "")
+            filters.append(f"[s{i}]trim={opts},setpts=PTS-STARTPTS[v{i}]")
+            if with_audio:
+                filters.append(f"[sa{i}]atrim={opts},asetpts=PTS-STARTPTS[a{i}]")
+        cmd += ["-filter_complex", ";".join(filters)]
+
+        v_args = video_encoder_args(encoder_profile, "mp4", self._DEFAULT_PROFILE)
+        v_args += delivery_pix_fmt_args([info])
+        a_args = audio_encoder_args(encoder_profile, "mp4", self._DEFAULT_PROFILE)
+        for i, (_, _, out_path) in enumerate(segments):
+            # 编码档位自己指定了 threads 时排在后面，以档位为准
+            cmd += ["-map", f"[v{i}]", "-threads", enc_threads] + v_args
+            if with_audio:
+                cmd += ["-map", f"[a{i}]"] + a_args
+            else:
+                cmd += ["-an"]
+            cmd.append(out_path)
+        return cmd, (end - seek if end is not None else None)
+
+    def _build_copy_cmd(self, video, info, segments, keep_audio):
+        """
+        copy：每段一个输入（输入端 seek，只读取需要的部分），各自流拷贝到一个输出。
+        """
+        with_audio = keep_audio == "yes" and info is not None and info["audio"] is not None
+        cmd = ["ffmpeg", "-y"]
+        for start, duration, _ in segments:
+            if start > 0:
+                cmd += ["-ss", f"{start}"]
+            if duration > 0:
+                cmd += ["-t", f"{duration}"]
+            cmd += ["-i", video]
+        for i, (_, _, out_path) in enumerate(segments):
+            cmd += ["-map", f"{i}:v:0"]
+            cmd += ["-map", f"{i}:a:0"] if with_audio else ["-an"]
+            cmd += ["-c", "copy", "-avoid_negative_ts", "make_zero", out_path]
+        durations = [d for _, d, _ in segments if d > 0]
+        return cmd, (max(durations) if durations else None)
+
+    @node_metrics("CutVideoMulti", "cut_mode")
+    def cut_multi(
+        self,
+        video,
+        mode,
+        ranges,
+        fps_auto,
+        fps,
+        keep_audio,
+        cut_mode="reencode",
+        encoder_profile="default",
+        use_cache=True,
+        parallel_jobs=0,
+    ):
+        # 上游 lazy 输出的渲染计划先渲染成文件（带结果缓存），再从文件里剪出各段
+        video = render_input(video, self._get_output_dir(), "CutVideoMulti")
+        if not video or not os.path.exists(video):
+            raise FileNotFoundError(f"视频文件不存在: {video}")
+
+        parsed = self._parse_ranges(ranges)
+        if not parsed:
+            raise ValueError("ranges 为空：每行填写一段「起点,长度」。")
+        resolved = [
+            self._resolve_range(video, mode, a, b, a, b, fps_auto, fps)
+            for a, b in parsed
+        ]
+
+        info = probe_media(video)
+        if cut_mode == "copy" and (info is None or info["video"] is None or is_intermediate(info)):
+            # 无损中间文件 / 无法探测：不能直接拷贝，改为重编码
+            cut_mode = "reencode"
+
+        self._ensure_ffmpeg()
+
+        # 每段单独查缓存
+        out_paths = [None] * len(resolved)
+        keys = [None] * len(resolved)
+        pending = []
+        for i, (start_sec, duration_sec) in enumerate(resolved):
+            if use_cache:
+                keys[i] = make_cache_key(
+                    "CutVideoMulti",
+                    {
+                        "video": os.path.abspath(video),
+                        "start": round(start_sec, 6),
+                        "duration": round(duration_sec, 6),
+                        "keep_audio": keep_audio,
+                        "cut_mode": cut_mode,
+                        "encoder_profile": encoder_profile,
+                    },
+                    [video],
+                )
+                out_paths[i] = lookup_result(self._get_output_dir(), keys[i])
+            if out_paths[i] is None:
+                pending.append(i)
+
+        if pending:
+            for i in pending:
+                out_paths[i] = self._next_cut_path()
+            try:
+                # 按起点排序分组：组内 seek 到最早的起点，解码范围尽量小
+                pending.sort(key=lambda i: resolved[i][0])
+                groups = [
+                    pending[k:k + self._MAX_OUTPUTS_PER_RUN]
+                    for k in range(0, len(pending), self._MAX_OUTPUTS_PER_RUN)
+                ]
+                jobs, threads = plan_jobs(len(groups), parallel_jobs)
+                cmds, durations = [], []
+                for group in groups:
+                    segments = [(resolved[i][0], resolved[i][1], out_paths[i]) for i in group]
+                    if cut_mode == "copy":
+                        cmd, duration = self._build_copy_cmd(video, info, segments, keep_audio)
+                    else:
+                        cmd, duration = self._build_split_cmd(
+                            video, info, segments, keep_audio, encoder_profile, threads
+                        )
+                    cmds.append(cmd)
+                    durations.append(duration)
+
+                run_ffmpeg_parallel(
+                    cmds,
+                    jobs,
+                    durations=durations,
+                    outputs=[[out_paths[i] for i in group] for group in groups],
+                    error_prefix="ffmpeg 剪切失败",
+                )
+            except BaseException:
+                # 失败时删除编号占位文件，避免留下 0 字节的输出
+                for i in pending:
+                    discard_output_path(out_paths[i])
+                raise
+            for i in pending:
+                if keys[i] is not None:
+                    store_result(self._get_output_dir(), keys[i], out_paths[i])
+
+        videos = [self._make_video_object(p) for p in out_paths]
+        return (out_paths, videos, "\n".join(out_paths))
+
+
 # 注册节点
 NODE_CLASS_MAPPINGS = {
     "CutVideo": CutVideo,
+    "CutVideoMulti": CutVideoMulti,
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
     "CutVideo": "Cut Video (FFmpeg)",
+    "CutVideoMulti": "Cut Video Multi-Range (FFmpeg)",
 }
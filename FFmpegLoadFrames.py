@@ -0,0 +1,334 @@
+import math
+import os
+import subprocess
+import threading
+from collections import deque
+
+from .FFmpegCutVideo import CutVideo
+from .ffmpeg_metrics import node_metrics
+from .ffmpeg_plan import render_input
+from .ffmpeg_probe import probe_media
+from .ffmpeg_runner import ffmpeg_slot, processing_interrupted, raise_interrupted, terminate_process
+from .ffmpeg_scheduler import popen_kwargs
+
+
+class LoadVideoFrames:
+    """
+    视频路径 -> IMAGE：ffmpeg 解码成 rawvideo 经管道读入，写进预先分配好的 float 张量。
+    时间 / 帧数范围参数与 CutVideo 一致；输入是渲染计划时先渲染成文件。
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                # 小圆点端口的 STRING：只能连线
+                "video": ("STRING", {
+                    "multiline": False,
+                    "default": "",
+                    "forceInput": True,
+                }),
+                # 读取范围：按时间 or 按帧数（与 CutVideo 相同）
+                "mode": ([
+                    "time",   # 按时间
+                    "frame",  # 按帧数
+                ], {
+                    "default": "time",
+                }),
+                # ====== 时间模式参数 ======
+                "start_time": ("FLOAT", {
+                    "default": 0.0,
+                    "min": 0.0,
+                    "max": 1e9,
+                    "step": 0.01,
+                }),
+                # 持续时长（秒），<= 0 表示一直读到视频结束
+                "duration": ("FLOAT", {
+                    "default": 0.0,
+                    "min": 0.0,
+                    "max": 1e9,
+                    "step": 0.01,
+                }),
+                # ====== 帧数模式参数 ======
+                "start_frame": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 10_000_000,
+                    "step": 1,
+                }),
+                # 要读取的帧数，<= 0 表示一直读到视频结束
+                "frame_count": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 10_000_000,
+                    "step": 1,
+                }),
+                "fps_auto": ("BOOLEAN", {
+                    "default": True,
+                }),
+                "fps": ("FLOAT", {
+                    "default": 30.0,
+                    "min": 0.01,
+                    "max": 1000.0,
+                    "step": 0.01,
+                }),
+            },
+            "optional": {
+                # 在 ffmpeg 里缩放：两个都 > 0 时缩放到指定尺寸；
+                # 只填一个时按比例计算另一个；都为 0 保持原尺寸
+                "width": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 8192,
+                    "step": 1,
+                }),
+                "height": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 8192,
+                    "step": 1,
+                }),
+                # 每隔 frame_step 帧取一帧（1 = 每一帧）
+                "frame_step": ("INT", {
+                    "default": 1,
+                    "min": 1,
+                    "max": 10_000,
+                    "step": 1,
+                }),
+                # 最多读取的帧数（0 = 不限制），用于限制显存 / 内存占用
+                "max_frames": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 10_000_000,
+                    "step": 1,
+                }),
+            },
+        }
+
+    RETURN_TYPES = ("IMAGE", "INT", "FLOAT")
+    RETURN_NAMES = ("frames", "frame_count", "fps")
+    FUNCTION = "load_frames"
+    CATEGORY = "FFmpeg"
+
+    # 每次从管道读取的目标字节数
+    _CHUNK_BYTES = 32 * 1024 * 1024
+
+    @staticmethod
+    def _output_size(src_w, src_h, width, height):
+        """输出宽高（在 Python 里算好，保证与预分配的张量一致）。"""
+        if width > 0 and height > 0:
+            return width, height
+        if width > 0:
+            return width, max(1, int(round(src_h * width / src_w)))
+        if height > 0:
+            return max(1, int(round(src_w * height / src_h))), height
+        return src_w, src_h
+
+    @staticmethod
+    def _expected_frames(info, start_time_sec, duration_sec, fps_val, frame_step):
+        """
+        范围内按 frame_step 抽取后的帧数上限（用于预分配和 -frames:v）。
+        """
+        total = info["duration"] or 0.0
+        if duration_sec > 0:
+            span = duration_sec
+            if total:
+                span = min(span, max(0.0, total - start_time_sec))
+        else:
+            span = max(0.0, total - start_time_sec)
+        frames = int(math.ceil(span * fps_val - 1e-6))
+        if info["video"]["nb_frames"]:
+            frames = min(frames, info["video"]["nb_frames"])
+        return max(0, (frames + frame_step - 1) // frame_step)
+
+    @staticmethod
+    def _build_decode_cmd(video, src, start_time_sec, duration_sec, frame_step, out_w, out_h, limit):
+        """解码成 rgb24 rawvideo 写到 stdout：抽帧、缩放都在 ffmpeg 里完成，最多 limit 帧。"""
+        cmd = ["ffmpeg", "-v", "error"]
+        if start_time_sec > 0:
+            cmd.extend(["-ss", f"{start_time_sec}"])
+        if duration_sec > 0:
+            cmd.extend(["-t", f"{duration_sec}"])
+        cmd.extend(["-i", video, "-map", "0:v:0", "-an", "-sn", "-dn"])
+
+        filters = []
+        if frame_step > 1:
+            filters.append(f"select=not(mod(n\\,{frame_step}))")
+        if (out_w, out_h) != (src["width"], src["height"]):
+            filters.append(f"scale={out_w}:{out_h}:flags=area")
+        if filters:
+            cmd.extend(["-vf", ",".join(filters)])
+        cmd.extend([
+            "-frames:v", str(limit),
+            "-pix_fmt", "rgb24",
+            "-f", "rawvideo",
+            "pipe:1",
+        ])
+        return cmd
+
+    @classmethod
+    def _frame_limit(
+        cls, info, mode, frame_count, start_time_sec, duration_sec, fps_val, frame_step, max_frames
+    ):
+        """
+        要读取的帧数（-frames:v 和预分配的张量长度）：
+        帧数模式按用户给的 frame_count，但都不超过范围内实际存在的帧数，
+        避免按一个很大的 frame_count 预分配内存。
+        """
+        limit = cls._expected_frames(info, start_time_sec, duration_sec, fps_val, frame_step)
+        if mode == "frame" and int(frame_count) > 0:
+            limit = min(limit, (int(frame_count) + frame_step - 1) // frame_step)
+        if max_frames and max_frames > 0:
+            limit = min(limit, int(max_frames))
+        return limit
+
+    @node_metrics("LoadVideoFrames", "mode")
+    def load_frames(
+        self,
+        video,
+        mode,
+        start_time,
+        duration,
+        start_frame,
+        frame_count,
+        fps_auto,
+        fps,
+        width=0,
+        height=0,
+        frame_step=1,
+        max_frames=0,
+    ):
+        import numpy as np
+        import torch
+
+        # video 是通过小圆点连进来的路径字符串；上游 lazy 输出的渲染计划先渲染成文件
+        video = render_input(video, CutVideo._get_output_dir(), "LoadVideoFrames")
+        if not video or not os.path.exists(video):
+            raise FileNotFoundError(f"视频文件不存在: {video}")
+
+        info = probe_media(video)
+        if info is None or info["video"] is None:
+            raise RuntimeError(f"无法读取视频信息: {video}")
+        src = info["video"]
+        if not src["width"] or not src["height"]:
+            raise RuntimeError(f"无法读取视频尺寸: {video}")
+
+        # 与 CutVideo 相同的范围换算（time / frame 两种模式）
+        start_time_sec, duration_sec = CutVideo()._resolve_range(
+            video, mode, start_time, duration,
+            start_frame, frame_count, fps_auto, fps,
+        )
+
+        frame_step = max(1, int(frame_step))
+        src_fps = src["fps"] or src["r_fps"] or float(fps)
+        out_w, out_h = self._output_size(src["width"], src["height"], int(width), int(height))
+
+        limit = self._frame_limit(
+            info, mode, frame_count, start_time_sec, duration_sec, src_fps, frame_step, max_frames
+        )
+        if limit <= 0:
+            raise ValueError("选定范围内没有可读取的帧。")
+
+        cmd = self._build_decode_cmd(
+            video, src, start_time_sec, duration_sec, frame_step, out_w, out_h, limit
+        )
+
+        # 预分配输出：峰值内存 = 输出张量 + 一个读取块
+        frame_bytes = out_w * out_h * 3
+        out = torch.empty((limit, out_h, out_w, 3), dtype=torch.float32)
+        chunk_frames = max(1, min(limit, self._CHUNK_BYTES // frame_bytes))
+        buf = bytearray(chunk_frames * frame_bytes)
+        view = memoryview(buf)
+
+        try:
+            import comfy.utils
+            bar = comfy.utils.ProgressBar(limit)
+        except Exception:
+            bar = None
+
+        with ffmpeg_slot(cmd) as call:
+            proc = subprocess.Popen(
+                call.cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                **popen_kwargs(),
+            )
+
+            # 只保留 stderr 末尾若干行
+            stderr_tail = deque(maxlen=50)
+
+            def _drain_stderr():
+                for line in proc.stderr:
+                    stderr_tail.append(line.decode("utf-8", errors="ignore"))
+
+            stderr_thread = threading.Thread(target=_drain_stderr, daemon=True)
+            stderr_thread.start()
+
+            n = 0
+            interrupted = False
+            finished = False
+            try:
+                while n < limit:
+                    if processing_interrupted():
+                        interrupted = True
+                        break
+                    want = min(chunk_frames, limit - n) * frame_bytes
+                    got = 0
+                    while got < want:
+                        r = proc.stdout.readinto(view[got:want])
+                        if not r:
+                            break
+                        got += r
+                    k = got // frame_bytes
+                    if k == 0:
+                        break
+                    block = np.frombuffer(buf, dtype=np.uint8, count=k * frame_bytes)
+                    block = torch.from_numpy(block).view(k, out_h, out_w, 3)
+                    out[n:n + k].copy_(block).div_(255.0)
+                    n += k
+                    if bar is not None:
+                        bar.update_absolute(n, limit)
+                    if got < want:
+                        break
+                finished = not interrupted
+            finally:
+                if not finished:
+                    # 被中断 / 出错时不再需要 ffmpeg 的剩余输出，主动终止
+                    terminate_process(proc)
+                    if interrupted:
+                        call.status = "interrupted"
+                # 读够帧数时 ffmpeg 已按 -frames:v 写完，关闭管道后等它自行退出（不记成失败）
+                try:
+                    proc.stdout.close()
+                except OSError:
+                    pass
+                returncode = call.wait(proc)
+                stderr_thread.join()
+            call.frames = n
+
+        if interrupted:
+            raise_interrupted()
+        if n == 0:
+            raise RuntimeError(
+                f"ffmpeg 解码失败（exit code {returncode}）：\n"
+                f"命令: {' '.join(cmd)}\n\n"
+                f"stderr:\n{''.join(stderr_tail)}"
+            )
+
+        # 实际帧数通常与预估一致；少于预估时复制出前 n 帧，释放多分配的部分
+        if n < limit:
+            frames = out[:n].clone()
+            del out
+        else:
+            frames = out
+        return (frames, n, float(src_fps) / frame_step)
+
+
+NODE_CLASS_MAPPINGS = {
+    "LoadVideoFrames": LoadVideoFrames,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "LoadVideoFrames": "Load Video Frames (FFmpeg)",
+}
@@ -0,0 +1,68 @@
+import os
+
+from .ffmpeg_metrics import format_summary, load_records, log_files, summarize
+
+
+class FFmpegMetricsSummary:
+    """
+    汇总 ffmpeg 性能日志：按节点 / 模式（或其它字段）统计调用数、失败数、
+    wall / CPU 时间的 p50 / p95 与总小时数，按总耗时排序。
+    """
+
+    # 分组方式 -> 日志字段
+    _GROUPS = {
+        "node+mode": ("node", "mode"),
+        "node": ("node",),
+        "kind": ("kind",),
+        "status": ("node", "status"),
+    }
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "group_by": (list(cls._GROUPS.keys()), {
+                    "default": "node+mode",
+                }),
+                # 只统计最近 N 小时（0 = 全部日志）
+                "since_hours": ("FLOAT", {
+                    "default": 24.0,
+                    "min": 0.0,
+                    "max": 24.0 * 365,
+                    "step": 1.0,
+                }),
+            },
+        }
+
+    @classmethod
+    def IS_CHANGED(cls, **kwargs):
+        """日志有新内容时重新汇总。"""
+        state = []
+        for name in log_files():
+            try:
+                st = os.stat(name)
+            except OSError:
+                continue
+            state.append((name, st.st_size, st.st_mtime_ns))
+        return str(state)
+
+    RETURN_TYPES = ("STRING",)
+    RETURN_NAMES = ("summary",)
+    FUNCTION = "summarize"
+    CATEGORY = "FFmpeg"
+
+    def summarize(self, group_by, since_hours):
+        keys = self._GROUPS.get(group_by, ("node", "mode"))
+        rows = summarize(load_records(since_hours=since_hours), keys)
+        if not rows:
+            return ("（没有 ffmpeg 性能记录）",)
+        return (format_summary(rows, keys),)
+
+
+NODE_CLASS_MAPPINGS = {
+    "FFmpegMetricsSummary": FFmpegMetricsSummary,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "FFmpegMetricsSummary": "FFmpeg Metrics Summary",
+}
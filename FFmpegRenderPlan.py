@@ -0,0 +1,96 @@
+import os
+
+from .comfy_compat import video_from_file_class
+from .ffmpeg_encoders import PROFILE_NAMES
+from .ffmpeg_metrics import node_metrics
+from .ffmpeg_output import allocate_output_path
+from .ffmpeg_plan import execute_plan, is_plan, load_plan, make_plan, plan_input
+
+
+class RenderPlan:
+    """
+    把 lazy 模式的剪切 / 叠加 / 拼接节点输出的渲染计划编译成一条 ffmpeg 命令执行：
+    整条链只解码、编码一次，不写中间文件。
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                # 上游 lazy 节点的 video_path / output_path（也接受普通视频路径：直接重编码）
+                "plan": ("STRING", {
+                    "multiline": False,
+                    "default": "",
+                    "forceInput": True,
+                }),
+                "filename_prefix": ("STRING", {"default": "render_"}),
+            },
+            "optional": {
+                # plan = 使用计划里最后一个节点的编码档位
+                "encoder_profile": (["plan"] + PROFILE_NAMES, {
+                    "default": "plan",
+                }),
+                # 相同计划 + 输入文件未变时直接复用上一次的输出文件
+                "use_cache": ("BOOLEAN", {
+                    "default": True,
+                }),
+            },
+        }
+
+    RETURN_TYPES = ("STRING", "VIDEO")
+    RETURN_NAMES = ("video_path", "video")
+    FUNCTION = "render"
+    CATEGORY = "FFmpeg"
+
+    # 输出到 comfyui/output（当前文件往上两层）
+    @staticmethod
+    def _get_output_dir():
+        base_dir = os.path.abspath(
+            os.path.join(os.path.dirname(__file__), "..", "..")
+        )
+        output_dir = os.path.join(base_dir, "output")
+        os.makedirs(output_dir, exist_ok=True)
+        return output_dir
+
+    def _make_video_object(self, path: str):
+        """
+        使用 comfy_api 的 VideoFromFile 生成 VIDEO 对象。
+        """
+        VideoFromFile = video_from_file_class()
+        if VideoFromFile is None:
+            raise RuntimeError(
+                "未找到 comfy_api.input_impl.VideoFromFile，"
+                "请确认 ComfyUI 已升级到带 VIDEO 类型的版本。"
+            )
+        return VideoFromFile(path)
+
+    @node_metrics("RenderPlan")
+    def render(self, plan, filename_prefix, encoder_profile="plan", use_cache=True):
+        if is_plan(plan):
+            plan_data = load_plan(plan)
+        else:
+            # 普通视频路径：当成只有一个输入的计划
+            plan_data = load_plan(make_plan(plan_input(plan)))
+
+        fmt = plan_data.get("format") or "mp4"
+        out_path = execute_plan(
+            plan_data,
+            self._get_output_dir(),
+            "RenderPlan",
+            lambda: allocate_output_path(
+                self._get_output_dir(), filename_prefix, f".{fmt}", digits=5, sep="_"
+            ),
+            use_cache=use_cache,
+            encoder_profile=None if encoder_profile == "plan" else encoder_profile,
+            error_prefix="ffmpeg 渲染失败",
+        )
+        return (out_path, self._make_video_object(out_path))
+
+
+NODE_CLASS_MAPPINGS = {
+    "RenderPlan": RenderPlan,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "RenderPlan": "Render Plan (FFmpeg)",
+}
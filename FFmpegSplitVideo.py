@@ -0,0 +1,256 @@
+import csv
+import glob
+import logging
+import os
+
+from .FFmpegCutVideo import CutVideo
+from .ffmpeg_cache import lookup_result, make_cache_key, store_result
+from .ffmpeg_metrics import node_metrics
+from .ffmpeg_output import allocate_output_path, discard_output_path
+from .ffmpeg_plan import render_input
+from .ffmpeg_probe import probe_media
+from .ffmpeg_runner import run_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+
+class SplitVideo:
+    """
+    不重编码地把长视频切成多段（ffmpeg segment muxer + -c copy），切点都在关键帧上：
+    - length：每段约 segment_seconds 秒（到时间后的第一个关键帧切开）；
+    - count：切成 segment_count 段，切点取离均分位置最近的关键帧；
+    - keyframes：在给定的时间点切（应为关键帧时间，否则顺延到之后的第一个关键帧）。
+    输出按顺序的片段路径列表和每段在原视频里的准确起始时间（来自 segment 列表文件）。
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "video": ("STRING", {
+                    "multiline": False,
+                    "default": "",
+                    "forceInput": True,
+                }),
+                "split_by": ([
+                    "length",
+                    "count",
+                    "keyframes",
+                ], {
+                    "default": "length",
+                }),
+                # length 模式：目标段长（秒）
+                "segment_seconds": ("FLOAT", {
+                    "default": 60.0,
+                    "min": 0.1,
+                    "max": 1e9,
+                    "step": 0.1,
+                }),
+                # count 模式：段数
+                "segment_count": ("INT", {
+                    "default": 4,
+                    "min": 1,
+                    "max": 10_000,
+                    "step": 1,
+                }),
+                # keyframes 模式：切点时间（秒），逗号或换行分隔
+                "split_times": ("STRING", {
+                    "multiline": True,
+                    "default": "",
+                }),
+            },
+            "optional": {
+                "filename_prefix": ("STRING", {"default": "split_"}),
+                # 相同输入 + 参数时直接复用上一次切好的片段
+                "use_cache": ("BOOLEAN", {
+                    "default": True,
+                }),
+            },
+        }
+
+    RETURN_TYPES = ("STRING", "FLOAT", "STRING")
+    RETURN_NAMES = ("segment_paths", "start_times", "path_list")
+    OUTPUT_IS_LIST = (True, True, False)
+    FUNCTION = "split"
+    CATEGORY = "FFmpeg"
+
+    # 与剪切节点相同的输出目录（comfyui/output）
+    _get_output_dir = staticmethod(CutVideo._get_output_dir)
+
+    @staticmethod
+    def _parse_times(text):
+        """解析切点时间列表（逗号 / 空白 / 换行分隔），返回升序去重后的秒数。"""
+        times = set()
+        for token in str(text or "").replace(",", " ").split():
+            try:
+                t = float(token)
+            except ValueError:
+                raise ValueError(f"split_times 中的时间无效: {token}")
+            if t > 0:
+                times.add(t)
+        return sorted(times)
+
+    @staticmethod
+    def _count_split_times(info, count):
+        """
+        count 模式：每个均分位置取最近的关键帧作为切点。
+        除第一帧外没有关键帧（或关键帧扫描失败）时返回 None，由调用方改按均分时长切。
+        """
+        duration = info["duration"] or 0.0
+        if count <= 1 or duration <= 0:
+            return []
+        keyframes = [k for k in CutVideo._relative_keyframes(info) if k > 0]
+        if not keyframes:
+            return None
+        times = set()
+        for i in range(1, count):
+            target = duration * i / count
+            times.add(min(keyframes, key=lambda k: abs(k - target)))
+        return sorted(times)
+
+    def _build_segment_cmd(self, video, info, split_by, segment_seconds, times, list_path, pattern):
+        cmd = [
+            "ffmpeg", "-y",
+            "-i", video,
+            "-map", "0:v:0",
+            "-map", "0:a:0?",
+            "-c", "copy",
+            "-f", "segment",
+            "-reset_timestamps", "1",
+            "-segment_list", list_path,
+            "-segment_list_type", "csv",
+            # 切点与关键帧时间的比较容差（半帧），避免浮点误差顺延到下一个关键帧
+            "-segment_time_delta", f"{CutVideo._frame_tolerance(info):.6f}",
+        ]
+        if split_by == "length":
+            cmd += ["-segment_time", f"{segment_seconds}"]
+        else:
+            cmd += ["-segment_times", ",".join(f"{t:.6f}" for t in times)]
+        cmd.append(pattern)
+        return cmd
+
+    @staticmethod
+    def _read_segment_list(list_path):
+        """
+        读取 segment muxer 写出的 csv 列表（文件名,起始时间,结束时间），
+        返回 [(绝对路径, 起始秒)]；任一片段缺失时返回 None。
+        """
+        directory = os.path.dirname(list_path)
+        segments = []
+        try:
+            with open(list_path, "r", encoding="utf-8", newline="") as f:
+                for row in csv.reader(f):
+                    if len(row) < 2:
+                        continue
+                    path = os.path.join(directory, row[0])
+                    if not os.path.exists(path):
+                        return None
+                    segments.append((path, float(row[1])))
+        except (OSError, ValueError):
+            return None
+        return segments or None
+
+    @node_metrics("SplitVideo", "split_by")
+    def split(
+        self,
+        video,
+        split_by,
+        segment_seconds,
+        segment_count,
+        split_times,
+        filename_prefix="split_",
+        use_cache=True,
+    ):
+        # 上游 lazy 输出的渲染计划先渲染成文件（segment muxer 只能流拷贝已有文件）
+        video = render_input(video, self._get_output_dir(), "SplitVideo")
+        if not video or not os.path.exists(video):
+            raise FileNotFoundError(f"视频文件不存在: {video}")
+
+        info = probe_media(video)
+        if info is None or info["video"] is None:
+            raise ValueError(f"无法读取视频信息: {video}")
+
+        times = []
+        if split_by == "count":
+            times = self._count_split_times(info, int(segment_count))
+            if times is None:
+                # 找不到关键帧：按均分时长切（segment muxer 在每个时间点之后的第一个关键帧切开）
+                segment_seconds = info["duration"] / int(segment_count)
+                logger.warning(
+                    "SplitVideo：%s 没有可用的关键帧，count 模式改为每 %.3f 秒切一段，段数可能少于 %d",
+                    video, segment_seconds, int(segment_count),
+                )
+                split_by, times = "length", []
+        elif split_by == "keyframes":
+            times = self._parse_times(split_times)
+
+        if split_by != "length" and not times:
+            # 没有切点：不运行 segment muxer，源视频本身就是唯一的一段
+            return self._outputs([(video, 0.0)])
+
+        output_dir = self._get_output_dir()
+        cache_key = None
+        if use_cache:
+            cache_key = make_cache_key(
+                "SplitVideo",
+                {
+                    "video": os.path.abspath(video),
+                    "split_by": split_by,
+                    "segment_seconds": segment_seconds if split_by == "length" else None,
+                    "times": [round(t, 6) for t in times],
+                    "filename_prefix": filename_prefix,
+                },
+                [video],
+            )
+            cached = lookup_result(output_dir, cache_key)
+            if cached is not None:
+                segments = self._read_segment_list(cached)
+                if segments is not None:
+                    return self._outputs(segments)
+
+        # 列表文件占位分配编号，片段按同一编号命名：split_00001.csv -> split_00001_000.mp4 ...
+        list_path = allocate_output_path(output_dir, filename_prefix, ".csv", digits=5, sep="_")
+        base = os.path.splitext(list_path)[0]
+        ext = os.path.splitext(video)[1] or ".mp4"
+        pattern = f"{base}_%03d{ext}"
+
+        cmd = self._build_segment_cmd(
+            video, info, split_by, segment_seconds, times, list_path, pattern
+        )
+        try:
+            run_ffmpeg(
+                cmd,
+                duration=info["duration"],
+                outputs=[list_path],
+                error_prefix="ffmpeg 分割失败",
+            )
+        except BaseException:
+            for path in glob.glob(glob.escape(base) + "_*" + ext):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            discard_output_path(list_path)
+            raise
+
+        segments = self._read_segment_list(list_path)
+        if segments is None:
+            raise RuntimeError(f"ffmpeg 分割失败：没有生成片段列表 {list_path}")
+        if cache_key is not None:
+            store_result(output_dir, cache_key, list_path)
+        return self._outputs(segments)
+
+    @staticmethod
+    def _outputs(segments):
+        paths = [p for p, _ in segments]
+        starts = [s for _, s in segments]
+        return (paths, starts, "\n".join(paths))
+
+
+NODE_CLASS_MAPPINGS = {
+    "SplitVideo": SplitVideo,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "SplitVideo": "Split Video (FFmpeg, stream copy)",
+}
@@ -1,11 +1,20 @@
 import os
-import subprocess
 
-# 正确的 VideoFromFile 导入位置（和官方 comfy_api 节点一致）
-try:
-    from comfy_api.input_impl import VideoFromFile
-except Exception:
-    VideoFromFile = None
+from .comfy_compat import video_from_file_class
+from .concat_videos_path import split_path_list
+from .ffmpeg_cache import fingerprint_inputs, lookup_result, make_cache_key, store_result
+from .ffmpeg_encoders import (
+    PROFILE_NAMES,
+    audio_encoder_args,
+    delivery_pix_fmt_args,
+    video_encoder_args,
+)
+from .ffmpeg_metrics import node_metrics
+from .ffmpeg_output import allocate_output_path, discard_output_path
+from .ffmpeg_parallel import MIN_CHUNK_SECONDS, encode_chunked, plan_jobs
+from .ffmpeg_plan import execute_plan, is_plan, make_plan, overlay_node, plan_input
+from .ffmpeg_probe import probe_media
+from .ffmpeg_runner import ensure_ffmpeg, run_ffmpeg
 
 
 class OverlayVideos:
@@ -64,6 +73,25 @@ class OverlayVideos:
                     "default": "",
                     "forceInput": True,
                 }),
+                # 编码档位：default = 原来的 preset fast / crf 18
+                "encoder_profile": (PROFILE_NAMES, {
+                    "default": "default",
+                }),
+                # 相同输入 + 参数时直接复用上一次的输出文件
+                "use_cache": ("BOOLEAN", {
+                    "default": True,
+                }),
+                # 分段并行编码的段数：1 = 单进程（默认），0 = 按 CPU 数自动；
+                # 适合小时级的长视频
+                "parallel_jobs": ("INT", {
+                    "default": 1,
+                    "min": 0,
+                    "max": 64,
+                }),
+                # 延迟执行：不编码，输出渲染计划交给下游合并成一次 ffmpeg；此时 video 输出为空
+                "lazy": ("BOOLEAN", {
+                    "default": False,
+                }),
             }
         }
 
@@ -73,6 +101,9 @@ class OverlayVideos:
     FUNCTION = "overlay"
     CATEGORY = "FFmpeg"
 
+    # encoder_profile = "default" 时使用的档位（preset fast / crf 18）
+    _DEFAULT_PROFILE = "fast"
+
     # 输出到 comfyui/output（当前文件往上两层）
     @staticmethod
     def _get_output_dir():
@@ -87,40 +118,12 @@ class OverlayVideos:
     def _next_overlay_path(cls):
         """
         在 ComfyUI/output 下自动生成 overlay_01.mp4, overlay_02.mp4 这样的文件名。
+        使用共享分配器：计数器 O(1) 递增 + 原子占位创建，并发时不会重名。
         """
-        output_dir = cls._get_output_dir()
-        prefix = "overlay_"
-        ext = ".mp4"
+        return allocate_output_path(cls._get_output_dir(), "overlay_", ".mp4", digits=2, sep="")
 
-        max_idx = 0
-        try:
-            for name in os.listdir(output_dir):
-                if not name.startswith(prefix) or not name.endswith(ext):
-                    continue
-                middle = name[len(prefix):-len(ext)]  # 取中间的数字部分
-                if middle.isdigit():
-                    idx = int(middle)
-                    if idx > max_idx:
-                        max_idx = idx
-        except FileNotFoundError:
-            # 理论上 _get_output_dir 已经确保存在，这里只是兜底
-            os.makedirs(output_dir, exist_ok=True)
-
-        next_idx = max_idx + 1
-        filename = f"{prefix}{next_idx:02d}{ext}"
-        return os.path.join(output_dir, filename)
-
-    def _ensure_ffmpeg(self):
-        """简单检测 ffmpeg 是否可用。"""
-        try:
-            subprocess.run(
-                ["ffmpeg", "-version"],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                check=True
-            )
-        except Exception as e:
-            raise RuntimeError("无法调用 ffmpeg，请确认已安装并加入系统 PATH。") from e
+    # 检测 ffmpeg 是否可用（结果在进程内缓存）
+    _ensure_ffmpeg = staticmethod(ensure_ffmpeg)
 
     def _build_audio_args_keep_mode(self, keep_audio_from: str):
         """
@@ -150,10 +153,96 @@ class OverlayVideos:
         # 不需要额外的 filter_complex，只映射 2:a
         return "", ["-map", "2:a?"], True
 
+    def _overlay_chunked(
+        self,
+        bg_video,
+        fg_video,
+        external_audio_path,
+        keep_audio_from,
+        video_filter,
+        out_path,
+        encoder_profile="default",
+        parallel_jobs=0,
+    ):
+        """
+        分段并行编码：按背景视频的关键帧把时间轴切成多段，每段两路输入同时 seek 后叠加编码
+        （参数与单进程一致），音频整段单独处理，最后流拷贝拼接并校验帧数 / 时长。
+        段数不足、执行失败或校验不通过时返回 False（由调用方单进程编码）。
+        """
+        bg_info = probe_media(bg_video)
+        fg_info = probe_media(fg_video)
+        if bg_info is None or bg_info["video"] is None or not bg_info["duration"]:
+            return False
+        if fg_info is None or not fg_info["duration"]:
+            return False
+        # overlay 使用 shortest=1：输出在较短的一路结束
+        end = min(bg_info["duration"], fg_info["duration"])
+        max_chunks = int(end // MIN_CHUNK_SECONDS)
+        if max_chunks < 2:
+            return False
+        jobs, threads = plan_jobs(max_chunks, parallel_jobs)
+        if jobs < 2:
+            return False
+
+        def _video_cmd(seg_start, seg_duration, seg_threads, seg_path):
+            seek = ["-ss", f"{seg_start}"] if seg_start > 0 else []
+            cmd = ["ffmpeg", "-y"]
+            for src in (bg_video, fg_video):
+                cmd.extend(["-threads", str(seg_threads)] + seek)
+                cmd.extend(["-t", f"{seg_duration}", "-i", src])
+            cmd.extend([
+                "-filter_complex", video_filter,
+                "-filter_complex_threads", str(seg_threads),
+                "-map", "[outv]", "-an",
+            ])
+            cmd.extend(video_encoder_args(encoder_profile, "mp4", self._DEFAULT_PROFILE))
+            cmd.extend(delivery_pix_fmt_args([bg_info]))
+            cmd.extend(["-threads", str(seg_threads), seg_path])
+            return cmd
+
+        def _audio_cmd(audio_path):
+            # 与单进程时的音频来源一致
+            cmd = ["ffmpeg", "-y", "-i", bg_video, "-i", fg_video]
+            if external_audio_path:
+                cmd.extend(["-i", external_audio_path])
+                extra_filter, maps, need_audio = self._build_audio_args_external()
+            else:
+                if keep_audio_from == "background" and bg_info["audio"] is None:
+                    return None
+                if keep_audio_from == "foreground" and fg_info["audio"] is None:
+                    return None
+                extra_filter, maps, need_audio = self._build_audio_args_keep_mode(keep_audio_from)
+            if not need_audio:
+                return None
+            if extra_filter:
+                cmd.extend(["-filter_complex", extra_filter.lstrip(";")])
+            cmd.extend(maps)
+            cmd.append("-vn")
+            cmd.extend(audio_encoder_args(encoder_profile, "mp4", self._DEFAULT_PROFILE))
+            cmd.append(audio_path)
+            return cmd
+
+        try:
+            return encode_chunked(
+                bg_info,
+                0.0,
+                end,
+                _video_cmd,
+                out_path,
+                jobs,
+                threads,
+                build_audio_cmd=_audio_cmd,
+                work_parent=self._get_output_dir(),
+                error_prefix="ffmpeg 叠加失败",
+            )
+        except (RuntimeError, OSError):
+            return False
+
     def _make_video_object(self, path: str):
         """
         使用 comfy_api 的 VideoFromFile 生成 VIDEO 对象。
         """
+        VideoFromFile = video_from_file_class()
         if VideoFromFile is None:
             raise RuntimeError(
                 "未找到 comfy_api.input_impl.VideoFromFile，"
@@ -162,6 +251,27 @@ class OverlayVideos:
         # 直接用文件路径构造 VideoFromFile
         return VideoFromFile(path)
 
+    def _overlay_plan(self, graph, encoder_profile, use_cache, lazy, cache_name):
+        """
+        渲染计划模式：lazy 时直接返回计划；否则把整条链编译成一次 ffmpeg 并输出文件。
+        parallel_jobs 不生效。
+        """
+        plan = make_plan(graph, encoder_profile, self._DEFAULT_PROFILE, "mp4")
+        if lazy:
+            return (plan, None)
+
+        self._ensure_ffmpeg()
+        out_path = execute_plan(
+            plan,
+            self._get_output_dir(),
+            cache_name,
+            self._next_overlay_path,
+            use_cache=use_cache,
+            error_prefix="ffmpeg 叠加失败",
+        )
+        return (out_path, self._make_video_object(out_path))
+
+    @node_metrics("OverlayVideos")
     def overlay(
         self,
         bg_video,
@@ -171,8 +281,32 @@ class OverlayVideos:
         fg_width,
         fg_height,
         keep_audio_from,
-        external_audio=None
+        external_audio=None,
+        encoder_profile="default",
+        use_cache=True,
+        parallel_jobs=1,
+        lazy=False,
     ):
+        # 延迟执行：输出计划，或把上游计划和本次叠加合并成一次编码
+        if lazy or is_plan(bg_video) or is_plan(fg_video):
+            ext = str(external_audio).strip() if external_audio is not None else ""
+            if ext and not os.path.exists(ext):
+                raise FileNotFoundError(f"外接音频文件不存在: {ext}")
+            graph = overlay_node(
+                plan_input(bg_video, "背景视频"),
+                [{
+                    "input": plan_input(fg_video, "前景视频"),
+                    "x": x,
+                    "y": y,
+                    "width": fg_width,
+                    "height": fg_height,
+                }],
+                shortest=True,
+                audio=keep_audio_from,
+                external_audio=ext or None,
+            )
+            return self._overlay_plan(graph, encoder_profile, use_cache, lazy, "OverlayVideos")
+
         # bg_video / fg_video / external_audio 都是字符串路径（通过小圆点端口连进来）
         if not bg_video or not os.path.exists(bg_video):
             raise FileNotFoundError(f"背景视频文件不存在: {bg_video}")
@@ -185,6 +319,28 @@ class OverlayVideos:
             if not os.path.exists(external_audio_path):
                 raise FileNotFoundError(f"外接音频文件不存在: {external_audio_path}")
 
+        # 结果缓存：相同输入文件 + 参数直接返回上一次的输出
+        cache_key = None
+        if use_cache:
+            cache_key = make_cache_key(
+                "OverlayVideos",
+                {
+                    "bg_video": os.path.abspath(bg_video),
+                    "fg_video": os.path.abspath(fg_video),
+                    "x": x,
+                    "y": y,
+                    "fg_width": fg_width,
+                    "fg_height": fg_height,
+                    "keep_audio_from": None if external_audio_path else keep_audio_from,
+                    "external_audio": external_audio_path,
+                    "encoder_profile": encoder_profile,
+                },
+                [bg_video, fg_video, external_audio_path],
+            )
+            cached = lookup_result(self._get_output_dir(), cache_key)
+            if cached is not None:
+                return (cached, self._make_video_object(cached))
+
         self._ensure_ffmpeg()
 
         # 用数字排序的方式命名：overlay_01.mp4, overlay_02.mp4, ...
@@ -197,65 +353,340 @@ class OverlayVideos:
             f"[0:v][fg]overlay={x}:{y}:shortest=1[outv]"
         )
 
-        cmd = [
-            "ffmpeg",
-            "-y",
-            "-i", bg_video,
-            "-i", fg_video,
+        # 进度条按背景 / 前景中较短的一个换算（overlay 使用了 shortest=1）
+        durations = [
+            info["duration"]
+            for info in (probe_media(bg_video), probe_media(fg_video))
+            if info is not None and info["duration"]
         ]
 
-        # 如果有 external_audio，则 keep_audio_from 自动失效，音频直接来自 external_audio
-        if external_audio_path:
-            cmd.extend(["-i", external_audio_path])
-            extra_audio_filter, audio_maps, need_audio_codec = self._build_audio_args_external()
+        try:
+            # 长视频：分段并行编码，失败时退回单进程
+            done = False
+            if parallel_jobs != 1:
+                done = self._overlay_chunked(
+                    bg_video, fg_video, external_audio_path, keep_audio_from,
+                    video_filter, out_path, encoder_profile, parallel_jobs,
+                )
+
+            if not done:
+                cmd = [
+                    "ffmpeg",
+                    "-y",
+                    "-i", bg_video,
+                    "-i", fg_video,
+                ]
+
+                # 如果有 external_audio，则 keep_audio_from 自动失效，音频直接来自 external_audio
+                if external_audio_path:
+                    cmd.extend(["-i", external_audio_path])
+                    extra_audio_filter, audio_maps, need_audio_codec = self._build_audio_args_external()
+                else:
+                    extra_audio_filter, audio_maps, need_audio_codec = self._build_audio_args_keep_mode(
+                        keep_audio_from
+                    )
+
+                filter_complex = video_filter + extra_audio_filter
+
+                cmd.extend([
+                    "-filter_complex", filter_complex,
+                    "-map", "[outv]",
+                ])
+                cmd.extend(video_encoder_args(encoder_profile, "mp4", self._DEFAULT_PROFILE))
+                # 背景是无损中间文件时，输出统一 yuv420p
+                cmd.extend(delivery_pix_fmt_args([probe_media(bg_video)]))
+
+                # 音频映射
+                cmd.extend(audio_maps)
+
+                # 有音频的情况才指定编码器
+                if need_audio_codec:
+                    cmd.extend(audio_encoder_args(encoder_profile, "mp4", self._DEFAULT_PROFILE))
+
+                cmd.append(out_path)
+
+                run_ffmpeg(
+                    cmd,
+                    duration=min(durations) if durations else None,
+                    outputs=[out_path],
+                    error_prefix="ffmpeg 叠加失败",
+                )
+        except BaseException:
+            # 失败时删除编号占位文件，避免留下 0 字节的输出
+            discard_output_path(out_path)
+            raise
+
+        if cache_key is not None:
+            store_result(self._get_output_dir(), cache_key, out_path)
+
+        # 返回 video_path + video（VideoFromFile 对象）
+        video_obj = self._make_video_object(out_path)
+        return (out_path, video_obj)
+
+
+class OverlayVideosMulti(OverlayVideos):
+    """
+    多图层叠加：任意数量的前景图层在同一个 filtergraph 里依次叠加到背景上，
+    背景只解码一次、输出只编码一次，编码开销与图层数量无关。
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "bg_video": ("STRING", {
+                    "multiline": False,
+                    "default": "",
+                    "forceInput": True,
+                }),
+                # 每行一个图层的位置和尺寸：x,y,width,height（width / height 为 0 表示保持原尺寸，
+                # 只写 x,y 也可以），第 N 行对应第 N 个前景；缺少的行沿用 0,0,原尺寸
+                "layout": ("STRING", {
+                    "multiline": True,
+                    "default": "0,0,320,240",
+                }),
+                "keep_audio_from": ([
+                    "background",   # 只保留背景视频音频
+                    "mix",          # 混合背景和所有图层的音频
+                    "none",         # 静音
+                ], {
+                    "default": "background",
+                }),
+                # shortest：和单图层节点一样，在最短的一路结束；
+                # background：以背景为准，图层结束后不再显示
+                "end_with": (["shortest", "background"], {
+                    "default": "shortest",
+                }),
+            },
+            "optional": {
+                "fg_video1": ("STRING", {"forceInput": True}),
+                "fg_video2": ("STRING", {"forceInput": True}),
+                "fg_video3": ("STRING", {"forceInput": True}),
+                # 不限数量的前景列表：每行一个路径（也接受上游传来的 list），排在 fg_video1..3 之后
+                "fg_videos": ("STRING", {"multiline": True, "default": ""}),
+                "external_audio": ("STRING", {
+                    "multiline": False,
+                    "default": "",
+                    "forceInput": True,
+                }),
+                "encoder_profile": (PROFILE_NAMES, {
+                    "default": "default",
+                }),
+                "use_cache": ("BOOLEAN", {
+                    "default": True,
+                }),
+                # 延迟执行：不编码，输出渲染计划交给下游合并成一次 ffmpeg；此时 video 输出为空
+                "lazy": ("BOOLEAN", {
+                    "default": False,
+                }),
+            },
+        }
+
+    @classmethod
+    def IS_CHANGED(cls, **kwargs):
+        """
+        fg_videos 文本框里的文件被覆盖 / 修改时重新执行（路径字符串不变也能感知）。
+        连线输入不会传给 IS_CHANGED，由上游节点和结果缓存的文件指纹负责。
+        """
+        return fingerprint_inputs(split_path_list(kwargs.get("fg_videos")))
+
+    FUNCTION = "overlay_multi"
+
+    @staticmethod
+    def _parse_layout(layout, count):
+        """
+        解析 layout：返回 count 个 (x, y, width, height)，width / height 为 0 表示保持原尺寸。
+        """
+        rows = []
+        for line in str(layout or "").splitlines():
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = [p.strip() for p in line.replace(";", ",").split(",")]
+            try:
+                values = [int(float(p)) for p in parts if p != ""]
+            except ValueError:
+                raise ValueError(f"layout 格式错误（应为 x,y,width,height）: {line}")
+            values = (values + [0, 0, 0, 0])[:4]
+            rows.append(tuple(values))
+        rows += [(0, 0, 0, 0)] * (count - len(rows))
+        return rows[:count]
+
+    @staticmethod
+    def _build_layers_filter(layers, end_with):
+        """
+        生成视频部分的 filter_complex：[0:v] 依次叠加 [1:v] .. [N:v]，最终输出 [outv]。
+        """
+        if end_with == "shortest":
+            end_opt = ":shortest=1"
         else:
-            extra_audio_filter, audio_maps, need_audio_codec = self._build_audio_args_keep_mode(
-                keep_audio_from
+            end_opt = ":eof_action=pass"
+
+        parts = []
+        prev = "0:v"
+        for i, (x, y, w, h) in enumerate(layers, start=1):
+            src = f"{i}:v"
+            if w > 0 or h > 0:
+                parts.append(f"[{src}]scale={w if w > 0 else -2}:{h if h > 0 else -2}[fg{i}]")
+                src = f"fg{i}"
+            out = "outv" if i == len(layers) else f"v{i}"
+            parts.append(f"[{prev}][{src}]overlay={x}:{y}{end_opt}[{out}]")
+            prev = out
+        return ";".join(parts)
+
+    @node_metrics("OverlayVideosMulti")
+    def overlay_multi(
+        self,
+        bg_video,
+        layout,
+        keep_audio_from,
+        end_with,
+        fg_video1=None,
+        fg_video2=None,
+        fg_video3=None,
+        fg_videos="",
+        external_audio=None,
+        encoder_profile="default",
+        use_cache=True,
+        lazy=False,
+    ):
+        # 收集前景图层：fg_video1..3 + fg_videos 列表
+        fg_list = []
+        for v in (fg_video1, fg_video2, fg_video3):
+            if v is not None and str(v).strip():
+                fg_list.append(str(v).strip())
+        fg_list.extend(split_path_list(fg_videos))
+        if not fg_list:
+            raise ValueError("至少需要一个前景图层（fg_video1..3 或 fg_videos）。")
+
+        # 延迟执行：输出计划，或把上游计划和本次叠加合并成一次编码
+        if lazy or is_plan(bg_video) or any(is_plan(v) for v in fg_list):
+            ext = str(external_audio).strip() if external_audio is not None else ""
+            if ext and not os.path.exists(ext):
+                raise FileNotFoundError(f"外接音频文件不存在: {ext}")
+            layers = self._parse_layout(layout, len(fg_list))
+            graph = overlay_node(
+                plan_input(bg_video, "背景视频"),
+                [
+                    {"input": plan_input(fg, "前景视频"), "x": x, "y": y, "width": w, "height": h}
+                    for fg, (x, y, w, h) in zip(fg_list, layers)
+                ],
+                shortest=end_with == "shortest",
+                audio=keep_audio_from,
+                external_audio=ext or None,
             )
+            return self._overlay_plan(graph, encoder_profile, use_cache, lazy, "OverlayVideosMulti")
 
-        filter_complex = video_filter + extra_audio_filter
+        if not bg_video or not os.path.exists(bg_video):
+            raise FileNotFoundError(f"背景视频文件不存在: {bg_video}")
+        for fg in fg_list:
+            if not os.path.exists(fg):
+                raise FileNotFoundError(f"前景视频文件不存在: {fg}")
 
-        cmd.extend([
-            "-filter_complex", filter_complex,
-            "-map", "[outv]",
-            "-c:v", "libx264",
-            "-preset", "fast",
-            "-crf", "18",
-        ])
+        external_audio_path = None
+        if external_audio is not None and str(external_audio).strip():
+            external_audio_path = str(external_audio).strip()
+            if not os.path.exists(external_audio_path):
+                raise FileNotFoundError(f"外接音频文件不存在: {external_audio_path}")
 
-        # 音频映射
-        cmd.extend(audio_maps)
+        layers = self._parse_layout(layout, len(fg_list))
 
-        # 有音频的情况才指定编码器
-        if need_audio_codec:
-            cmd.extend(["-c:a", "aac", "-b:a", "192k"])
+        cache_key = None
+        if use_cache:
+            cache_key = make_cache_key(
+                "OverlayVideosMulti",
+                {
+                    "bg_video": os.path.abspath(bg_video),
+                    "fg_videos": [os.path.abspath(v) for v in fg_list],
+                    "layers": layers,
+                    "end_with": end_with,
+                    "keep_audio_from": None if external_audio_path else keep_audio_from,
+                    "external_audio": external_audio_path,
+                    "encoder_profile": encoder_profile,
+                },
+                [bg_video] + fg_list + [external_audio_path],
+            )
+            cached = lookup_result(self._get_output_dir(), cache_key)
+            if cached is not None:
+                return (cached, self._make_video_object(cached))
 
-        cmd.append(out_path)
+        self._ensure_ffmpeg()
+        out_path = self._next_overlay_path()
 
         try:
-            subprocess.run(
+            infos = [probe_media(v) for v in [bg_video] + fg_list]
+
+            cmd = ["ffmpeg", "-y", "-i", bg_video]
+            for fg in fg_list:
+                cmd.extend(["-i", fg])
+
+            filter_complex = self._build_layers_filter(layers, end_with)
+            audio_maps = []
+            need_audio_codec = False
+            if external_audio_path:
+                cmd.extend(["-i", external_audio_path])
+                audio_maps = ["-map", f"{len(fg_list) + 1}:a?"]
+                need_audio_codec = True
+            elif keep_audio_from == "background":
+                audio_maps = ["-map", "0:a?"]
+                need_audio_codec = True
+            elif keep_audio_from == "mix":
+                # 只混合真正有音轨的输入
+                with_audio = [
+                    i for i, info in enumerate(infos)
+                    if info is not None and info["audio"] is not None
+                ]
+                if len(with_audio) == 1:
+                    audio_maps = ["-map", f"{with_audio[0]}:a"]
+                    need_audio_codec = True
+                elif with_audio:
+                    labels = "".join(f"[{i}:a]" for i in with_audio)
+                    filter_complex += f";{labels}amix=inputs={len(with_audio)}:normalize=0[aout]"
+                    audio_maps = ["-map", "[aout]"]
+                    need_audio_codec = True
+
+            cmd.extend([
+                "-filter_complex", filter_complex,
+                "-map", "[outv]",
+            ])
+            cmd.extend(video_encoder_args(encoder_profile, "mp4", self._DEFAULT_PROFILE))
+            cmd.extend(delivery_pix_fmt_args([infos[0]]))
+            cmd.extend(audio_maps)
+            if need_audio_codec:
+                cmd.extend(audio_encoder_args(encoder_profile, "mp4", self._DEFAULT_PROFILE))
+            cmd.append(out_path)
+
+            # 进度条：shortest 时按最短的一路，否则按背景时长
+            if end_with == "shortest":
+                durations = [info["duration"] for info in infos if info is not None and info["duration"]]
+                expected = min(durations) if durations else None
+            else:
+                expected = infos[0]["duration"] if infos[0] is not None else None
+
+            run_ffmpeg(
                 cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                check=True,
+                duration=expected,
+                outputs=[out_path],
+                error_prefix="ffmpeg 叠加失败",
             )
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(
-                "ffmpeg 叠加失败：\n"
-                f"命令: {' '.join(cmd)}\n\n"
-                f"stderr:\n{e.stderr.decode('utf-8', errors='ignore')}"
-            ) from e
+        except BaseException:
+            # 失败时删除编号占位文件，避免留下 0 字节的输出
+            discard_output_path(out_path)
+            raise
 
-        # 返回 video_path + video（VideoFromFile 对象）
-        video_obj = self._make_video_object(out_path)
-        return (out_path, video_obj)
+        if cache_key is not None:
+            store_result(self._get_output_dir(), cache_key, out_path)
+
+        return (out_path, self._make_video_object(out_path))
 
 
 # 注册节点
 NODE_CLASS_MAPPINGS = {
     "OverlayVideos": OverlayVideos,
+    "OverlayVideosMulti": OverlayVideosMulti,
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
     "OverlayVideos": "Overlay Videos (FFmpeg)",
+    "OverlayVideosMulti": "Overlay Videos Multi-Layer (FFmpeg)",
 }
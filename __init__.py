@@ -1,20 +1,50 @@
-from .concat_videos_path import NODE_CLASS_MAPPINGS as CONCATPATH_M
-from .videotopath import NODE_CLASS_MAPPINGS as PATH_M
-from .show_video import NODE_CLASS_MAPPINGS as SHOW_M
-from .OverlayVideos import NODE_CLASS_MAPPINGS as OVER_M
-from .audiotopath import NODE_CLASS_MAPPINGS as AUDIO_M
-from .FFmpegCutVideo import NODE_CLASS_MAPPINGS as CUT_M
-
-
-NODE_CLASS_MAPPINGS = {
-    **CONCATPATH_M,
-    **PATH_M,
-    **SHOW_M,
-    **OVER_M,
-    **AUDIO_M,
-    **CUT_M,
-}
-
-NODE_DISPLAY_NAME_MAPPINGS = {
-    k: k for k in NODE_CLASS_MAPPINGS.keys()
-}
\ No newline at end of file
+from .concat_videos_path import NODE_CLASS_MAPPINGS as CONCATPATH_M
+from .videotopath import NODE_CLASS_MAPPINGS as PATH_M
+from .show_video import NODE_CLASS_MAPPINGS as SHOW_M
+from .OverlayVideos import NODE_CLASS_MAPPINGS as OVER_M
+from .audiotopath import NODE_CLASS_MAPPINGS as AUDIO_M
+from .FFmpegCutVideo import NODE_CLASS_MAPPINGS as CUT_M
+from .FFmpegLoadFrames import NODE_CLASS_MAPPINGS as LOAD_M
+from .FFmpegRenderPlan import NODE_CLASS_MAPPINGS as RENDER_M
+from .FFmpegMetrics import NODE_CLASS_MAPPINGS as METRICS_M
+from .FFmpegSplitVideo import NODE_CLASS_MAPPINGS as SPLIT_M
+
+
+NODE_CLASS_MAPPINGS = {
+    **CONCATPATH_M,
+    **PATH_M,
+    **SHOW_M,
+    **OVER_M,
+    **AUDIO_M,
+    **CUT_M,
+    **LOAD_M,
+    **RENDER_M,
+    **METRICS_M,
+    **SPLIT_M,
+}
+
+from .concat_videos_path import NODE_DISPLAY_NAME_MAPPINGS as CONCATPATH_N
+from .videotopath import NODE_DISPLAY_NAME_MAPPINGS as PATH_N
+from .show_video import NODE_DISPLAY_NAME_MAPPINGS as SHOW_N
+from .OverlayVideos import NODE_DISPLAY_NAME_MAPPINGS as OVER_N
+from .audiotopath import NODE_DISPLAY_NAME_MAPPINGS as AUDIO_N
+from .FFmpegCutVideo import NODE_DISPLAY_NAME_MAPPINGS as CUT_N
+from .FFmpegLoadFrames import NODE_DISPLAY_NAME_MAPPINGS as LOAD_N
+from .FFmpegRenderPlan import NODE_DISPLAY_NAME_MAPPINGS as RENDER_N
+from .FFmpegMetrics import NODE_DISPLAY_NAME_MAPPINGS as METRICS_N
+from .FFmpegSplitVideo import NODE_DISPLAY_NAME_MAPPINGS as SPLIT_N
+
+# 各模块自己的显示名；没有写显示名的节点用类名
+NODE_DISPLAY_NAME_MAPPINGS = {
+    **{k: k for k in NODE_CLASS_MAPPINGS.keys()},
+    **CONCATPATH_N,
+    **PATH_N,
+    **SHOW_N,
+    **OVER_N,
+    **AUDIO_N,
+    **CUT_N,
+    **LOAD_N,
+    **RENDER_N,
+    **METRICS_N,
+    **SPLIT_N,
+}
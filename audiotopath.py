@@ -1,9 +1,33 @@
 from comfy_api.latest import io
+import hashlib
 import os
-import torchaudio
-import torch
+import shutil
+import subprocess
+import threading
+from collections import deque
+
 import folder_paths
 
+from .ffmpeg_metrics import node_metrics
+from .ffmpeg_runner import ffmpeg_slot, processing_interrupted, raise_interrupted, terminate_process
+from .ffmpeg_scheduler import popen_kwargs
+
+# torchaudio 只在第一次执行时导入，节点注册阶段保持轻量
+
+# format -> (extension, ffmpeg muxer, codec args)
+AUDIO_FORMATS = {
+    "wav": (".wav", "wav", ["-c:a", "pcm_f32le"]),
+    "flac": (".flac", "flac", ["-c:a", "flac"]),
+    "aac": (".m4a", "ipod", ["-c:a", "aac", "-b:a", "192k"]),
+    "opus": (".opus", "ogg", ["-c:a", "libopus", "-b:a", "128k"]),
+}
+
+# sample rates libopus accepts natively; anything else is resampled to 48 kHz
+_OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+
+# samples per channel fed to ffmpeg per write (~4 MB per channel as float32)
+_CHUNK_SAMPLES = 1 << 20
+
 
 class AudioToPath(io.ComfyNode):
     @classmethod
@@ -14,18 +38,148 @@ class AudioToPath(io.ComfyNode):
             category="audio",
             inputs=[
                 io.Audio.Input("audio"),
+                io.Combo.Input(
+                    "format",
+                    options=list(AUDIO_FORMATS.keys()),
+                    default="wav",
+                    optional=True,
+                    tooltip=(
+                        "wav: float32 PCM (same as before). "
+                        "flac / aac / opus: encoded directly by ffmpeg, no intermediate WAV."
+                    ),
+                ),
             ],
             outputs=[
                 io.String.Output("audio_path"),
             ],
         )
 
+    @staticmethod
+    def _interleaved_blocks(waveform):
+        """
+        [C, T] waveform -> interleaved float32 [n, C] blocks of _CHUNK_SAMPLES samples,
+        converted slice by slice so the whole signal is never copied at once.
+        """
+        for i in range(0, waveform.shape[1], _CHUNK_SAMPLES):
+            yield waveform[..., i:i + _CHUNK_SAMPLES].float().T.contiguous().numpy()
+
+    @staticmethod
+    def _waveform_digest(blocks, channels, frames, sample_rate, format):
+        """
+        Content hash of the interleaved float32 blocks + output format. Used as the
+        file name, so an unchanged audio input maps to the file written by a previous run.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f"{format}|{sample_rate}|{channels}|{frames}|f32le".encode())
+        for block in blocks:
+            h.update(memoryview(block).cast("B"))
+        return h.hexdigest()
+
+    @staticmethod
+    def _build_encode_cmd(channels, sample_rate, format, out_path):
+        """ffmpeg command reading interleaved float32 PCM from stdin."""
+        _, muxer, codec_args = AUDIO_FORMATS[format]
+        cmd = [
+            "ffmpeg", "-y",
+            "-f", "f32le",
+            "-ar", str(sample_rate),
+            "-ac", str(channels),
+            "-i", "pipe:0",
+        ] + codec_args
+        if format == "opus" and sample_rate not in _OPUS_RATES:
+            cmd += ["-ar", "48000"]
+        cmd += ["-f", muxer, out_path]
+        return cmd
+
+    @staticmethod
+    def _encode_ffmpeg(blocks, channels, sample_rate, format, out_path):
+        """
+        Stream interleaved float32 PCM blocks to ffmpeg's stdin and let it
+        write the target format directly.
+        """
+        cmd = AudioToPath._build_encode_cmd(channels, sample_rate, format, out_path)
+
+        with ffmpeg_slot(cmd) as call:
+            proc = subprocess.Popen(
+                call.cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                **popen_kwargs(),
+            )
+
+            # keep only the tail of stderr
+            stderr_tail = deque(maxlen=50)
+
+            def _drain_stderr():
+                for line in proc.stderr:
+                    stderr_tail.append(line.decode("utf-8", errors="ignore"))
+
+            stderr_thread = threading.Thread(target=_drain_stderr, daemon=True)
+            stderr_thread.start()
+
+            error = None
+            interrupted = False
+            try:
+                for block in blocks:
+                    if processing_interrupted():
+                        interrupted = True
+                        break
+                    proc.stdin.write(memoryview(block).cast("B"))
+            except (BrokenPipeError, OSError) as e:
+                error = e
+            finally:
+                if interrupted:
+                    terminate_process(proc)
+                try:
+                    proc.stdin.close()
+                except OSError:
+                    pass
+                returncode = call.wait(proc)
+                stderr_thread.join()
+
+        if interrupted:
+            raise_interrupted()
+        if returncode != 0 or error is not None:
+            raise RuntimeError(
+                f"AudioToPath: ffmpeg failed to encode audio (exit code {returncode}).\n"
+                + "".join(stderr_tail)
+            )
+
+    @staticmethod
+    def _write_once(out_path, write):
+        """
+        Reuse a non-empty out_path; otherwise call write(part_path) on a private
+        file and rename it into place, so readers never see a half-written file.
+        """
+        try:
+            if os.path.getsize(out_path) > 0:
+                return out_path
+        except OSError:
+            pass
+
+        part_path = f"{out_path}.{os.getpid()}.{threading.get_ident()}.part"
+        try:
+            write(part_path)
+            os.replace(part_path, out_path)
+        except BaseException:
+            try:
+                os.remove(part_path)
+            except OSError:
+                pass
+            raise
+        return out_path
+
     @classmethod
-    def execute(cls, audio) -> io.NodeOutput:
+    @node_metrics("AudioToPath", "format")
+    def execute(cls, audio, format="wav") -> io.NodeOutput:
+        if format not in AUDIO_FORMATS:
+            format = "wav"
+
         # audio dict:
         # { "waveform": Tensor, "sample_rate": int }
         waveform = audio["waveform"]
-        sample_rate = audio["sample_rate"]
+        sample_rate = int(audio["sample_rate"])
 
         # ensure CPU tensor
         waveform = waveform.detach().cpu()
@@ -35,24 +189,33 @@ class AudioToPath(io.ComfyNode):
             waveform = waveform[0]
         elif waveform.dim() == 1:
             waveform = waveform.unsqueeze(0)
+        channels, frames = int(waveform.shape[0]), int(waveform.shape[1])
 
         # ---- Use ComfyUI default temp directory ----
         tmp_dir = folder_paths.get_temp_directory()
-
         os.makedirs(tmp_dir, exist_ok=True)
-        tmp_path = os.path.join(tmp_dir, "audio_temp.wav")
 
-        # If repeated calls are possible, prevent override collision
-        idx = 1
-        base = tmp_path
-        while os.path.exists(tmp_path):
-            tmp_path = base.replace(".wav", f"_{idx}.wav")
-            idx += 1
+        # name = content hash: O(1), no collisions, unchanged input is not rewritten
+        ext = AUDIO_FORMATS[format][0]
+        digest = cls._waveform_digest(
+            cls._interleaved_blocks(waveform), channels, frames, sample_rate, format
+        )
+        out_path = os.path.join(tmp_dir, f"audio_{digest}{ext}")
 
-        # save wav
-        torchaudio.save(tmp_path, waveform, sample_rate)
+        def _write(part_path):
+            if shutil.which("ffmpeg"):
+                cls._encode_ffmpeg(
+                    cls._interleaved_blocks(waveform), channels, sample_rate, format, part_path
+                )
+            elif format == "wav":
+                import torchaudio
+                torchaudio.save(part_path, waveform, sample_rate, format="wav")
+            else:
+                raise RuntimeError(
+                    f"AudioToPath: format '{format}' needs ffmpeg, which was not found in PATH."
+                )
 
-        return io.NodeOutput(tmp_path)
+        return io.NodeOutput(cls._write_once(out_path, _write))
 
 
 NODE_CLASS_MAPPINGS = {
@@ -0,0 +1,54 @@
+"""
+离线加载本仓库节点的工具：不启动 ComfyUI，用 stubs/ 下的替身模块
+（folder_paths / comfy_api）代替 ComfyUI 运行时。
+"""
+import importlib
+import importlib.util
+import os
+import sys
+import types
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+STUBS_DIR = os.path.join(BENCH_DIR, "stubs")
+
+# 以包的形式加载（节点模块之间使用相对导入）
+PACKAGE_NAME = "comfyui_ffmpeg_concat"
+
+
+def install_stubs():
+    """把替身模块放到 sys.path 最前面。"""
+    if STUBS_DIR not in sys.path:
+        sys.path.insert(0, STUBS_DIR)
+
+
+def load_package(execute_init=False):
+    """
+    注册本仓库为 PACKAGE_NAME 包。
+    - execute_init=False：只建空包，按需导入单个节点模块（基准测试用）；
+    - execute_init=True：像 ComfyUI 一样执行 __init__.py 完成节点注册（启动耗时测试用）。
+    """
+    if PACKAGE_NAME in sys.modules:
+        return sys.modules[PACKAGE_NAME]
+
+    if execute_init:
+        spec = importlib.util.spec_from_file_location(
+            PACKAGE_NAME,
+            os.path.join(REPO_ROOT, "__init__.py"),
+            submodule_search_locations=[REPO_ROOT],
+        )
+        pkg = importlib.util.module_from_spec(spec)
+        sys.modules[PACKAGE_NAME] = pkg
+        spec.loader.exec_module(pkg)
+        return pkg
+
+    pkg = types.ModuleType(PACKAGE_NAME)
+    pkg.__path__ = [REPO_ROOT]
+    sys.modules[PACKAGE_NAME] = pkg
+    return pkg
+
+
+def load_node_module(name):
+    """导入单个模块，例如 load_node_module("concat_videos_path")。"""
+    load_package()
+    return importlib.import_module(f"{PACKAGE_NAME}.{name}")
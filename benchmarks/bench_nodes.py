@@ -0,0 +1,434 @@
+"""
+节点热路径的离线基准测试（不需要启动 ComfyUI）。
+
+用 ffmpeg lavfi（testsrc2 + sine）生成不同分辨率 / 时长 / 编码的素材，
+逐个运行 ConcatVideos（fast / reencode）、CutVideo、OverlayVideos、
+VideoToPath（frames）、AudioToPath（wav / aac）和 LoadVideoFrames，输出 JSON：
+  wall_s / encode_fps / speed_x / child_cpu_s / self_cpu_s / peak_rss_mb / child_peak_rss_mb
+
+每个用例在独立的子进程里运行，rusage 统计互不干扰。
+
+用法：
+  python benchmarks/bench_nodes.py --output before.json
+  python benchmarks/bench_nodes.py --resolutions 640x360,1920x1080 --durations 5,30 \\
+      --codecs libx264,mpeg4 --cases concat_fast,cut_reencode
+  python benchmarks/bench_nodes.py --compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+if BENCH_DIR not in sys.path:
+    sys.path.insert(0, BENCH_DIR)
+
+import _loader  # noqa: E402
+
+CASES = [
+    "concat_fast",
+    "concat_reencode",
+    "cut_reencode",
+    "overlay",
+    "videotopath_frames",
+    "audiotopath",
+    "audiotopath_aac",
+    "loadframes",
+]
+
+FPS = 30
+AUDIO_RATE = 48000
+
+
+# ----------------- 素材生成 -----------------
+
+def _fixture_path(work_dir, codec, w, h, duration, name):
+    return os.path.join(work_dir, "fixtures", f"{codec}_{w}x{h}_{duration}s_{name}.mp4")
+
+
+def _make_clip(path, codec, w, h, duration, source="testsrc2"):
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    cmd = [
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"{source}=size={w}x{h}:rate={FPS}:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate={AUDIO_RATE}:duration={duration}",
+        "-map", "0:v", "-map", "1:a",
+        "-c:v", codec,
+    ]
+    if codec in ("libx264", "libx265"):
+        cmd += ["-preset", "veryfast", "-pix_fmt", "yuv420p"]
+    else:
+        cmd += ["-q:v", "3"]
+    cmd += ["-c:a", "aac", "-b:a", "128k", "-shortest", path]
+    subprocess.run(cmd, check=True)
+    return path
+
+
+def make_fixture(work_dir, codec, w, h, duration):
+    """生成一组素材：两个主视频 a / b + 一个 1/4 大小的前景 fg。"""
+    fg_w = max(2, w // 4 // 2 * 2)
+    fg_h = max(2, h // 4 // 2 * 2)
+    return {
+        "codec": codec,
+        "width": w,
+        "height": h,
+        "duration": duration,
+        "a": _make_clip(_fixture_path(work_dir, codec, w, h, duration, "a"), codec, w, h, duration),
+        "b": _make_clip(
+            _fixture_path(work_dir, codec, w, h, duration, "b"), codec, w, h, duration, "testsrc"
+        ),
+        "fg": _make_clip(
+            _fixture_path(work_dir, codec, fg_w, fg_h, duration, "fg"),
+            codec, fg_w, fg_h, duration, "smptebars",
+        ),
+    }
+
+
+# ----------------- 用例（在子进程里执行） -----------------
+
+def _patch_output_dir(module_names, out_dir):
+    """节点默认写到 ComfyUI/output，基准测试时改到临时目录。"""
+    concat = _loader.load_node_module("concat_videos_path").ConcatVideos
+    concat._get_output_dir = lambda self: out_dir
+    for mod_name, cls_name in module_names:
+        cls = getattr(_loader.load_node_module(mod_name), cls_name)
+        cls._get_output_dir = staticmethod(lambda: out_dir)
+
+
+def _case_concat(fixture, mode):
+    concat = _loader.load_node_module("concat_videos_path").ConcatVideos()
+    path, _ = concat.concat(
+        mode=mode,
+        target_width=0,
+        target_height=0,
+        target_fps=0,
+        filename_prefix="bench",
+        format="mp4",
+        video_path1=fixture["a"],
+        video_path2=fixture["b"],
+        video_path3=fixture["a"],
+        video_path4=fixture["b"],
+        use_cache=False,
+    )
+    return path
+
+
+def _case_cut(fixture):
+    cut = _loader.load_node_module("FFmpegCutVideo").CutVideo()
+    d = fixture["duration"]
+    path, _ = cut.cut_video(
+        video=fixture["a"],
+        mode="time",
+        start_time=d * 0.25,
+        duration=d * 0.5,
+        start_frame=0,
+        frame_count=0,
+        fps_auto=True,
+        fps=float(FPS),
+        keep_audio="yes",
+        use_cache=False,
+    )
+    return path
+
+
+def _case_overlay(fixture):
+    overlay = _loader.load_node_module("OverlayVideos").OverlayVideos()
+    path, _ = overlay.overlay(
+        bg_video=fixture["a"],
+        fg_video=fixture["fg"],
+        x=16,
+        y=16,
+        fg_width=fixture["width"] // 4,
+        fg_height=fixture["height"] // 4,
+        keep_audio_from="background",
+        use_cache=False,
+    )
+    return path
+
+
+def _case_loadframes(fixture):
+    node = _loader.load_node_module("FFmpegLoadFrames").LoadVideoFrames()
+    frames, n, _ = node.load_frames(
+        video=fixture["a"],
+        mode="time",
+        start_time=0.0,
+        duration=0.0,
+        start_frame=0,
+        frame_count=0,
+        fps_auto=True,
+        fps=float(FPS),
+    )
+    return n
+
+
+def _prepare_frames(fixture):
+    import torch
+    n = int(fixture["duration"] * FPS)
+    return torch.rand(n, fixture["height"], fixture["width"], 3)
+
+
+def _case_videotopath(fixture, frames):
+    node = _loader.load_node_module("videotopath").VideoToPath()
+    (path,) = node.convert(frames=frames, fps=FPS)
+    return path
+
+
+def _prepare_audio(fixture):
+    import math
+    import torch
+    n = int(fixture["duration"] * AUDIO_RATE)
+    t = torch.arange(n, dtype=torch.float32) / AUDIO_RATE
+    # 加一点随机噪声：AudioToPath 按内容哈希去重，每次运行都要真正编码
+    wave = 0.2 * torch.sin(2 * math.pi * 440.0 * t) + 1e-4 * torch.rand(n)
+    return {"waveform": wave.repeat(1, 2, 1), "sample_rate": AUDIO_RATE}
+
+
+def _case_audiotopath(fixture, audio, format="wav"):
+    node = _loader.load_node_module("audiotopath").AudioToPath
+    out = node.execute(audio=audio, format=format)
+    return out.args[0]
+
+
+def _rusage():
+    if resource is None:
+        return None, None
+    return resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+
+
+def _cpu(r):
+    return r.ru_utime + r.ru_stime
+
+
+def _rss_mb(kb):
+    # Linux 单位是 KB，macOS 是字节
+    if sys.platform == "darwin":
+        return kb / (1024 * 1024)
+    return kb / 1024
+
+
+def run_case(case, fixture, work_dir):
+    """在当前（子）进程里运行一个用例，返回指标字典。"""
+    out_dir = os.path.join(work_dir, "output", case)
+    os.makedirs(out_dir, exist_ok=True)
+    os.environ.setdefault("FFMPEG_CONCAT_BENCH_DIR", work_dir)
+    _loader.install_stubs()
+    _patch_output_dir(
+        [("FFmpegCutVideo", "CutVideo"), ("OverlayVideos", "OverlayVideos")],
+        out_dir,
+    )
+
+    # 输入准备（生成随机帧 / 波形）不计入耗时
+    prepared = None
+    if case == "videotopath_frames":
+        prepared = _prepare_frames(fixture)
+    elif case in ("audiotopath", "audiotopath_aac"):
+        prepared = _prepare_audio(fixture)
+
+    self0, child0 = _rusage()
+    t0 = time.perf_counter()
+
+    if case == "concat_fast":
+        out = _case_concat(fixture, "fast")
+    elif case == "concat_reencode":
+        out = _case_concat(fixture, "reencode")
+    elif case == "cut_reencode":
+        out = _case_cut(fixture)
+    elif case == "overlay":
+        out = _case_overlay(fixture)
+    elif case == "videotopath_frames":
+        out = _case_videotopath(fixture, prepared)
+    elif case == "audiotopath":
+        out = _case_audiotopath(fixture, prepared)
+    elif case == "audiotopath_aac":
+        out = _case_audiotopath(fixture, prepared, "aac")
+    elif case == "loadframes":
+        out = _case_loadframes(fixture)
+    else:
+        raise ValueError(f"unknown case: {case}")
+
+    wall = time.perf_counter() - t0
+    self1, child1 = _rusage()
+
+    # loadframes 的输出是帧数而不是文件
+    if isinstance(out, int):
+        result = {"wall_s": round(wall, 4), "frames": out}
+        if wall > 0:
+            result["decode_fps"] = round(out / wall, 2)
+    else:
+        result = {
+            "wall_s": round(wall, 4),
+            "output_bytes": os.path.getsize(out) if os.path.exists(out) else None,
+        }
+    if self1 is not None:
+        result.update({
+            "self_cpu_s": round(_cpu(self1) - _cpu(self0), 4),
+            "child_cpu_s": round(_cpu(child1) - _cpu(child0), 4),
+            "peak_rss_mb": round(_rss_mb(self1.ru_maxrss), 1),
+            "child_peak_rss_mb": round(_rss_mb(child1.ru_maxrss), 1),
+        })
+
+    # 输出帧数 / 时长（计时结束后再探测）
+    info = None if isinstance(out, int) else _loader.load_node_module("ffmpeg_probe").probe_media(out)
+    if info is not None and info["duration"]:
+        result["output_duration_s"] = round(info["duration"], 4)
+        result["speed_x"] = round(info["duration"] / wall, 3) if wall > 0 else None
+        video = info["video"]
+        if video is not None:
+            frames = video["nb_frames"] or int(round(info["duration"] * (video["fps"] or FPS)))
+            result["frames"] = frames
+            result["encode_fps"] = round(frames / wall, 2) if wall > 0 else None
+    return result
+
+
+# ----------------- 调度（父进程） -----------------
+
+def _ffmpeg_version():
+    try:
+        out = subprocess.check_output(["ffmpeg", "-version"], stderr=subprocess.DEVNULL)
+        return out.decode("utf-8", errors="ignore").splitlines()[0]
+    except Exception:
+        return None
+
+
+def _git_commit():
+    try:
+        out = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=_loader.REPO_ROOT, stderr=subprocess.DEVNULL
+        )
+        return out.decode().strip()
+    except Exception:
+        return None
+
+
+def _spawn_case(case, fixture, work_dir):
+    cmd = [
+        sys.executable, os.path.abspath(__file__),
+        "--run-case", case,
+        "--fixture-json", json.dumps(fixture),
+        "--work-dir", work_dir,
+    ]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        tail = proc.stderr.decode("utf-8", errors="ignore").strip().splitlines()[-5:]
+        return {"error": "\n".join(tail)}
+    lines = proc.stdout.decode("utf-8", errors="ignore").strip().splitlines()
+    return json.loads(lines[-1])
+
+
+def run_benchmarks(args):
+    work_dir = os.path.abspath(args.work_dir or tempfile.mkdtemp(prefix="ffmpeg_concat_bench_"))
+    cases = [c for c in args.cases.split(",") if c]
+    results = []
+
+    for codec in [c for c in args.codecs.split(",") if c]:
+        for res in [r for r in args.resolutions.split(",") if r]:
+            w, h = (int(x) for x in res.lower().split("x"))
+            for duration in [float(d) for d in args.durations.split(",") if d]:
+                duration = int(duration) if duration.is_integer() else duration
+                fixture = make_fixture(work_dir, codec, w, h, duration)
+                for case in cases:
+                    for i in range(args.repeat):
+                        metrics = _spawn_case(case, fixture, work_dir)
+                        entry = {
+                            "case": case,
+                            "codec": codec,
+                            "resolution": f"{w}x{h}",
+                            "duration_s": duration,
+                            "run": i,
+                        }
+                        entry.update(metrics)
+                        results.append(entry)
+                        print(json.dumps(entry), file=sys.stderr)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "ffmpeg": _ffmpeg_version(),
+        },
+        "results": results,
+    }
+
+    if not args.keep_work_dir and not args.work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return report
+
+
+def compare(old_path, new_path):
+    """对比两份结果：按 (case, codec, resolution, duration) 取平均 wall_s。"""
+    def _load(path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        groups = {}
+        for r in data.get("results", []):
+            if "wall_s" not in r:
+                continue
+            key = (r["case"], r["codec"], r["resolution"], r["duration_s"])
+            groups.setdefault(key, []).append(r["wall_s"])
+        return {k: sum(v) / len(v) for k, v in groups.items()}
+
+    old = _load(old_path)
+    new = _load(new_path)
+    print(f"{'case':<22}{'codec':<10}{'res':<11}{'dur':>6}{'old_s':>10}{'new_s':>10}{'ratio':>8}")
+    for key in sorted(set(old) & set(new)):
+        o, n = old[key], new[key]
+        ratio = n / o if o > 0 else float("nan")
+        print(f"{key[0]:<22}{key[1]:<10}{key[2]:<11}{key[3]:>6}{o:>10.3f}{n:>10.3f}{ratio:>8.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", default=",".join(CASES))
+    parser.add_argument("--resolutions", default="1280x720")
+    parser.add_argument("--durations", default="5")
+    parser.add_argument("--codecs", default="libx264")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--work-dir", default=None)
+    parser.add_argument("--keep-work-dir", action="store_true")
+    parser.add_argument("--output", default=None, help="write JSON report to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    # 内部使用：子进程运行单个用例
+    parser.add_argument("--run-case", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--fixture-json", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    if args.run_case:
+        metrics = run_case(args.run_case, json.loads(args.fixture_json), args.work_dir)
+        print(json.dumps(metrics))
+        return 0
+
+    if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+        print("ffmpeg / ffprobe not found in PATH.", file=sys.stderr)
+        return 1
+
+    report = run_benchmarks(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
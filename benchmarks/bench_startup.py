@@ -0,0 +1,105 @@
+"""
+节点注册（导入本包 __init__.py）的启动耗时基准测试。
+
+每次在全新的子进程里像 ComfyUI 一样执行 __init__.py，记录：
+  import_s：导入 + 注册耗时
+  heavy_modules：注册后已被导入的重量级模块（cv2 / numpy / torch / torchaudio / av）
+  nodes：注册的节点数
+
+用法：
+  python benchmarks/bench_startup.py
+  python benchmarks/bench_startup.py --repeat 20 --output startup.json
+  python benchmarks/bench_startup.py --importtime 15   # 额外列出最耗时的 15 个导入
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+HEAVY_MODULES = ("cv2", "numpy", "torch", "torchaudio", "av")
+
+# 子进程里执行的代码：只计导入本包的时间，不含解释器启动
+_CHILD = """
+import json, sys, time
+sys.path.insert(0, {bench_dir!r})
+import _loader
+_loader.install_stubs()
+t0 = time.perf_counter()
+pkg = _loader.load_package(execute_init=True)
+elapsed = time.perf_counter() - t0
+print(json.dumps({{
+    "import_s": round(elapsed, 6),
+    "nodes": len(pkg.NODE_CLASS_MAPPINGS),
+    "heavy_modules": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def _run_once(importtime=False):
+    code = _CHILD.format(bench_dir=BENCH_DIR, heavy=HEAVY_MODULES)
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", code]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.decode("utf-8", errors="ignore"))
+    result = json.loads(proc.stdout.decode("utf-8").strip().splitlines()[-1])
+    return result, proc.stderr.decode("utf-8", errors="ignore")
+
+
+def _top_imports(stderr, n):
+    """解析 -X importtime 输出，按累计耗时取前 n 个模块。"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            continue
+        rows.append((cumulative_us, parts[2].rstrip()))
+    rows.sort(reverse=True)
+    return [{"module": name.strip(), "cumulative_ms": us / 1000.0} for us, name in rows[:n]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--importtime", type=int, default=0, metavar="N")
+    parser.add_argument("--output", default=None, help="write JSON report to this file")
+    args = parser.parse_args(argv)
+
+    runs = [_run_once()[0] for _ in range(max(1, args.repeat))]
+    times = [r["import_s"] for r in runs]
+    report = {
+        "python": sys.version.split()[0],
+        "repeat": len(runs),
+        "import_s_min": min(times),
+        "import_s_median": statistics.median(times),
+        "import_s_max": max(times),
+        "nodes": runs[-1]["nodes"],
+        "heavy_modules": runs[-1]["heavy_modules"],
+    }
+    if args.importtime > 0:
+        _, stderr = _run_once(importtime=True)
+        report["top_imports"] = _top_imports(stderr, args.importtime)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""benchmarks 用的 comfy_api 替身包（只在离线跑基准测试时加入 sys.path）。"""
@@ -0,0 +1,7 @@
+"""benchmarks 用的 VideoFromFile 替身。"""
+
+
+class VideoFromFile:
+    def __init__(self, file):
+        self.file = file
+        self.video_path = file
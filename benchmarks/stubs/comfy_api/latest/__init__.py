@@ -0,0 +1,6 @@
+"""benchmarks 用的 comfy_api.latest 替身，只实现本仓库节点用到的部分。"""
+from . import io, ui
+
+
+class ComfyExtension:
+    pass
@@ -0,0 +1,72 @@
+"""benchmarks 用的 comfy_api.latest.io 替身。"""
+import enum
+
+
+class ComfyNode:
+    pass
+
+
+class Schema:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class NodeOutput:
+    def __init__(self, *args, ui=None, **kwargs):
+        self.args = args
+        self.ui = ui
+
+
+class _Port:
+    def __init__(self, id=None, *args, **kwargs):
+        self.id = id
+        self.kwargs = kwargs
+
+
+class _Type:
+    Input = _Port
+    Output = _Port
+
+
+class Audio(_Type):
+    pass
+
+
+class String(_Type):
+    pass
+
+
+class Int(_Type):
+    pass
+
+
+class Float(_Type):
+    pass
+
+
+class Boolean(_Type):
+    pass
+
+
+class Combo(_Type):
+    pass
+
+
+class Image(_Type):
+    pass
+
+
+class Video(_Type):
+    pass
+
+
+class FolderType(str, enum.Enum):
+    input = "input"
+    output = "output"
+    temp = "temp"
+
+
+class Hidden(str, enum.Enum):
+    prompt = "PROMPT"
+    extra_pnginfo = "EXTRA_PNGINFO"
+    unique_id = "UNIQUE_ID"
@@ -0,0 +1,13 @@
+"""benchmarks 用的 comfy_api.latest.ui 替身。"""
+
+
+class SavedResult:
+    def __init__(self, filename, subfolder, type):
+        self.filename = filename
+        self.subfolder = subfolder
+        self.type = type
+
+
+class PreviewVideo:
+    def __init__(self, results):
+        self.results = results
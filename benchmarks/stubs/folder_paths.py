@@ -0,0 +1,32 @@
+"""
+benchmarks 用的 folder_paths 替身：目录由环境变量 FFMPEG_CONCAT_BENCH_DIR 决定。
+"""
+import os
+
+_BASE = os.environ.get("FFMPEG_CONCAT_BENCH_DIR") or os.path.join(os.getcwd(), "bench_work")
+
+
+def get_output_directory():
+    path = os.path.join(_BASE, "output")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def get_temp_directory():
+    path = os.path.join(_BASE, "temp")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def get_input_directory():
+    path = os.path.join(_BASE, "input")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def exists_annotated_filepath(name):
+    return False
+
+
+def get_annotated_filepath(name):
+    return name
@@ -0,0 +1,40 @@
+import importlib
+import threading
+
+# ComfyUI 运行时类型的兼容层：
+# - VideoFromFile 在不同版本里位置不同，这里统一探测，并且整个进程只探测一次；
+# - 探测推迟到第一次真正需要 VIDEO 对象时（comfy_api.input_impl 会连带导入 av / torch），
+#   节点注册阶段不产生任何重量级导入。
+
+# 按顺序尝试的导入位置
+_VIDEO_FROM_FILE_LOCATIONS = (
+    # 新版官方路径
+    "comfy_api.input_impl",
+    # 一些版本的兼容路径
+    "comfy_api.latest._input_impl.video_types",
+    # 有些 nightly 把它挪到了这里
+    "comfy_api.latest_input_impl.video_types",
+)
+
+_UNRESOLVED = object()
+_video_from_file = _UNRESOLVED
+_lock = threading.Lock()
+
+
+def video_from_file_class():
+    """
+    返回 ComfyUI 的 VideoFromFile 类；当前环境没有时返回 None。
+    """
+    global _video_from_file
+    if _video_from_file is _UNRESOLVED:
+        with _lock:
+            if _video_from_file is _UNRESOLVED:
+                cls = None
+                for module_name in _VIDEO_FROM_FILE_LOCATIONS:
+                    try:
+                        cls = getattr(importlib.import_module(module_name), "VideoFromFile")
+                        break
+                    except Exception:
+                        continue
+                _video_from_file = cls
+    return _video_from_file
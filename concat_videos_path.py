@@ -1,16 +1,71 @@
+import json
+import logging
 import os
-import subprocess
+import shutil
+import tempfile
 
-# 尝试导入 ComfyUI 的 VideoFromFile 类型，用于构造 VIDEO 对象
-try:
-    # 新版官方路径
-    from comfy_api.input_impl import VideoFromFile
-except ImportError:
-    try:
-        # 一些版本的兼容路径
-        from comfy_api.latest._input_impl.video_types import VideoFromFile  # type: ignore
-    except ImportError:
-        VideoFromFile = None
+from .comfy_compat import video_from_file_class
+from .ffmpeg_cache import fingerprint_inputs, lookup_result, make_cache_key, store_result
+from .ffmpeg_encoders import (
+    AUDIO_ENCODERS,
+    CLIP_AUDIO_LAYOUT,
+    CLIP_AUDIO_RATE,
+    INBAND_CODECS,
+    PROFILE_NAMES,
+    TS_AUDIO_CODECS,
+    VIDEO_ENCODERS,
+    audio_copy_fits,
+    audio_encoder_args,
+    clip_audio_filter,
+    delivery_pix_fmt_args,
+    is_intermediate,
+    match_video_args,
+    silence_source,
+    video_copy_fits,
+    video_encoder_args,
+)
+from .ffmpeg_metrics import node_metrics
+from .ffmpeg_output import allocate_output_path, discard_output_path
+from .ffmpeg_parallel import plan_jobs, run_ffmpeg_parallel
+from .ffmpeg_plan import concat_node, execute_plan, is_plan, make_plan, plan_input
+from .ffmpeg_preflight import (
+    analyze_concat,
+    build_remux_cmd,
+    clip_spec,
+    compare_specs,
+    format_report,
+    remux_target_ext,
+)
+from .ffmpeg_probe import probe_media
+from .ffmpeg_runner import run_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+
+def split_path_list(value):
+    """
+    把「视频列表」输入解析成路径列表：
+    - 字符串：按行拆分，忽略空行和 # 开头的注释行，去掉两端引号；
+    - list / tuple：逐项展开（可嵌套）。
+    """
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        paths = []
+        for item in value:
+            paths.extend(split_path_list(item))
+        return paths
+
+    paths = []
+    for line in str(value).splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if len(line) >= 2 and line[0] == line[-1] and line[0] in ("'", '"'):
+            line = line[1:-1].strip()
+        if line:
+            paths.append(line)
+    return paths
 
 
 class ConcatVideos:
@@ -18,12 +73,11 @@ class ConcatVideos:
     def INPUT_TYPES(cls):
         return {
             "required": {
-                "video_path1": ("STRING", {"forceInput": True}),
-
                 # mode: 默认 reencode，"lossless" 改名为 "fast"
-                "mode": (["reencode", "fast"],),
+                # auto: 规格一致时流拷贝，不一致时只重编码少数派片段
+                "mode": (["reencode", "fast", "auto"],),
 
-                # 目标分辨率 / fps（仅 reencode 模式生效；0 表示自动用第一个视频）
+                # 目标分辨率 / fps（reencode / auto 模式生效；0 表示自动）
                 "target_width": ("INT", {"default": 0, "min": 0, "max": 7680}),
                 "target_height": ("INT", {"default": 0, "min": 0, "max": 4320}),
                 "target_fps": ("INT", {"default": 0, "min": 0, "max": 240}),
@@ -32,16 +86,47 @@ class ConcatVideos:
                 "format": (["mp4", "mov", "webm"],),
             },
             "optional": {
+                "video_path1": ("STRING", {"forceInput": True}),
                 "video_path2": ("STRING", {"forceInput": True}),
                 "video_path3": ("STRING", {"forceInput": True}),
                 "video_path4": ("STRING", {"forceInput": True}),
                 "external_audio_path": ("STRING", {"forceInput": True}),
 
-                # 外部音频时是否使用 -shortest，默认开启，UI 最后一个
+                # 外部音频时是否使用 -shortest，默认开启
                 "use_shortest": ("BOOLEAN", {"default": True}),
+
+                # 不限数量的视频列表：每行一个路径（也接受上游传来的 list），
+                # 拼接顺序排在 video_path1..4 之后
+                "video_paths": ("STRING", {"multiline": True, "default": ""}),
+
+                # 编码档位：default = 原来的 preset medium / crf 18
+                "encoder_profile": (PROFILE_NAMES, {"default": "default"}),
+
+                # 相同输入 + 参数时直接复用上一次的输出文件
+                "use_cache": ("BOOLEAN", {"default": True}),
+
+                # 同时编码的片段数：auto 模式 0 = 按 CPU 数自动；
+                # reencode 模式只有大于 1 时才分段并行，0 / 1 使用单个 filtergraph
+                "parallel_jobs": ("INT", {"default": 0, "min": 0, "max": 64}),
+
+                # 延迟执行：不编码，输出渲染计划交给下游合并成一次 ffmpeg；此时 video 输出为空。
+                # 任一输入是渲染计划时，本节点按 reencode 方式把整条链一次编码完成
+                "lazy": ("BOOLEAN", {"default": False}),
+
+                # reencode 模式没有外部音频时保留各片段自身的音频（没有音轨的片段补静音），
+                # 和画面在同一次编码里完成；关闭时输出无音轨
+                "keep_clip_audio": ("BOOLEAN", {"default": True}),
             },
         }
 
+    @classmethod
+    def IS_CHANGED(cls, **kwargs):
+        """
+        video_paths 文本框里的文件被覆盖 / 修改时重新执行（路径字符串不变也能感知）。
+        连线输入不会传给 IS_CHANGED，由上游节点和结果缓存的文件指纹负责。
+        """
+        return fingerprint_inputs(split_path_list(kwargs.get("video_paths")))
+
     # 两个输出：路径 + video
     # 第二个输出类型改为 "VIDEO"
     RETURN_TYPES = ("STRING", "VIDEO")
@@ -49,6 +134,9 @@ class ConcatVideos:
     FUNCTION = "concat"
     CATEGORY = "FFmpeg"
 
+    # encoder_profile = "default" 时使用的档位（preset medium / crf 18）
+    _DEFAULT_PROFILE = "balanced"
+
     # ----------------- 工具方法 -----------------
 
     def _get_output_dir(self):
@@ -67,89 +155,100 @@ class ConcatVideos:
         """
         生成带数字计数器的文件名，类似 ComfyUI core 的 save image：
         prefix_00001.mp4, prefix_00002.mp4, ...
+        使用共享分配器：计数器 O(1) 递增 + 原子占位创建，并发时不会重名。
         """
-        out_dir = self._get_output_dir()
-
-        counter = 1
-        existing_files = [
-            f for f in os.listdir(out_dir)
-            if f.startswith(filename_prefix) and f.endswith(f".{format}")
-        ]
-
-        if existing_files:
-            numbers = []
-            for f in existing_files:
-                name_part = f[len(filename_prefix):-len(f".{format}")].strip("_")
-                if name_part.isdigit():
-                    numbers.append(int(name_part))
+        return allocate_output_path(
+            self._get_output_dir(), filename_prefix, f".{format}", digits=5, sep="_"
+        )
 
-            if numbers:
-                counter = max(numbers) + 1
+    def _make_video_object(self, path):
+        """
+        这里构造 VIDEO 对象：
+        如果有 comfy_api 的 VideoFromFile，就用它；否则退化为字符串路径
+        """
+        VideoFromFile = video_from_file_class()
+        if VideoFromFile is not None:
+            return VideoFromFile(path)
+        return path
 
-        filename = f"{filename_prefix}_{counter:05d}.{format}"
-        return os.path.join(out_dir, filename)
+    @staticmethod
+    def _require_videos(videos):
+        """没有任何输入视频时报错（在探测之前检查，错误信息指出要连接哪些输入）。"""
+        if not videos:
+            raise ValueError(
+                "没有输入视频：请连接上游节点到 video_path1 ~ video_path4，"
+                "或在 video_paths 里每行填写一个视频路径。"
+            )
 
     def _probe_video_info(self, path):
         """
-        使用 ffprobe 获取视频的宽高和平均帧率。
+        使用共享的 ffprobe 缓存获取视频的宽高和平均帧率。
         返回字典: {width, height, fps}；失败时返回 None。
         """
-        try:
-            cmd = [
-                "ffprobe",
-                "-v", "error",
-                "-select_streams", "v:0",
-                "-show_entries", "stream=width,height,avg_frame_rate",
-                "-of", "default=noprint_wrappers=1:nokey=1",
-                path,
-            ]
-            out = subprocess.check_output(cmd, stderr=subprocess.STDOUT)
-            lines = out.decode("utf-8", errors="ignore").strip().splitlines()
-            if len(lines) < 3:
+        info = probe_media(path)
+        if info is None or info["video"] is None:
+            return None
+        video = info["video"]
+        return {
+            "width": video["width"],
+            "height": video["height"],
+            "fps": video["fps"],
+        }
+
+    def _total_duration(self, videos):
+        """
+        所有输入时长之和（秒），用于换算进度条；任一探测失败时返回 None。
+        """
+        total = 0.0
+        for v in videos:
+            info = probe_media(v)
+            if info is None or not info["duration"]:
                 return None
-            width = int(lines[0])
-            height = int(lines[1])
-            fr = lines[2]  # 形如 "30000/1001" 或 "25/1"
-            num, den = (0, 0)
-            if "/" in fr:
-                n, d = fr.split("/", 1)
-                try:
-                    num = int(n)
-                    den = int(d)
-                except ValueError:
-                    num, den = 0, 0
-            fps = None
-            if num > 0 and den > 0:
-                fps = num / den
-            return {
-                "width": width,
-                "height": height,
-                "fps": fps,
-            }
-        except Exception:
+            total += info["duration"]
+        return total
+
+    @staticmethod
+    def _clip_duration(info):
+        """
+        片段的视频时长（秒），用于把片段音频补齐 / 截到画面长度；探测失败时返回 None。
+        """
+        if info is None:
             return None
+        if info["video"] is not None and info["video"]["duration"]:
+            return info["video"]["duration"]
+        return info["duration"]
 
-    def _build_filter_concat_cmd(
-        self,
-        videos,
-        external_audio_path,
-        output_path,
-        target_width,
-        target_height,
-        target_fps,
-        use_shortest,
-    ):
+    @staticmethod
+    def _use_clip_audio(videos, external_audio_path, keep_clip_audio):
+        """保留片段音频：开关打开、没有外部音频、且至少一个片段有音轨。"""
+        if not keep_clip_audio:
+            return False
+        if isinstance(external_audio_path, str) and external_audio_path.strip():
+            return False
+        for v in videos:
+            info = probe_media(v)
+            if info is not None and info["audio"] is not None:
+                return True
+        return False
+
+    def _run(self, cmd, output_path, duration=None):
         """
-        reencode 模式：使用 filter_complex concat 拼接多个视频，自动/手动统一分辨率 / 帧率。
-        - target_width/height/fps > 0 时使用用户指定值；
-          否则以第一个视频为基准（探测失败则默认 1920x1080@30fps）。
-        - 视频编码：libx264, CRF 18, preset medium。
-        - external_audio_path 存在时，将该音轨作为输出音频；
-          use_shortest 控制是否加 -shortest。
+        通过共享执行器运行 ffmpeg：实时进度、可中断，失败时删除未完成的输出。
         """
-        if len(videos) == 0:
-            raise ValueError("没有可拼接的视频。")
+        return run_ffmpeg(
+            cmd,
+            duration=duration,
+            outputs=[output_path],
+            error_prefix="ffmpeg 拼接失败",
+        )
 
+    def _resolve_target(self, videos, target_width, target_height, target_fps):
+        """
+        reencode 模式的目标分辨率 / fps：
+        target_width/height/fps > 0 时使用用户指定值；
+        否则以第一个视频为基准（探测失败则默认 1920x1080@30fps）。
+        返回 (target_w, target_h, fps_int)。
+        """
         # 先探测第一个视频的信息（作为 auto 模式的基准）
         probe = self._probe_video_info(videos[0])
 
@@ -173,6 +272,36 @@ class ConcatVideos:
                 fps_int = max(1, int(round(probe["fps"])))
             else:
                 fps_int = 30
+        return target_w, target_h, fps_int
+
+    def _build_filter_concat_cmd(
+        self,
+        videos,
+        external_audio_path,
+        output_path,
+        target_width,
+        target_height,
+        target_fps,
+        use_shortest,
+        encoder_profile="default",
+        keep_clip_audio=False,
+    ):
+        """
+        reencode 模式：使用 filter_complex concat 拼接多个视频，自动/手动统一分辨率 / 帧率。
+        - target_width/height/fps > 0 时使用用户指定值；
+          否则以第一个视频为基准（探测失败则默认 1920x1080@30fps）。
+        - 视频编码：按 encoder_profile 和输出容器选择（default = libx264, CRF 18, preset medium；
+          webm 使用 libvpx-vp9 + libopus）。
+        - external_audio_path 存在时，将该音轨作为输出音频；
+          use_shortest 控制是否加 -shortest。
+        - 没有外部音频且 keep_clip_audio 时，各片段音频在同一个滤镜图里统一格式后一起拼接
+          （没有音轨的片段补静音），一次解码 / 编码得到带音轨的输出。
+        """
+        self._require_videos(videos)
+
+        target_w, target_h, fps_int = self._resolve_target(
+            videos, target_width, target_height, target_fps
+        )
 
         cmd = ["ffmpeg", "-y"]
 
@@ -190,6 +319,9 @@ class ConcatVideos:
             audio_input_index = len(videos)
             cmd += ["-i", external_audio_path]
 
+        infos = [probe_media(v) for v in videos]
+        use_clip_audio = self._use_clip_audio(videos, external_audio_path, keep_clip_audio)
+
         # 构建 filter_complex
         filter_parts = []
         for idx in range(len(videos)):
@@ -201,11 +333,24 @@ class ConcatVideos:
                 f"fps={fps_int}"
                 f"[v{idx}]"
             )
+            if use_clip_audio:
+                info = infos[idx]
+                duration = self._clip_duration(info)
+                if info is not None and info["audio"] is not None:
+                    filter_parts.append(f"[{idx}:a:0]{clip_audio_filter(duration)}[a{idx}]")
+                else:
+                    filter_parts.append(f"{silence_source(duration)}[a{idx}]")
 
-        concat_inputs = "".join(f"[v{i}]" for i in range(len(videos)))
-        filter_parts.append(
-            f"{concat_inputs}concat=n={len(videos)}:v=1:a=0[outv]"
-        )
+        if use_clip_audio:
+            concat_inputs = "".join(f"[v{i}][a{i}]" for i in range(len(videos)))
+            filter_parts.append(
+                f"{concat_inputs}concat=n={len(videos)}:v=1:a=1[outv][outa]"
+            )
+        else:
+            concat_inputs = "".join(f"[v{i}]" for i in range(len(videos)))
+            filter_parts.append(
+                f"{concat_inputs}concat=n={len(videos)}:v=1:a=0[outv]"
+            )
         filter_complex = "; ".join(filter_parts)
 
         cmd += [
@@ -218,22 +363,20 @@ class ConcatVideos:
             cmd += ["-map", f"{audio_input_index}:a:0"]
             if use_shortest:
                 cmd += ["-shortest"]
+        elif use_clip_audio:
+            cmd += ["-map", "[outa]"]
         else:
             # 没有外部音频时，明确禁用音轨
             cmd += ["-an"]
 
         # 编码设置：统一重编码视频；音频按需编码
-        cmd += [
-            "-c:v", "libx264",
-            "-preset", "medium",
-            "-crf", "18",
-        ]
+        fmt = os.path.splitext(output_path)[1].lstrip(".").lower()
+        cmd += video_encoder_args(encoder_profile, fmt, self._DEFAULT_PROFILE)
+        # 无损中间文件（VideoToPath 的 intermediate 输出）在这里做唯一一次正式编码
+        cmd += delivery_pix_fmt_args(infos)
 
-        if use_external_audio:
-            cmd += [
-                "-c:a", "aac",
-                "-b:a", "192k",
-            ]
+        if use_external_audio or use_clip_audio:
+            cmd += audio_encoder_args(encoder_profile, fmt, self._DEFAULT_PROFILE)
 
         cmd.append(output_path)
         return cmd
@@ -244,6 +387,8 @@ class ConcatVideos:
         external_audio_path,
         output_path,
         use_shortest,
+        list_dir=None,
+        audio_args=None,
     ):
         """
         fast 模式：无论条件如何，一律按「lossless/fast」方式处理。
@@ -251,17 +396,23 @@ class ConcatVideos:
         - 仅做流拷贝：-c copy 或 -c:v copy -c:a copy
         - 不做缩放、不改帧率、不统一参数（要求输入视频本身规格兼容）。
         - target_width / target_height / target_fps 在此模式下会被忽略。
+        - list_dir：list 文件所在目录，默认 output 目录。
+        - audio_args：外部音频的编码参数，默认 -c:a copy。
 
         用完后自动删除临时 list 文件。
         """
         if len(videos) == 0:
             raise ValueError("没有可拼接的视频。")
 
-        out_dir = self._get_output_dir()
-        list_file = os.path.join(out_dir, "temp_concat_list_fast.txt")
+        out_dir = list_dir or self._get_output_dir()
+
+        # 每次使用独立的 list 文件名，避免并发任务互相覆盖
+        fd, list_file = tempfile.mkstemp(
+            prefix="temp_concat_list_fast_", suffix=".txt", dir=out_dir
+        )
 
         # 写入 concat 列表
-        with open(list_file, "w", encoding="utf-8") as f:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
             for v in videos:
                 abs_path = os.path.abspath(v).replace("\\", "/")
                 f.write(f"file '{abs_path}'\n")
@@ -284,7 +435,8 @@ class ConcatVideos:
             cmd += ["-map", "0:v:0", "-map", "1:a:0"]
             if use_shortest:
                 cmd += ["-shortest"]
-            cmd += ["-c:v", "copy", "-c:a", "copy"]
+            cmd += ["-c:v", "copy"]
+            cmd += audio_args if audio_args else ["-c:a", "copy"]
         else:
             cmd += ["-c", "copy"]
 
@@ -293,24 +445,565 @@ class ConcatVideos:
         # 返回命令 + list 文件路径，用于执行后删除
         return cmd, list_file
 
+    # reencode 模式单个 filtergraph 最多接多少个输入，超过时改用「分段归一化 + 流拷贝拼接」
+    # （_staged_reencode_concat）。单个 filtergraph 里每个输入都同时打开一个解码器和
+    # scale / pad / fps 链，内存和打开的文件数随输入数线性增长；分段方式同一时刻只处理
+    # parallel_jobs 个片段，但多一轮中间文件读写，拼接处还会按片段重置时间戳。
+    # 16 个 1080p 输入的解码缓冲还在常见机器的内存范围内，再多就不划算了。
+    _FILTERGRAPH_MAX_INPUTS = 16
+
+    def _build_normalize_cmd(
+        self,
+        src,
+        output_path,
+        target_w,
+        target_h,
+        fps_int,
+        encoder_profile="default",
+        threads=None,
+        clip_audio=False,
+    ):
+        """
+        分段 reencode：把单个片段缩放/补边/统一帧率后，直接用最终编码参数编码。
+        所有片段参数完全一致，之后可以用 concat demuxer 流拷贝拼接，
+        每一帧源画面只编码一次。
+        threads：并行编码时分给这条命令的线程数（解码 / 滤镜 / 编码）。
+        clip_audio：同时把片段音频统一格式后编码进去（没有音轨时补静音），
+        每个片段的音频长度和画面对齐，拼接后音画不会累积错位。
+        """
+        vf = (
+            f"scale={target_w}:{target_h}:force_original_aspect_ratio=decrease,"
+            f"pad={target_w}:{target_h}:(ow-iw)/2:(oh-ih)/2,"
+            f"setsar=1,"
+            f"fps={fps_int},"
+            f"format=yuv420p"
+        )
+        fmt = os.path.splitext(output_path)[1].lstrip(".").lower()
+        thread_args = [] if threads is None else ["-threads", str(threads)]
+        cmd = ["ffmpeg", "-y"] + thread_args + ["-i", src]
+        if not clip_audio:
+            cmd += ["-map", "0:v:0", "-vf", vf, "-an"]
+            cmd += video_encoder_args(encoder_profile, fmt, self._DEFAULT_PROFILE)
+        else:
+            info = probe_media(src)
+            duration = self._clip_duration(info)
+            audio_src = "0:a:0"
+            if info is None or info["audio"] is None:
+                cmd += ["-f", "lavfi", "-i", f"anullsrc=r={CLIP_AUDIO_RATE}:cl={CLIP_AUDIO_LAYOUT}"]
+                audio_src = "1:a:0"
+            cmd += ["-map", "0:v:0", "-vf", vf, "-map", audio_src, "-af", clip_audio_filter(duration)]
+            if not duration:
+                # 时长未知时无法在滤镜里截齐，以画面结束为准
+                cmd += ["-shortest"]
+            cmd += video_encoder_args(encoder_profile, fmt, self._DEFAULT_PROFILE)
+            cmd += audio_encoder_args(encoder_profile, fmt, self._DEFAULT_PROFILE)
+        if threads is not None:
+            cmd += ["-filter_threads", str(threads), "-threads", str(threads)]
+        cmd.append(output_path)
+        return cmd
+
+    def _staged_reencode_concat(
+        self,
+        videos,
+        external_audio_path,
+        output_path,
+        target_width,
+        target_height,
+        target_fps,
+        format,
+        use_shortest,
+        encoder_profile="default",
+        parallel_jobs=0,
+        keep_clip_audio=False,
+    ):
+        """
+        reencode 模式（输入超过 _FILTERGRAPH_MAX_INPUTS / 并行）：各片段归一化编码到临时目录，再流拷贝拼接；
+        外部音频在最后一步按 reencode 模式的参数编码。
+        没有外部音频且 keep_clip_audio 时，片段音频在归一化时一起编码（最后一步直接拷贝）。
+        片段编码按 plan_jobs 并行执行，每个任务分到 CPU 数 / 并行数 个线程。
+        """
+        self._require_videos(videos)
+        target_w, target_h, fps_int = self._resolve_target(
+            videos, target_width, target_height, target_fps
+        )
+        jobs, threads = plan_jobs(len(videos), parallel_jobs)
+        clip_audio = self._use_clip_audio(videos, external_audio_path, keep_clip_audio)
+
+        work_dir = tempfile.mkdtemp(prefix="concat_staged_", dir=self._get_output_dir())
+        try:
+            parts = []
+            cmds = []
+            for i, v in enumerate(videos):
+                part = os.path.join(work_dir, f"part_{i:05d}.{format}")
+                cmds.append(self._build_normalize_cmd(
+                    v, part, target_w, target_h, fps_int, encoder_profile,
+                    threads=threads if jobs > 1 else None,
+                    clip_audio=clip_audio,
+                ))
+                parts.append(part)
+
+            run_ffmpeg_parallel(
+                cmds,
+                jobs,
+                durations=[self._total_duration([v]) for v in videos],
+                outputs=[[part] for part in parts],
+                error_prefix="ffmpeg 拼接失败",
+            )
+
+            cmd, _ = self._build_fast_concat_cmd(
+                videos=parts,
+                external_audio_path=external_audio_path,
+                output_path=output_path,
+                use_shortest=use_shortest,
+                list_dir=work_dir,
+                audio_args=audio_encoder_args(encoder_profile, format, self._DEFAULT_PROFILE),
+            )
+            self._run(cmd, output_path, self._total_duration(parts))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    # ----------------- auto 模式 -----------------
+
+    def _build_conform_cmd(self, src, info, ref, output_path, encoder_profile="default"):
+        """
+        auto 模式：把一个规格不一致的片段重编码成参考规格（多数派），以便后续流拷贝拼接。
+        """
+        ref_v = ref["video"]
+        ref_a = ref["audio"]
+        w, h = ref_v["width"], ref_v["height"]
+        sar = ref_v["sar"].replace(":", "/")
+
+        cmd = ["ffmpeg", "-y", "-i", src]
+
+        need_silence = ref_a is not None and info["audio"] is None
+        if need_silence:
+            layout = ref_a.get("channel_layout") or (
+                "mono" if ref_a.get("channels") == 1 else "stereo"
+            )
+            cmd += ["-f", "lavfi"]
+            if info["duration"]:
+                cmd += ["-t", f"{info['duration']}"]
+            cmd += ["-i", f"anullsrc=r={ref_a['sample_rate'] or 48000}:cl={layout}"]
+
+        vf = (
+            f"scale={w}:{h}:force_original_aspect_ratio=decrease,"
+            f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,"
+            f"setsar={sar},"
+            f"fps={ref_v['r_frame_rate']}"
+        )
+        ext = os.path.splitext(output_path)[1].lstrip(".").lower()
+        cmd += ["-map", "0:v:0", "-vf", vf]
+        cmd += match_video_args(ref_v, ext, encoder_profile, self._DEFAULT_PROFILE)
+
+        if ref_a is None:
+            cmd += ["-an"]
+        else:
+            cmd += ["-map", "1:a:0" if need_silence else "0:a:0"]
+            cmd += ["-c:a", AUDIO_ENCODERS[ref_a["codec"]]]
+            if ref_a["sample_rate"]:
+                cmd += ["-ar", str(ref_a["sample_rate"])]
+            if ref_a["channels"]:
+                cmd += ["-ac", str(ref_a["channels"])]
+
+        cmd.append(output_path)
+        return cmd
+
+    def _remux_clips(self, videos, report, work_dir, parallel_jobs=0):
+        """
+        预检结果里只有容器 / time_base 不同的片段：流拷贝换封装成参考片段的格式，
+        替换到返回的列表里；换封装后重新比较，仍不一致的片段改标为 reencode。
+        """
+        ref = report["reference"]
+        ext = remux_target_ext(ref)
+        parts = list(videos)
+        targets = [c["index"] for c in report["clips"] if c["action"] == "remux"]
+        if not targets:
+            return parts
+
+        cmds = []
+        for i in targets:
+            parts[i] = os.path.join(work_dir, f"remux_{i:05d}.{ext}")
+            cmds.append(build_remux_cmd(videos[i], ref, parts[i]))
+
+        # 换封装只读写文件，不占多少 CPU，按片段数并行
+        jobs, _ = plan_jobs(len(cmds), parallel_jobs)
+        run_ffmpeg_parallel(
+            cmds,
+            jobs,
+            durations=[self._total_duration([videos[i]]) for i in targets],
+            outputs=[[parts[i]] for i in targets],
+            error_prefix="ffmpeg 换封装失败",
+        )
+
+        for i in targets:
+            info = probe_media(parts[i])
+            clip = report["clips"][i]
+            if info is None or info["video"] is None:
+                clip["action"] = "reencode"
+                continue
+            clip["issues"] = compare_specs(clip_spec(info), ref)
+            if any(issue["fix"] == "reencode" for issue in clip["issues"]):
+                clip["action"] = "reencode"
+        return parts
+
+    def _auto_concat(
+        self,
+        videos,
+        external_audio_path,
+        output_path,
+        target_width,
+        target_height,
+        target_fps,
+        format,
+        use_shortest,
+        encoder_profile="default",
+        parallel_jobs=0,
+        keep_clip_audio=False,
+    ):
+        """
+        auto 模式：
+        - 预检所有输入（编码 / profile / level / extradata / 分辨率 / SAR / pix_fmt / fps 及音频参数）；
+        - 全部一致：直接走 fast 模式的 concat demuxer 流拷贝；
+        - 只有容器 / time_base 不同的片段：流拷贝换封装，不重编码；
+        - 其它不一致：只把这些片段重编码成多数派规格，再整体流拷贝拼接；
+          h264 / hevc / mpeg4 的所有片段先转成 MPEG-TS（参数集随码流携带），
+          重编码片段的 SPS/PPS 和参考片段不同也能正确解码；
+        - 无法探测、输入里有无损中间文件、多数派编码不支持对齐（见 _conform_piece_ext）、
+          或编码放不进输出容器时，退回 reencode 模式（中间文件不能直接拷贝进最终输出）。
+        keep_clip_audio：退回 reencode 时是否保留片段音频（流拷贝本来就保留）。
+        返回实际使用的策略："fast" / "remux" / "conform" / "reencode"。
+        """
+        self._require_videos(videos)
+        infos = [probe_media(v) for v in videos]
+
+        def _fallback():
+            cmd = self._build_filter_concat_cmd(
+                videos=videos,
+                external_audio_path=external_audio_path,
+                output_path=output_path,
+                target_width=target_width,
+                target_height=target_height,
+                target_fps=target_fps,
+                use_shortest=use_shortest,
+                encoder_profile=encoder_profile,
+                keep_clip_audio=keep_clip_audio,
+            )
+            self._run(cmd, output_path, self._total_duration(videos))
+            return "reencode"
+
+        if any(info is None or info["video"] is None for info in infos):
+            return _fallback()
+        if any(is_intermediate(info) for info in infos):
+            return _fallback()
+
+        # 用户指定了目标分辨率 / fps 时以用户为准
+        overrides = {}
+        if target_width > 0 and target_height > 0:
+            overrides["width"] = target_width
+            overrides["height"] = target_height
+        if target_fps > 0:
+            overrides["r_frame_rate"] = f"{target_fps}/1"
+        report = analyze_concat(videos, infos, overrides)
+        ref = report["reference"]
+
+        # 参考编码放不进输出容器（如 h264 -> webm）时无法流拷贝
+        if not video_copy_fits(ref["video"]["codec"], format):
+            return _fallback()
+        if (
+            ref["audio"] is not None
+            and not external_audio_path
+            and not audio_copy_fits(ref["audio"]["codec"], format)
+        ):
+            return _fallback()
+
+        if report["strategy"] == "copy":
+            self._run_fast_concat(
+                videos, external_audio_path, output_path, use_shortest, encoder_profile
+            )
+            return "fast"
+
+        # 重编码对齐的中间片段格式在编码前就决定：做不到时直接整体重编码，不白跑一次编码
+        piece_ext = self._conform_piece_ext(ref, format)
+        if report["strategy"] == "reencode" and piece_ext is None:
+            return _fallback()
+
+        work_dir = tempfile.mkdtemp(prefix="concat_auto_", dir=self._get_output_dir())
+        try:
+            parts = self._remux_clips(videos, report, work_dir, parallel_jobs)
+            mismatched = [c["index"] for c in report["clips"] if c["action"] == "reencode"]
+            if mismatched:
+                if piece_ext is None:
+                    return _fallback()
+                parts = self._conform_clips(
+                    videos, infos, parts, mismatched, ref, piece_ext,
+                    work_dir, encoder_profile, parallel_jobs,
+                )
+                if parts is None:
+                    return _fallback()
+            self._run_fast_concat(
+                parts, external_audio_path, output_path, use_shortest, encoder_profile
+            )
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return "conform" if mismatched else "remux"
+
+    @staticmethod
+    def _conform_piece_ext(ref, format):
+        """
+        auto 模式只重编码不一致片段时，中间片段的封装格式；返回 None 表示做不到：
+        - 参考编码没有对应的编码器，或音频是 vorbis / flac；
+        - h264 / hevc / mpeg4：重编码出的参数集（SPS/PPS 等 extradata）不会和参考片段逐字节一致，
+          所有片段都转成 MPEG-TS（参数集随码流携带）后再拼接，返回 "ts"；
+          音频不能放进 MPEG-TS 时返回 None；
+        - 其它编码：参考片段没有 extradata 时直接输出到目标容器（返回 format），
+          有 extradata 时无法复现，返回 None。
+        """
+        ref_v, ref_a = ref["video"], ref["audio"]
+        if ref_v["codec"] not in VIDEO_ENCODERS:
+            return None
+        if ref_a is not None and ref_a["codec"] not in AUDIO_ENCODERS:
+            return None
+        # vorbis / flac 的 extradata 含编码器生成的内容（码本 / 校验信息），重编码后对不上
+        if ref_a is not None and ref_a["codec"] in ("vorbis", "flac"):
+            return None
+        if ref_v["codec"] in INBAND_CODECS:
+            if ref_a is not None and ref_a["codec"] not in TS_AUDIO_CODECS:
+                return None
+            return "ts"
+        if ref_v.get("extradata_hash") is not None:
+            return None
+        return format
+
+    def _conform_clips(
+        self, videos, infos, parts, mismatched, ref, piece_ext,
+        work_dir, encoder_profile="default", parallel_jobs=0,
+    ):
+        """
+        把不一致的片段重编码成参考规格，piece_ext 为 "ts" 时其余片段也流拷贝成 MPEG-TS。
+        返回替换后的片段列表；对齐后仍有需要重编码的差异时返回 None（由调用方整体重编码）。
+        """
+        inband = piece_ext == "ts"
+        parts = list(parts)
+        cmds = {}
+        for i in mismatched:
+            conformed = os.path.join(work_dir, f"part_{i:05d}.{piece_ext}")
+            cmds[i] = self._build_conform_cmd(
+                videos[i], infos[i], ref, conformed, encoder_profile
+            )
+            parts[i] = conformed
+        if inband:
+            for i in range(len(parts)):
+                if i in cmds:
+                    continue
+                piece = os.path.join(work_dir, f"part_{i:05d}.ts")
+                cmds[i] = build_remux_cmd(parts[i], ref, piece)
+                parts[i] = piece
+
+        # 先对齐一个片段并检查（编码器做不到的规格，如 pix_fmt），通过后其余片段并行
+        first = mismatched[0]
+        run_ffmpeg(
+            cmds[first],
+            duration=infos[first]["duration"],
+            outputs=[parts[first]],
+            error_prefix="ffmpeg 拼接失败",
+        )
+        if not self._conformed_ok(parts, [first], ref, inband):
+            return None
+
+        rest = [i for i in sorted(cmds) if i != first]
+        if rest:
+            jobs, _ = plan_jobs(len(rest), parallel_jobs)
+            run_ffmpeg_parallel(
+                [cmds[i] for i in rest],
+                jobs,
+                durations=[infos[i]["duration"] for i in rest],
+                outputs=[[parts[i]] for i in rest],
+                error_prefix="ffmpeg 拼接失败",
+            )
+            if not self._conformed_ok(parts, [i for i in rest if i in mismatched], ref, inband):
+                return None
+        return parts
+
+    @staticmethod
+    def _conformed_ok(parts, indices, ref, inband=False):
+        """
+        重编码对齐后的片段是否真的和参考规格一致（不再有需要重编码的差异）。
+        inband：MPEG-TS 片段的参数集在码流里，不比较 extradata。
+        """
+        for i in indices:
+            info = probe_media(parts[i])
+            if info is None or info["video"] is None:
+                return False
+            issues = compare_specs(clip_spec(info), ref)
+            if inband:
+                issues = [x for x in issues if x["field"] != "extradata_hash"]
+            if any(issue["fix"] == "reencode" for issue in issues):
+                return False
+        return True
+
+    def _preflight_fast_concat(
+        self,
+        videos,
+        external_audio_path,
+        output_path,
+        use_shortest,
+        parallel_jobs=0,
+        encoder_profile="default",
+    ):
+        """
+        fast 模式：拼接前预检，只有容器 / time_base 不同的片段先换封装。
+        预检只是提示：有必须重编码的片段时把报告写到日志，仍按原来的方式直接流拷贝拼接
+        （需要保证结果正确时请改用 auto 或 reencode 模式）。
+        无法探测的片段不做判断，交给 ffmpeg 处理。
+        """
+        report = analyze_concat(videos)
+        if report["counts"]["reencode"]:
+            logger.warning(
+                "fast 模式：以下片段规格不一致，流拷贝拼接后可能花屏 / 不同步"
+                "（建议改用 auto 或 reencode 模式）：\n%s", format_report(report)
+            )
+        if report["counts"]["reencode"] or report["counts"]["remux"] == 0:
+            self._run_fast_concat(
+                videos, external_audio_path, output_path, use_shortest, encoder_profile
+            )
+            return
+
+        work_dir = tempfile.mkdtemp(prefix="concat_remux_", dir=self._get_output_dir())
+        try:
+            parts = self._remux_clips(videos, report, work_dir, parallel_jobs)
+            if any(c["action"] == "reencode" for c in report["clips"]):
+                logger.warning(
+                    "fast 模式：以下片段换封装后规格仍不一致，流拷贝拼接后可能花屏 / 不同步"
+                    "（建议改用 auto 或 reencode 模式）：\n%s", format_report(report)
+                )
+            self._run_fast_concat(
+                parts, external_audio_path, output_path, use_shortest, encoder_profile
+            )
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _external_audio_args(self, external_audio_path, output_path, encoder_profile="default"):
+        """
+        流拷贝拼接时外部音频的参数：编码能直接放进输出容器时 -c:a copy，
+        否则（如 AudioToPath 输出的 WAV 放进 mp4 / webm）只转码音频，视频仍然流拷贝。
+        """
+        fmt = os.path.splitext(output_path)[1].lstrip(".").lower()
+        info = probe_media(external_audio_path)
+        if info is not None and info["audio"] is not None and audio_copy_fits(
+            info["audio"]["codec"], fmt
+        ):
+            return ["-c:a", "copy"]
+        return audio_encoder_args(encoder_profile, fmt, self._DEFAULT_PROFILE)
+
+    def _run_fast_concat(
+        self, videos, external_audio_path, output_path, use_shortest, encoder_profile="default"
+    ):
+        """
+        fast 模式的执行逻辑（auto 模式在规格一致时也复用）。
+        外部音频的编码不适合输出容器时只转码音频（ffmpeg 的音频编码在独立线程里进行，
+        视频仍是流拷贝，整体耗时基本只取决于读写）。
+        """
+        if len(videos) == 1 and not external_audio_path:
+            # 只有一个视频 & 无外部音频：直接 copy 封装
+            cmd = [
+                "ffmpeg", "-y",
+                "-i", videos[0],
+                "-c", "copy",
+                output_path,
+            ]
+            self._run(cmd, output_path, self._total_duration(videos))
+        else:
+            # 多视频 or 单视频 + 外部音频 → 使用 concat demuxer
+            audio_args = None
+            if external_audio_path:
+                audio_args = self._external_audio_args(
+                    external_audio_path, output_path, encoder_profile
+                )
+            cmd, list_file = self._build_fast_concat_cmd(
+                videos=videos,
+                external_audio_path=external_audio_path,
+                output_path=output_path,
+                use_shortest=use_shortest,
+                audio_args=audio_args,
+            )
+            try:
+                self._run(cmd, output_path, self._total_duration(videos))
+            finally:
+                try:
+                    os.remove(list_file)
+                except:
+                    pass
+
+    def _concat_plan(
+        self,
+        videos,
+        target_width,
+        target_height,
+        target_fps,
+        filename_prefix,
+        format,
+        external_audio_path,
+        use_shortest,
+        encoder_profile,
+        use_cache,
+        lazy,
+        keep_clip_audio=True,
+    ):
+        """
+        渲染计划模式：拼接作为 concat 节点加入计划（相当于 reencode 模式）；
+        mode / parallel_jobs 不生效。
+        """
+        ext = str(external_audio_path).strip() if external_audio_path is not None else ""
+        if ext and not os.path.exists(ext):
+            raise FileNotFoundError(f"外接音频文件不存在: {ext}")
+        graph = concat_node(
+            [plan_input(v) for v in videos],
+            target_width,
+            target_height,
+            target_fps,
+            external_audio=ext or None,
+            use_shortest=use_shortest,
+            clip_audio=keep_clip_audio,
+        )
+        plan = make_plan(graph, encoder_profile, self._DEFAULT_PROFILE, format)
+        if lazy:
+            return (plan, None)
+
+        output_path = execute_plan(
+            plan,
+            self._get_output_dir(),
+            "ConcatVideos",
+            lambda: self._get_filename_with_counter(filename_prefix, format),
+            use_cache=use_cache,
+            error_prefix="ffmpeg 拼接失败",
+        )
+        return (output_path, self._make_video_object(output_path))
+
     # ----------------- 主函数 -----------------
 
+    @node_metrics("ConcatVideos", "mode")
     def concat(
         self,
-        video_path1,
         mode,
         target_width,
         target_height,
         target_fps,
         filename_prefix,
         format,
+        video_path1=None,
         video_path2=None,
         video_path3=None,
         video_path4=None,
         external_audio_path=None,
         use_shortest=True,
+        video_paths="",
+        encoder_profile="default",
+        use_cache=True,
+        parallel_jobs=0,
+        lazy=False,
+        keep_clip_audio=True,
     ):
-        # 收集有效的视频输入（最多 4 个），支持 None（未连接）
+        # 收集有效的视频输入：video_path1..4 + video_paths 列表，支持 None（未连接）
         raw_videos = [video_path1, video_path2, video_path3, video_path4]
         videos = []
         for v in raw_videos:
@@ -319,61 +1012,174 @@ class ConcatVideos:
             s = str(v).strip()
             if s:
                 videos.append(s)
+        videos.extend(split_path_list(video_paths))
+
+        self._require_videos(videos)
 
-        if len(videos) < 1:
-            raise ValueError("至少需要提供一个视频路径（请连接上游节点到 video_path1 / video_path2 等）。")
+        # 延迟执行：输出计划，或把上游计划和本次拼接合并成一次编码
+        if lazy or any(is_plan(v) for v in videos):
+            return self._concat_plan(
+                videos, target_width, target_height, target_fps, filename_prefix, format,
+                external_audio_path, use_shortest, encoder_profile, use_cache, lazy,
+                keep_clip_audio,
+            )
+
+        # 结果缓存：相同输入文件 + 参数直接返回上一次的输出
+        cache_key = None
+        if use_cache:
+            cache_key = make_cache_key(
+                "ConcatVideos",
+                {
+                    "mode": mode,
+                    "target_width": target_width,
+                    "target_height": target_height,
+                    "target_fps": target_fps,
+                    "filename_prefix": filename_prefix,
+                    "format": format,
+                    "use_shortest": bool(use_shortest) if external_audio_path else None,
+                    "encoder_profile": encoder_profile,
+                    "videos": [os.path.abspath(v) for v in videos],
+                    "external_audio_path": external_audio_path or None,
+                    "keep_clip_audio": bool(keep_clip_audio),
+                },
+                videos + [external_audio_path],
+            )
+            cached = lookup_result(self._get_output_dir(), cache_key)
+            if cached is not None:
+                return (cached, self._make_video_object(cached))
 
         # 生成带计数器的输出路径
         output_path = self._get_filename_with_counter(filename_prefix, format)
 
-        # fast 模式：无条件走无损/快速 concat
-        if mode == "fast":
-            if len(videos) == 1 and not external_audio_path:
-                # 只有一个视频 & 无外部音频：直接 copy 封装
-                cmd = [
-                    "ffmpeg", "-y",
-                    "-i", videos[0],
-                    "-c", "copy",
-                    output_path,
-                ]
-                subprocess.run(cmd, check=True)
+        try:
+            # fast 模式：无条件走无损/快速 concat
+            if mode == "fast":
+                if len(videos) > 1:
+                    self._preflight_fast_concat(
+                        videos, external_audio_path, output_path, use_shortest,
+                        parallel_jobs, encoder_profile,
+                    )
+                else:
+                    self._run_fast_concat(
+                        videos, external_audio_path, output_path, use_shortest, encoder_profile
+                    )
+
+            elif mode == "auto":
+                # auto 模式：能流拷贝就流拷贝，否则只重编码不一致的片段
+                self._auto_concat(
+                    videos=videos,
+                    external_audio_path=external_audio_path,
+                    output_path=output_path,
+                    target_width=target_width,
+                    target_height=target_height,
+                    target_fps=target_fps,
+                    format=format,
+                    use_shortest=use_shortest,
+                    encoder_profile=encoder_profile,
+                    parallel_jobs=parallel_jobs,
+                    keep_clip_audio=keep_clip_audio,
+                )
+
+            elif len(videos) > self._FILTERGRAPH_MAX_INPUTS or (
+                len(videos) > 1 and parallel_jobs > 1
+            ):
+                # reencode 模式 + 输入超过 _FILTERGRAPH_MAX_INPUTS / 显式要求并行：
+                # 分段归一化（并行）后流拷贝拼接
+                self._staged_reencode_concat(
+                    videos=videos,
+                    external_audio_path=external_audio_path,
+                    output_path=output_path,
+                    target_width=target_width,
+                    target_height=target_height,
+                    target_fps=target_fps,
+                    format=format,
+                    use_shortest=use_shortest,
+                    encoder_profile=encoder_profile,
+                    parallel_jobs=parallel_jobs,
+                    keep_clip_audio=keep_clip_audio,
+                )
+
             else:
-                # 多视频 or 单视频 + 外部音频 → 使用 concat demuxer
-                cmd, list_file = self._build_fast_concat_cmd(
+                # reencode 模式：使用 filter_complex concat
+                cmd = self._build_filter_concat_cmd(
                     videos=videos,
                     external_audio_path=external_audio_path,
                     output_path=output_path,
+                    target_width=target_width,
+                    target_height=target_height,
+                    target_fps=target_fps,
                     use_shortest=use_shortest,
+                    encoder_profile=encoder_profile,
+                    keep_clip_audio=keep_clip_audio,
                 )
-                subprocess.run(cmd, check=True)
-                try:
-                    os.remove(list_file)
-                except:
-                    pass
+                self._run(cmd, output_path, self._total_duration(videos))
+        except BaseException:
+            # 失败时删除编号占位文件，避免留下 0 字节的输出
+            discard_output_path(output_path)
+            raise
 
-        else:
-            # reencode 模式：使用 filter_complex concat
-            cmd = self._build_filter_concat_cmd(
-                videos=videos,
-                external_audio_path=external_audio_path,
-                output_path=output_path,
-                target_width=target_width,
-                target_height=target_height,
-                target_fps=target_fps,
-                use_shortest=use_shortest,
-            )
-            subprocess.run(cmd, check=True)
+        if cache_key is not None:
+            store_result(self._get_output_dir(), cache_key, output_path)
 
-        # 这里构造 VIDEO 对象：
-        # 如果有 comfy_api 的 VideoFromFile，就用它；否则退化为字符串路径
-        if VideoFromFile is not None:
-            video_obj = VideoFromFile(output_path)
-        else:
-            video_obj = output_path
+        return (output_path, self._make_video_object(output_path))
+
+
+class ConcatPreflight:
+    """
+    拼接前预检：比较各片段的编码 / profile / level / extradata / pix_fmt / time_base / SAR
+    和音频参数，输出 JSON 报告（每个片段 copy / remux / reencode）以及能否不重编码拼接。
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {},
+            "optional": {
+                "video_path1": ("STRING", {"forceInput": True}),
+                "video_path2": ("STRING", {"forceInput": True}),
+                "video_path3": ("STRING", {"forceInput": True}),
+                "video_path4": ("STRING", {"forceInput": True}),
+                "video_paths": ("STRING", {"multiline": True, "default": ""}),
+            },
+        }
+
+    @classmethod
+    def IS_CHANGED(cls, **kwargs):
+        return fingerprint_inputs(split_path_list(kwargs.get("video_paths")))
+
+    RETURN_TYPES = ("STRING", "BOOLEAN")
+    RETURN_NAMES = ("report", "copy_compatible")
+    FUNCTION = "preflight"
+    CATEGORY = "FFmpeg"
 
-        return (output_path, video_obj)
+    def preflight(
+        self,
+        video_path1=None,
+        video_path2=None,
+        video_path3=None,
+        video_path4=None,
+        video_paths="",
+    ):
+        videos = []
+        for v in (video_path1, video_path2, video_path3, video_path4):
+            if v is not None and str(v).strip():
+                videos.append(str(v).strip())
+        videos.extend(split_path_list(video_paths))
+        ConcatVideos._require_videos(videos)
+        if any(is_plan(v) for v in videos):
+            raise ValueError(
+                "预检只能分析视频文件：输入是 lazy 节点输出的渲染计划，请先接 Render Plan 节点。"
+            )
+
+        report = analyze_concat(videos)
+        return (json.dumps(report, ensure_ascii=False, indent=2), report["compatible"])
 
 
 NODE_CLASS_MAPPINGS = {
-    "ConcatVideos": ConcatVideos
+    "ConcatVideos": ConcatVideos,
+    "ConcatPreflight": ConcatPreflight,
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "ConcatPreflight": "Concat Preflight (FFmpeg)",
 }
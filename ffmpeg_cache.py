@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+# 节点结果缓存（内容寻址）：
+# - 缓存键 = sha256(节点名 + 归一化参数 + 输入文件指纹)；
+# - 输入文件指纹 = (绝对路径, 大小, mtime_ns)，可选再加内容哈希；
+# - 命中时直接返回上一次的输出文件，不再运行 ffmpeg、也不再生成新的编号文件；
+# - 索引记录在 output/.ffmpeg_concat/result_cache.json，按输出文件总大小做 LRU 淘汰。
+
+CACHE_DIRNAME = ".ffmpeg_concat"
+INDEX_FILENAME = "result_cache.json"
+
+# 缓存输出文件的总大小上限（字节），默认 20 GiB
+MAX_BYTES = int(os.environ.get("FFMPEG_CONCAT_CACHE_MAX_BYTES", str(20 * 1024 ** 3)) or 0)
+
+# 内容哈希：none（只用大小 + mtime）/ sample（首尾各 1MB）/ full（整个文件）
+HASH_MODE = os.environ.get("FFMPEG_CONCAT_CACHE_HASH", "none").strip().lower() or "none"
+
+# 淘汰时是否同时删除输出文件。默认只从索引里移除，文件留给用户自己管理
+DELETE_EVICTED = os.environ.get("FFMPEG_CONCAT_CACHE_DELETE_EVICTED", "").strip().lower() in (
+    "1", "true", "yes", "on",
+)
+
+_SAMPLE_BYTES = 1024 * 1024
+_lock = threading.Lock()
+
+
+def _content_hash(path, mode):
+    h = hashlib.sha1()
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        if mode == "full" or size <= 2 * _SAMPLE_BYTES:
+            for block in iter(lambda: f.read(_SAMPLE_BYTES), b""):
+                h.update(block)
+        else:
+            h.update(f.read(_SAMPLE_BYTES))
+            f.seek(size - _SAMPLE_BYTES)
+            h.update(f.read(_SAMPLE_BYTES))
+    return h.hexdigest()
+
+
+def file_fingerprint(path, hash_mode=None):
+    """
+    输入文件指纹：{path, size, mtime_ns[, hash]}；文件不存在时返回 {path, missing}。
+    """
+    mode = hash_mode or HASH_MODE
+    abs_path = os.path.abspath(path)
+    try:
+        st = os.stat(abs_path)
+    except OSError:
+        return {"path": abs_path, "missing": True}
+    fp = {"path": abs_path, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    if mode in ("sample", "full"):
+        try:
+            fp["hash"] = _content_hash(abs_path, mode)
+        except OSError:
+            pass
+    return fp
+
+
+def _usable_paths(paths):
+    result = []
+    for p in paths:
+        if p is None:
+            continue
+        s = str(p).strip()
+        if s:
+            result.append(s)
+    return result
+
+
+def fingerprint_inputs(paths):
+    """
+    供节点的 IS_CHANGED 使用：输入文件任何变化（覆盖、修改）都会改变返回值。
+    只对文本框里填写的路径有意义——ComfyUI 调用 IS_CHANGED 时不会传入连线输入的值。
+    """
+    fps = [file_fingerprint(p) for p in _usable_paths(paths)]
+    data = json.dumps(fps, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def make_cache_key(node_name, params, input_paths):
+    """
+    结果缓存键：节点名 + 归一化后的参数 + 输入文件指纹。
+    """
+    payload = {
+        "node": node_name,
+        "params": params,
+        "inputs": [file_fingerprint(p) for p in _usable_paths(input_paths)],
+    }
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _index_path(out_dir):
+    return os.path.join(out_dir, CACHE_DIRNAME, INDEX_FILENAME)
+
+
+def _load_index(out_dir):
+    try:
+        with open(_index_path(out_dir), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(out_dir, index):
+    path = _index_path(out_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def _entry_valid(entry):
+    """缓存的输出文件必须仍然存在且没有被改动过。"""
+    try:
+        st = os.stat(entry["output"])
+    except (OSError, KeyError, TypeError):
+        return False
+    return st.st_size == entry.get("size") and st.st_mtime_ns == entry.get("mtime_ns")
+
+
+def lookup_result(out_dir, key):
+    """
+    查询缓存：命中时返回输出文件路径（并刷新 LRU 时间），否则返回 None。
+    """
+    with _lock:
+        index = _load_index(out_dir)
+        entry = index.get(key)
+        if entry is None:
+            return None
+        if not _entry_valid(entry):
+            index.pop(key, None)
+            _save_index(out_dir, index)
+            return None
+        entry["last_used"] = time.time()
+        _save_index(out_dir, index)
+        return entry["output"]
+
+
+def _evict(index, keep):
+    """按 last_used 从旧到新淘汰，直到缓存输出总大小不超过 MAX_BYTES（keep 条目不淘汰）。"""
+    if MAX_BYTES <= 0:
+        return
+    total = sum(e.get("size", 0) for e in index.values())
+    for key, entry in sorted(index.items(), key=lambda kv: kv[1].get("last_used", 0)):
+        if total <= MAX_BYTES:
+            break
+        if key == keep:
+            continue
+        index.pop(key, None)
+        total -= entry.get("size", 0)
+        if DELETE_EVICTED:
+            try:
+                os.remove(entry["output"])
+            except (OSError, KeyError):
+                pass
+
+
+def store_result(out_dir, key, output_path):
+    """
+    记录一次成功的输出，供之后相同输入 + 参数的任务直接复用。
+    """
+    try:
+        st = os.stat(output_path)
+    except OSError:
+        return
+    with _lock:
+        index = _load_index(out_dir)
+        # 顺便清理失效条目
+        for k in [k for k, e in index.items() if not _entry_valid(e)]:
+            index.pop(k, None)
+        index[key] = {
+            "output": os.path.abspath(output_path),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "last_used": time.time(),
+        }
+        _evict(index, keep=key)
+        _save_index(out_dir, index)
@@ -0,0 +1,339 @@
+# 编码器相关的共享工具：
+# - 命名编码档位（encoder profile），ConcatVideos / OverlayVideos / CutVideo 共用；
+# - 在需要「重编码一小段并和原始码流无缝拼接」时（auto 拼接、smart 剪切），
+#   根据 ffprobe 探测到的源规格选出对应的编码器和参数；
+# - 无损中间格式：VideoToPath 等节点输出给下游继续处理的文件，
+#   下游识别后只在最后一个节点做一次正式（有损）编码。
+# - 重编码拼接时保留片段自身音频：统一成同一采样率 / 声道布局，没有音轨的片段补静音。
+
+# 源编码 -> 用于重编码对齐的编码器
+VIDEO_ENCODERS = {
+    "h264": "libx264",
+    "hevc": "libx265",
+    "vp9": "libvpx-vp9",
+    "mpeg4": "mpeg4",
+}
+
+AUDIO_ENCODERS = {
+    "aac": "aac",
+    "mp3": "libmp3lame",
+    "opus": "libopus",
+    "vorbis": "libvorbis",
+    "flac": "flac",
+}
+
+# 参数集（SPS/PPS 等）可以随码流携带的视频编码：中间片段用 MPEG-TS 封装时，
+# 各片段的参数集不必一致，拼接后解码器按片段切换（smart 剪切、auto 拼接共用）
+INBAND_CODECS = ("h264", "hevc", "mpeg4")
+
+# 可以放进 MPEG-TS 中间片段的音频编码
+TS_AUDIO_CODECS = ("aac", "mp3")
+
+
+def encoder_profile_arg(encoder, profile):
+    """
+    把 ffprobe 的 profile 名（如 "High" / "Main 10"）转换为编码器的 -profile:v 参数。
+    无法对应时返回 None。
+    """
+    if not profile:
+        return None
+    p = str(profile).lower().replace(" ", "")
+    if encoder == "libx264":
+        return {
+            "constrainedbaseline": "baseline",
+            "baseline": "baseline",
+            "main": "main",
+            "high": "high",
+            "high10": "high10",
+            "high4:2:2": "high422",
+            "high4:4:4predictive": "high444",
+        }.get(p)
+    if encoder == "libx265":
+        return p if p in ("main", "main10", "main12", "mainstillpicture") else None
+    return None
+
+
+def match_video_args(video, output_ext=None, profile_name="default", node_default="balanced"):
+    """
+    生成与源视频流规格一致的视频编码参数（编码器 / profile / pix_fmt / timescale），
+    画质 / 速度参数取自编码档位。
+    video 为 ffmpeg_probe 返回的 "video" 字典；源编码不支持时返回 None。
+    """
+    if not video:
+        return None
+    encoder = VIDEO_ENCODERS.get(video.get("codec"))
+    if encoder is None:
+        return None
+
+    args = ["-c:v", encoder]
+    args += _quality_args(encoder, resolve_profile(profile_name, node_default))
+    profile = encoder_profile_arg(encoder, video.get("profile"))
+    if profile:
+        args += ["-profile:v", profile]
+    if video.get("pix_fmt"):
+        args += ["-pix_fmt", video["pix_fmt"]]
+
+    # mp4/mov 通过 track timescale 对齐 time_base
+    tb = video.get("time_base") or ""
+    if "/" in tb and output_ext not in ("webm", "mkv", "ts"):
+        den = tb.split("/", 1)[1]
+        if den.isdigit():
+            args += ["-video_track_timescale", den]
+    return args
+
+
+# ----------------- 编码档位（encoder profile） -----------------
+
+# 各节点共享的命名编码档位。字段：
+# - codec：视频编码器，None 表示按输出容器自动选择；
+# - preset / crf / tune：x264/x265 含义，vp9 会自动换算；
+# - bitrate：设置后使用固定码率（覆盖 crf），如 "8M"；
+# - threads：编码线程数，None 表示交给 ffmpeg 自动决定；
+# - gop：关键帧间隔（帧），None 表示编码器默认；
+# - audio_bitrate：音频码率。
+# "default" 不在表里：表示使用各节点原来的默认档位。
+ENCODER_PROFILES = {
+    "preview": {
+        "codec": None, "preset": "ultrafast", "crf": 28, "tune": None,
+        "bitrate": None, "threads": None, "gop": None, "audio_bitrate": "128k",
+    },
+    "fast": {
+        "codec": None, "preset": "fast", "crf": 18, "tune": None,
+        "bitrate": None, "threads": None, "gop": None, "audio_bitrate": "192k",
+    },
+    "balanced": {
+        "codec": None, "preset": "medium", "crf": 18, "tune": None,
+        "bitrate": None, "threads": None, "gop": None, "audio_bitrate": "192k",
+    },
+    "quality": {
+        "codec": None, "preset": "slow", "crf": 16, "tune": None,
+        "bitrate": None, "threads": None, "gop": None, "audio_bitrate": "256k",
+    },
+    "archive": {
+        "codec": None, "preset": "veryslow", "crf": 14, "tune": None,
+        "bitrate": None, "threads": None, "gop": None, "audio_bitrate": "320k",
+    },
+    "hevc": {
+        "codec": "libx265", "preset": "medium", "crf": 22, "tune": None,
+        "bitrate": None, "threads": None, "gop": None, "audio_bitrate": "192k",
+    },
+    # 无损中间文件：交给下游节点继续处理，编码几乎不耗 CPU（crf 0 = 无损）
+    "intermediate": {
+        "codec": None, "preset": "ultrafast", "crf": 0, "tune": None,
+        "bitrate": None, "threads": None, "gop": None, "audio_bitrate": "320k",
+    },
+}
+
+# 节点 UI 下拉框的选项
+PROFILE_NAMES = ["default"] + list(ENCODER_PROFILES.keys())
+
+# 容器 -> (默认视频编码器, 默认音频编码器, 允许的视频编码器)
+CONTAINER_CODECS = {
+    "mp4": ("libx264", "aac", ("libx264", "libx265", "mpeg4")),
+    "mov": ("libx264", "aac", ("libx264", "libx265", "mpeg4")),
+    "mkv": ("libx264", "aac", ("libx264", "libx265", "mpeg4", "libvpx-vp9")),
+    "webm": ("libvpx-vp9", "libopus", ("libvpx-vp9",)),
+}
+
+# 容器 -> 可以直接流拷贝进去的音频编码（ffprobe codec_name）。
+# mp4 里的 opus / flac 在较旧的 ffmpeg 上需要 -strict experimental，播放器支持也不齐，
+# 不算可直接拷贝：遇到时转码成 aac
+CONTAINER_AUDIO_CODECS = {
+    "mp4": ("aac", "mp3", "alac", "ac3", "eac3"),
+    "mov": ("aac", "mp3", "alac", "ac3", "eac3", "pcm_s16le", "pcm_s24le", "pcm_f32le"),
+    "mkv": ("aac", "mp3", "alac", "ac3", "eac3", "opus", "vorbis", "flac",
+            "pcm_s16le", "pcm_s24le", "pcm_f32le"),
+    "webm": ("opus", "vorbis"),
+}
+
+
+# 容器 -> 可以直接流拷贝进去的视频编码（ffprobe codec_name）
+CONTAINER_VIDEO_CODECS = {
+    "mp4": ("h264", "hevc", "mpeg4", "av1", "vp9"),
+    "mov": ("h264", "hevc", "mpeg4", "prores", "mjpeg"),
+    "mkv": ("h264", "hevc", "mpeg4", "av1", "vp8", "vp9", "ffv1", "utvideo", "prores", "mjpeg"),
+    "webm": ("vp8", "vp9", "av1"),
+}
+
+
+def video_copy_fits(codec, fmt="mp4"):
+    """该视频编码能否不转码直接封装进 fmt 容器。"""
+    return codec in CONTAINER_VIDEO_CODECS.get(fmt, CONTAINER_VIDEO_CODECS["mp4"])
+
+
+def audio_copy_fits(codec, fmt="mp4"):
+    """该音频编码能否不转码直接封装进 fmt 容器。"""
+    return codec in CONTAINER_AUDIO_CODECS.get(fmt, CONTAINER_AUDIO_CODECS["mp4"])
+
+
+# x264 preset -> libvpx-vp9 的 cpu-used
+_VP9_CPU_USED = {
+    "ultrafast": 8, "superfast": 7, "veryfast": 6, "faster": 5, "fast": 4,
+    "medium": 2, "slow": 1, "slower": 0, "veryslow": 0,
+}
+
+
+def resolve_profile(name, node_default="balanced"):
+    """
+    把档位名解析成档位字典；"default" / 未知名称时使用节点自己的默认档位。
+    """
+    if name not in ENCODER_PROFILES:
+        name = node_default
+    return ENCODER_PROFILES[name]
+
+
+def _quality_args(encoder, profile):
+    """
+    x264 / x265 / vp9 的 preset、crf（或码率）、tune、gop、threads 参数。
+    """
+    args = []
+    if encoder in ("libx264", "libx265"):
+        args += ["-preset", profile["preset"]]
+        if profile["bitrate"]:
+            args += ["-b:v", profile["bitrate"]]
+        else:
+            args += ["-crf", str(profile["crf"])]
+        if profile["tune"]:
+            args += ["-tune", profile["tune"]]
+    elif encoder == "libvpx-vp9":
+        args += ["-deadline", "good", "-cpu-used", str(_VP9_CPU_USED.get(profile["preset"], 2))]
+        if profile["bitrate"]:
+            args += ["-b:v", profile["bitrate"]]
+        elif profile["crf"] == 0:
+            args += ["-lossless", "1"]
+        else:
+            args += ["-crf", str(min(63, int(round(profile["crf"] * 1.7)))), "-b:v", "0"]
+        args += ["-row-mt", "1"]
+    else:
+        if profile["bitrate"]:
+            args += ["-b:v", profile["bitrate"]]
+        else:
+            args += ["-q:v", "2"]
+
+    if profile["gop"]:
+        args += ["-g", str(profile["gop"])]
+    if profile["threads"] is not None:
+        args += ["-threads", str(profile["threads"])]
+    return args
+
+
+def video_encoder_args(profile_name, fmt="mp4", node_default="balanced"):
+    """
+    按档位 + 输出容器生成视频编码参数，例如
+    ["-c:v", "libx264", "-preset", "medium", "-crf", "18"]。
+    档位指定的编码器与容器不兼容时，改用容器默认编码器。
+    """
+    profile = resolve_profile(profile_name, node_default)
+    default_v, _, allowed = CONTAINER_CODECS.get(fmt, CONTAINER_CODECS["mp4"])
+    encoder = profile["codec"] if profile["codec"] in allowed else default_v
+    args = ["-c:v", encoder] + _quality_args(encoder, profile)
+    if profile is ENCODER_PROFILES["intermediate"]:
+        args += intermediate_tag_args("lossless", fmt)
+    return args
+
+
+def audio_encoder_args(profile_name, fmt="mp4", node_default="balanced"):
+    """
+    按档位 + 输出容器生成音频编码参数，例如 ["-c:a", "aac", "-b:a", "192k"]。
+    """
+    profile = resolve_profile(profile_name, node_default)
+    _, default_a, _ = CONTAINER_CODECS.get(fmt, CONTAINER_CODECS["mp4"])
+    return ["-c:a", default_a, "-b:a", profile["audio_bitrate"]]
+
+
+# ----------------- 片段音频统一 -----------------
+
+# 重编码拼接保留片段音频时统一到的格式
+CLIP_AUDIO_RATE = 48000
+CLIP_AUDIO_LAYOUT = "stereo"
+
+# 时长未知的片段补的静音长度（秒）：concat 滤镜会把音频补齐到该段视频的结尾
+_SILENCE_FALLBACK = 0.1
+
+
+def clip_audio_filter(duration=None):
+    """
+    片段音轨的统一滤镜链：重采样到 CLIP_AUDIO_RATE / CLIP_AUDIO_LAYOUT；
+    duration 已知时补静音并截到该长度，音画按片段对齐。
+    """
+    chain = (
+        f"aresample={CLIP_AUDIO_RATE},"
+        f"aformat=sample_fmts=fltp:sample_rates={CLIP_AUDIO_RATE}"
+        f":channel_layouts={CLIP_AUDIO_LAYOUT}"
+    )
+    if duration:
+        chain += f",apad,atrim=duration={duration:.6f}"
+    return chain
+
+
+def silence_source(duration=None):
+    """没有音轨的片段用的静音源（filter_complex 里的源滤镜）。"""
+    length = duration or _SILENCE_FALLBACK
+    return (
+        f"anullsrc=r={CLIP_AUDIO_RATE}:cl={CLIP_AUDIO_LAYOUT},"
+        f"atrim=duration={length:.6f}"
+    )
+
+
+# ----------------- 无损中间格式 -----------------
+
+# 容器元数据里的标记：值为中间格式名
+INTERMEDIATE_TAG = "FFMPEG_CONCAT_INTERMEDIATE"
+
+# 中间格式 -> (扩展名, 视频编码参数)。全部帧内编码，每一帧都是关键帧
+INTERMEDIATE_FORMATS = {
+    "ffv1": (".mkv", [
+        "-c:v", "ffv1", "-level", "3", "-g", "1",
+        "-slices", "16", "-slicecrc", "0", "-pix_fmt", "gbrp",
+    ]),
+    "utvideo": (".mkv", ["-c:v", "utvideo", "-pix_fmt", "gbrp"]),
+    "x264_lossless": (".mkv", [
+        "-c:v", "libx264", "-preset", "ultrafast", "-qp", "0", "-g", "1", "-pix_fmt", "yuv444p",
+    ]),
+}
+
+# 节点 UI 下拉框的选项
+INTERMEDIATE_NAMES = ["none"] + list(INTERMEDIATE_FORMATS.keys())
+
+# 这些编码只会出现在中间文件里，即使没有标记也按中间格式处理
+_INTERMEDIATE_CODECS = ("ffv1", "utvideo")
+
+
+def intermediate_tag_args(name, fmt="mkv"):
+    """写入中间格式标记的参数（mp4 / mov 需要 use_metadata_tags 才能保存自定义键）。"""
+    args = ["-metadata", f"{INTERMEDIATE_TAG}={name}"]
+    if fmt in ("mp4", "mov"):
+        args += ["-movflags", "+use_metadata_tags"]
+    return args
+
+
+def intermediate_args(name):
+    """
+    中间格式的 (扩展名, 视频编码参数 + 标记参数)；name 未知时返回 None。
+    """
+    if name not in INTERMEDIATE_FORMATS:
+        return None
+    ext, args = INTERMEDIATE_FORMATS[name]
+    return ext, list(args) + intermediate_tag_args(name, ext.lstrip("."))
+
+
+def is_intermediate(info):
+    """
+    ffmpeg_probe 的探测结果是否是无损中间文件（带标记，或 ffv1 / utvideo 编码）。
+    """
+    if not info:
+        return False
+    for key in (info.get("tags") or {}):
+        if key.upper() == INTERMEDIATE_TAG:
+            return True
+    video = info.get("video")
+    return video is not None and video.get("codec") in _INTERMEDIATE_CODECS
+
+
+def delivery_pix_fmt_args(infos):
+    """
+    输入里有中间文件（gbrp / yuv444p）时，正式编码统一输出 yuv420p，保证播放器兼容。
+    """
+    if any(is_intermediate(info) for info in infos):
+        return ["-pix_fmt", "yuv420p"]
+    return []
@@ -0,0 +1,372 @@
+"""
+ffmpeg / ffprobe 调用的性能记录与汇总。
+
+每次调用写一行 JSON 到 output/.ffmpeg_concat/metrics.jsonl（按大小轮转）：
+  node / mode / kind / cmd / queue_s / wall_s / cpu_user_s / cpu_sys_s / max_rss_mb /
+  input_bytes / output_bytes / frames / speed / out_time / threads / returncode / status
+
+汇总（也可在 ComfyUI 里用 FFmpeg Metrics Summary 节点）：
+  python ffmpeg_metrics.py
+  python ffmpeg_metrics.py --since-hours 24 --group-by node,mode --json
+  python ffmpeg_metrics.py --log /path/to/metrics.jsonl
+
+本模块只依赖标准库，可以脱离 ComfyUI 直接运行。
+"""
+import argparse
+import contextvars
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+
+# 是否记录（默认开启；FFMPEG_CONCAT_METRICS=0 关闭）
+ENABLED = os.environ.get("FFMPEG_CONCAT_METRICS", "1").strip().lower() not in (
+    "0", "false", "no", "off",
+)
+
+# 日志目录：默认与结果缓存相同（ComfyUI/output/.ffmpeg_concat）
+METRICS_DIR = os.environ.get("FFMPEG_CONCAT_METRICS_DIR", "").strip() or os.path.join(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")),
+    "output",
+    ".ffmpeg_concat",
+)
+LOG_FILENAME = "metrics.jsonl"
+
+# 单个日志文件上限（字节）和保留的轮转份数：metrics.jsonl.1 .. metrics.jsonl.N
+MAX_BYTES = int(os.environ.get("FFMPEG_CONCAT_METRICS_MAX_BYTES", str(16 * 1024 ** 2)) or 0)
+BACKUPS = int(os.environ.get("FFMPEG_CONCAT_METRICS_BACKUPS", "5") or 0)
+
+# 命令行记录的长度上限（成千上万个输入的拼接 / 很长的 filter_complex）
+_MAX_CMD_ARGS = 200
+_MAX_ARG_CHARS = 1000
+
+_HAS_WAIT4 = hasattr(os, "wait4")
+
+_lock = threading.Lock()
+_current = contextvars.ContextVar("ffmpeg_metrics_node", default=(None, None))
+
+
+def log_path():
+    return os.path.join(METRICS_DIR, LOG_FILENAME)
+
+
+# ----------------- 节点上下文 -----------------
+
+def node_metrics(node, mode_param=None):
+    """
+    装饰节点的执行函数：期间启动的 ffmpeg / ffprobe 都记在 node 名下，
+    mode 取自参数 mode_param（例如 ConcatVideos 的 mode、CutVideo 的 cut_mode）。
+    """
+    def decorate(fn):
+        sig = inspect.signature(fn) if mode_param else None
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            mode = None
+            if sig is not None:
+                try:
+                    arguments = sig.bind_partial(*args, **kwargs).arguments
+                except TypeError:
+                    arguments = {}
+                if mode_param in arguments:
+                    mode = arguments[mode_param]
+                else:
+                    default = sig.parameters[mode_param].default
+                    mode = None if default is inspect.Parameter.empty else default
+            token = _current.set((node, None if mode is None else str(mode)))
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _current.reset(token)
+
+        return wrapper
+
+    return decorate
+
+
+def current_node():
+    """当前线程 / 上下文所属的 (node, mode)。"""
+    return _current.get()
+
+
+# ----------------- 单次调用记录 -----------------
+
+def _exit_code(status):
+    if hasattr(os, "waitstatus_to_exitcode"):
+        return os.waitstatus_to_exitcode(status)
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _input_bytes(cmd):
+    total = 0
+    for i, arg in enumerate(cmd[:-1]):
+        if arg == "-i":
+            try:
+                total += os.path.getsize(cmd[i + 1])
+            except OSError:
+                pass
+    return total
+
+
+def _output_bytes(cmd):
+    try:
+        return os.path.getsize(cmd[-1])
+    except (OSError, IndexError):
+        return None
+
+
+class CallRecord:
+    """
+    一次 ffmpeg / ffprobe 调用的记录，用作上下文管理器：退出时写入日志。
+    - 用 poll(proc) / wait(proc) 代替 Popen.poll() / wait()，通过 wait4 拿到子进程的 rusage；
+    - frames / speed / out_time 由调用方在知道时填写；
+    - 调用方主动结束进程时可以填写 status（如 "interrupted"），优先于按退出码推断。
+    """
+
+    def __init__(self, cmd, kind="ffmpeg", queue_s=0.0, threads=None):
+        self.cmd = list(cmd)
+        self.kind = kind
+        self.node, self.mode = current_node()
+        self.queue_s = queue_s
+        self.threads = threads
+        self.rusage = None
+        self.returncode = None
+        self.frames = None
+        self.speed = None
+        self.out_time = None
+        self.status = None
+        self._ts = time.time()
+        self._start = time.monotonic()
+
+    def _reaped(self, proc, status, rusage):
+        proc.returncode = _exit_code(status)
+        self.rusage = rusage
+        self.returncode = proc.returncode
+        return proc.returncode
+
+    def poll(self, proc):
+        """等价于 proc.poll()。"""
+        if proc.returncode is None and _HAS_WAIT4:
+            try:
+                pid, status, rusage = os.wait4(proc.pid, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+            else:
+                if pid:
+                    return self._reaped(proc, status, rusage)
+                return None
+        self.returncode = proc.poll()
+        return self.returncode
+
+    def wait(self, proc):
+        """等价于 proc.wait()。"""
+        if proc.returncode is None and _HAS_WAIT4:
+            try:
+                _, status, rusage = os.wait4(proc.pid, 0)
+            except ChildProcessError:
+                pass
+            else:
+                return self._reaped(proc, status, rusage)
+        self.returncode = proc.wait()
+        return self.returncode
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.status is not None:
+            status = self.status
+        elif exc_type is None:
+            status = "ok" if not self.returncode else "error"
+        elif exc_type.__name__ == "FFmpegCancelled":
+            status = "cancelled"
+        elif self.returncode:
+            status = "error"
+        elif issubclass(exc_type, (RuntimeError, OSError, ValueError)):
+            status = "error"
+        else:
+            status = "interrupted"
+        self.finish(status)
+        return False
+
+    def finish(self, status):
+        if not ENABLED:
+            return
+        wall = time.monotonic() - self._start
+        record = {
+            "ts": round(self._ts, 3),
+            "node": self.node,
+            "mode": self.mode,
+            "kind": self.kind,
+            "cmd": [a[:_MAX_ARG_CHARS] for a in self.cmd[:_MAX_CMD_ARGS]],
+            "queue_s": round(self.queue_s, 4),
+            "wall_s": round(wall, 4),
+            "cpu_user_s": None,
+            "cpu_sys_s": None,
+            "max_rss_mb": None,
+            "input_bytes": _input_bytes(self.cmd),
+            "output_bytes": _output_bytes(self.cmd) if self.kind == "ffmpeg" else None,
+            "frames": self.frames,
+            "speed": self.speed,
+            "out_time": self.out_time,
+            "threads": self.threads,
+            "returncode": self.returncode,
+            "status": status,
+        }
+        if self.rusage is not None:
+            record["cpu_user_s"] = round(self.rusage.ru_utime, 4)
+            record["cpu_sys_s"] = round(self.rusage.ru_stime, 4)
+            # Linux 上单位是 KB，macOS 上是字节
+            scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+            record["max_rss_mb"] = round(self.rusage.ru_maxrss / scale, 2)
+        _append(record)
+
+
+def _rotate(path):
+    for i in range(BACKUPS, 0, -1):
+        src = path if i == 1 else f"{path}.{i - 1}"
+        dst = f"{path}.{i}"
+        try:
+            os.replace(src, dst)
+        except OSError:
+            pass
+    if BACKUPS <= 0:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _append(record):
+    """追加一行；写日志失败不影响节点本身。"""
+    line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+    path = log_path()
+    with _lock:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if MAX_BYTES > 0 and os.path.exists(path) and os.path.getsize(path) >= MAX_BYTES:
+                _rotate(path)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError:
+            pass
+
+
+# ----------------- 汇总 -----------------
+
+def log_files(path=None):
+    """当前日志 + 轮转出来的旧日志（从旧到新）。"""
+    path = path or log_path()
+    files = [f"{path}.{i}" for i in range(BACKUPS, 0, -1)] + [path]
+    return [f for f in files if os.path.isfile(f)]
+
+
+def load_records(path=None, since_hours=0.0):
+    cutoff = time.time() - since_hours * 3600 if since_hours and since_hours > 0 else None
+    records = []
+    for name in log_files(path):
+        with open(name, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                try:
+                    r = json.loads(line)
+                except ValueError:
+                    continue
+                if cutoff is not None and (r.get("ts") or 0) < cutoff:
+                    continue
+                records.append(r)
+    return records
+
+
+def _percentile(values, q):
+    """线性插值百分位（与 numpy 默认一致）；空列表返回 None。"""
+    if not values:
+        return None
+    values = sorted(values)
+    pos = (len(values) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+def summarize(records, group_by=("node", "mode")):
+    """
+    按 group_by 分组，返回每组的调用数 / 失败数 / wall、CPU 的 p50 p95 和总小时数 / 中位 speed，
+    按总 wall 时间从大到小排序。
+    """
+    groups = {}
+    for r in records:
+        key = tuple(r.get(k) if r.get(k) is not None else "-" for k in group_by)
+        groups.setdefault(key, []).append(r)
+
+    rows = []
+    for key, items in groups.items():
+        wall = [r["wall_s"] for r in items if r.get("wall_s") is not None]
+        cpu = [
+            (r.get("cpu_user_s") or 0.0) + (r.get("cpu_sys_s") or 0.0)
+            for r in items
+            if r.get("cpu_user_s") is not None
+        ]
+        speed = [r["speed"] for r in items if r.get("speed")]
+        row = dict(zip(group_by, key))
+        row.update({
+            "calls": len(items),
+            "errors": sum(1 for r in items if r.get("status") not in ("ok", None)),
+            "wall_p50_s": _percentile(wall, 50),
+            "wall_p95_s": _percentile(wall, 95),
+            "wall_total_h": sum(wall) / 3600.0,
+            "cpu_p50_s": _percentile(cpu, 50),
+            "cpu_p95_s": _percentile(cpu, 95),
+            "cpu_total_h": sum(cpu) / 3600.0,
+            "speed_p50": _percentile(speed, 50),
+            "output_gb": sum(r.get("output_bytes") or 0 for r in items) / 1024 ** 3,
+        })
+        rows.append(row)
+    rows.sort(key=lambda row: row["wall_total_h"], reverse=True)
+    return rows
+
+
+def format_summary(rows, group_by=("node", "mode")):
+    """把 summarize() 的结果排成文本表格。"""
+    columns = list(group_by) + [
+        "calls", "errors", "wall_p50_s", "wall_p95_s", "wall_total_h",
+        "cpu_p50_s", "cpu_p95_s", "cpu_total_h", "speed_p50", "output_gb",
+    ]
+
+    def cell(value):
+        if value is None:
+            return "-"
+        if isinstance(value, float):
+            return f"{value:.3f}"
+        return str(value)
+
+    table = [columns] + [[cell(row.get(c)) for c in columns] for row in rows]
+    widths = [max(len(line[i]) for line in table) for i in range(len(columns))]
+    return "\n".join(
+        "  ".join(v.ljust(widths[i]) for i, v in enumerate(line)).rstrip() for line in table
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", default=None, help="metrics.jsonl path (default: %(default)s)")
+    parser.add_argument("--since-hours", type=float, default=0.0)
+    parser.add_argument("--group-by", default="node,mode", help="comma separated record fields")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    group_by = tuple(k.strip() for k in args.group_by.split(",") if k.strip()) or ("node",)
+    rows = summarize(load_records(args.log, args.since_hours), group_by)
+    if args.json:
+        print(json.dumps(rows, indent=2, ensure_ascii=False))
+    else:
+        print(format_summary(rows, group_by))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
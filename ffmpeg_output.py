@@ -0,0 +1,125 @@
+import json
+import os
+import threading
+
+# 共享的输出文件名分配器：prefix_00001.mp4 / cut_01.mp4 这类递增编号。
+# - 每个 (目录, 前缀, 扩展名) 维护一个进程内计数器，只在第一次使用时扫描一次目录；
+# - 计数器同时记录在 output/.ffmpeg_concat/counters.json 里，重启后无需再扫描整个目录；
+# - 用 O_CREAT | O_EXCL 原子地占位创建文件，多个进程 / 线程并发时也不会拿到同一个编号。
+
+# 与结果缓存、调用日志放在同一个隐藏子目录里，不混进用户的输出文件
+INDEX_DIRNAME = ".ffmpeg_concat"
+INDEX_FILENAME = "counters.json"
+
+_lock = threading.Lock()
+_counters = {}
+
+
+def _scan_max_index(directory, prefix, sep, ext):
+    """
+    扫描目录，找出已存在的最大编号（兼容各节点原来的解析方式）。
+    """
+    max_idx = 0
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                name = entry.name
+                if not name.startswith(prefix) or not name.endswith(ext):
+                    continue
+                middle = name[len(prefix):len(name) - len(ext)]
+                if sep:
+                    middle = middle.lstrip(sep)
+                if middle.isdigit():
+                    max_idx = max(max_idx, int(middle))
+    except FileNotFoundError:
+        os.makedirs(directory, exist_ok=True)
+    return max_idx
+
+
+def _index_key(prefix, sep, ext):
+    return f"{prefix}|{sep}|{ext}"
+
+
+def _index_path(directory):
+    return os.path.join(directory, INDEX_DIRNAME, INDEX_FILENAME)
+
+
+def _read_index(directory):
+    try:
+        with open(_index_path(directory), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_index(directory, key, value):
+    """
+    更新索引文件。索引只是「下一个编号」的提示，真正的唯一性由 O_EXCL 保证，
+    所以并发写覆盖或写入失败都不影响正确性。
+    """
+    index_path = _index_path(directory)
+    tmp = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    data = _read_index(directory)
+    if data.get(key, 0) >= value:
+        return
+    data[key] = value
+    try:
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, index_path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def allocate_output_path(directory, prefix, ext, digits=5, sep="_"):
+    """
+    分配一个新的输出路径 {prefix}{sep}{编号:0digits}{ext}，并立即创建一个空文件占位。
+
+    - 计数器命中时 O(1)，不再扫描目录；
+    - 编号被其他进程占用时自动顺延到下一个；
+    - 返回的文件已存在（0 字节），ffmpeg 使用 -y 直接覆盖即可。
+    """
+    directory = os.path.abspath(directory)
+    os.makedirs(directory, exist_ok=True)
+    key = (directory, prefix, sep, ext)
+    index_key = _index_key(prefix, sep, ext)
+
+    with _lock:
+        n = _counters.get(key)
+        if n is None:
+            hint = _read_index(directory).get(index_key)
+            if isinstance(hint, int) and hint > 0:
+                n = hint
+            else:
+                n = _scan_max_index(directory, prefix, sep, ext) + 1
+
+        while True:
+            path = os.path.join(directory, f"{prefix}{sep}{n:0{digits}d}{ext}")
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                n += 1
+                continue
+            os.close(fd)
+            break
+
+        _counters[key] = n + 1
+        _write_index(directory, index_key, n + 1)
+
+    return path
+
+
+def discard_output_path(path):
+    """
+    删除 allocate_output_path 创建的占位文件（仅在其仍为空文件时），用于失败后的清理。
+    """
+    try:
+        if os.path.getsize(path) == 0:
+            os.remove(path)
+    except OSError:
+        pass
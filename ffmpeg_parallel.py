@@ -0,0 +1,246 @@
+import contextvars
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+from .ffmpeg_probe import probe_keyframes, probe_media
+from .ffmpeg_runner import run_ffmpeg
+from .ffmpeg_scheduler import SCHEDULER
+
+# 并行执行多条相互独立的 ffmpeg 命令（例如 reencode 拼接时逐个片段归一化）：
+# - 每条命令本身就是一个子进程，这里只用线程池负责启动 / 等待，不需要进程池；
+# - 总线程预算 = 调度器（ffmpeg_scheduler）的线程预算，平均分给同时运行的任务（命令里的 -threads 由调用方按
+#   plan_jobs 的结果填写），避免过量订阅；
+# - 任一任务失败时取消其余任务并删除它们的输出，抛出最先发生的错误；
+# - 各任务的进度汇总到同一个 ComfyUI 进度条；
+# - encode_chunked：单个长输出按源关键帧切成 N 段并行编码，再流拷贝拼接（剪切 / 叠加用）。
+
+# 同时运行的 ffmpeg 数上限；0 表示自动（约每 4 个核一个任务）
+MAX_JOBS = int(os.environ.get("FFMPEG_CONCAT_MAX_JOBS", "0") or 0)
+
+# 自动模式下每个任务至少分到的线程数（x264 在 4 线程左右效率最高）
+_THREADS_PER_JOB = 4
+
+# 分段并行编码时每段的最短时长（秒），太短的段启动开销大于并行收益
+MIN_CHUNK_SECONDS = float(os.environ.get("FFMPEG_CONCAT_MIN_CHUNK_SECONDS", "10") or 10)
+
+
+def plan_jobs(n_tasks, requested=0):
+    """
+    决定并行度，返回 (jobs, threads_per_job)。
+    - requested > 0：使用指定的并行数；否则取 FFMPEG_CONCAT_MAX_JOBS 或按 CPU 数自动计算；
+    - jobs 不超过任务数和调度器的进程上限，threads_per_job = 线程预算 / jobs（至少 1）。
+    """
+    cpus = SCHEDULER.total_threads
+    if requested and requested > 0:
+        jobs = requested
+    elif MAX_JOBS > 0:
+        jobs = MAX_JOBS
+    else:
+        jobs = max(1, cpus // _THREADS_PER_JOB)
+    jobs = max(1, min(jobs, n_tasks, SCHEDULER.max_procs))
+    return jobs, max(1, cpus // jobs)
+
+
+class _ProgressAggregator:
+    """把多条命令的 out_time 汇总成一个进度条（按预计时长加权）。"""
+
+    def __init__(self, durations):
+        self._durations = [d if d and d > 0 else 0.0 for d in durations]
+        self._done = [0.0] * len(durations)
+        self._total = sum(self._durations)
+        self._lock = threading.Lock()
+        self._bar_total = 1000
+        self._bar = None
+        if self._total > 0:
+            try:
+                import comfy.utils
+                self._bar = comfy.utils.ProgressBar(self._bar_total)
+            except Exception:
+                self._bar = None
+
+    def callback(self, idx):
+        def _update(out_time):
+            if self._bar is None:
+                return
+            with self._lock:
+                self._done[idx] = min(out_time, self._durations[idx])
+                step = int(sum(self._done) / self._total * self._bar_total)
+                self._bar.update_absolute(min(step, self._bar_total), self._bar_total)
+        return _update
+
+
+def run_ffmpeg_parallel(cmds, jobs, durations=None, outputs=None, error_prefix="ffmpeg 执行失败"):
+    """
+    并行执行多条 ffmpeg 命令，最多 jobs 条同时运行，返回各命令的统计信息（与 cmds 顺序一致）。
+
+    - durations：各命令的预计输出时长，用于汇总进度；
+    - outputs：各命令失败 / 被取消时需要删除的输出文件列表；
+    - 任一命令失败（或 ComfyUI 中断）时，其余命令被终止，抛出最先发生的异常。
+    """
+    n = len(cmds)
+    durations = list(durations) if durations is not None else [None] * n
+    outputs = list(outputs) if outputs is not None else [()] * n
+    aggregator = _ProgressAggregator(durations)
+    cancel = threading.Event()
+
+    def _task(idx):
+        return run_ffmpeg(
+            cmds[idx],
+            duration=durations[idx],
+            outputs=outputs[idx],
+            error_prefix=error_prefix,
+            progress=aggregator.callback(idx),
+            cancel_event=cancel,
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs), thread_name_prefix="ffmpeg") as pool:
+        # 每个任务带上调用方的上下文（性能日志里的节点名 / 模式）
+        futures = [pool.submit(contextvars.copy_context().run, _task, i) for i in range(n)]
+        done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+
+        first_error = None
+        for f in done:
+            if f.exception() is not None:
+                first_error = f.exception()
+                break
+
+        if first_error is not None:
+            cancel.set()
+            for f in futures:
+                f.cancel()
+            wait(futures)
+            raise first_error
+
+    return [f.result() for f in futures]
+
+
+# ----------------- 分段并行编码 -----------------
+
+def keyframe_chunks(keyframes, start, end, chunks, tol=0.001):
+    """
+    把 [start, end) 按源关键帧切成最多 chunks 段，返回边界列表 [start, b1, ..., end]。
+    - 边界取离等分点最近的关键帧，每段不短于 MIN_CHUNK_SECONDS；
+    - 关键帧是 6 位小数，边界向后偏移 tol/2，保证每一帧只落在一个段里。
+    """
+    span = end - start
+    n = int(chunks)
+    if MIN_CHUNK_SECONDS > 0:
+        n = min(n, int(span // MIN_CHUNK_SECONDS))
+    n = max(1, n)
+    candidates = [k for k in keyframes if start + tol < k < end - tol]
+    bounds = [start]
+    for i in range(1, n):
+        target = start + span * i / n
+        k = min(
+            (k for k in candidates if k > bounds[-1] + MIN_CHUNK_SECONDS / 2),
+            key=lambda k: abs(k - target),
+            default=None,
+        )
+        if k is None or end - k < MIN_CHUNK_SECONDS / 2:
+            continue
+        bounds.append(k + tol / 2)
+    bounds.append(end)
+    return bounds
+
+
+def _verify_output(path, expected_duration, fps):
+    """
+    检查拼接结果：视频时长与预计一致（误差 1.5 帧内），帧数与预计一致（误差 1 帧内）。
+    """
+    info = probe_media(path)
+    if info is None or info["video"] is None:
+        return False
+    video = info["video"]
+    duration = video["duration"] or info["duration"]
+    frame_time = 1.0 / fps if fps else 0.05
+    if duration is None or abs(duration - expected_duration) > 1.5 * frame_time:
+        return False
+    if fps and video["nb_frames"] is not None:
+        expected_frames = int(round(expected_duration * fps))
+        if abs(video["nb_frames"] - expected_frames) > 1:
+            return False
+    return True
+
+
+def encode_chunked(
+    info,
+    start,
+    end,
+    build_video_cmd,
+    out_path,
+    jobs,
+    threads,
+    build_audio_cmd=None,
+    work_parent=None,
+    error_prefix="ffmpeg 执行失败",
+):
+    """
+    单个长输出的分段并行编码：
+    - 按 info（源视频探测结果）的关键帧把 [start, end) 切成最多 jobs 段；
+    - build_video_cmd(seg_start, seg_duration, threads, seg_path) 生成每段的纯视频编码命令
+      （各段编码参数完全一致），build_audio_cmd(audio_path) 生成整段音频命令（可为 None），
+      全部并行执行；
+    - 各段用 concat demuxer 流拷贝拼接，再和音频一起封装到 out_path；
+    - 检查输出的帧数 / 时长与单进程编码的预期一致。
+
+    返回 True 表示完成；段数不足 2、或校验不通过时返回 False（由调用方单进程重新编码）。
+    """
+    video = info["video"]
+    fps = video["r_fps"] if video["r_fps"] and video["r_fps"] == video["fps"] else None
+    tol = 0.5 / video["fps"] if video["fps"] else 0.001
+    offset = info.get("start_time") or 0.0
+    keyframes = [k - offset for k in probe_keyframes(info)]
+
+    bounds = keyframe_chunks(keyframes, start, end, jobs, tol)
+    if len(bounds) < 3:
+        return False
+
+    work_dir = tempfile.mkdtemp(prefix="chunked_", dir=work_parent)
+    try:
+        cmds, durations, outputs, segments = [], [], [], []
+        for i in range(len(bounds) - 1):
+            seg = os.path.join(work_dir, f"seg_{i:04d}.mp4")
+            seg_duration = bounds[i + 1] - bounds[i]
+            cmds.append(build_video_cmd(bounds[i], seg_duration, threads, seg))
+            durations.append(seg_duration)
+            outputs.append([seg])
+            segments.append(seg)
+
+        audio_path = None
+        if build_audio_cmd is not None:
+            audio_path = os.path.join(work_dir, "audio.mka")
+            audio_cmd = build_audio_cmd(audio_path)
+            if audio_cmd is None:
+                audio_path = None
+            else:
+                cmds.append(audio_cmd)
+                durations.append(None)
+                outputs.append([audio_path])
+
+        run_ffmpeg_parallel(
+            cmds,
+            min(len(cmds), jobs + (1 if audio_path else 0)),
+            durations=durations,
+            outputs=outputs,
+            error_prefix=error_prefix,
+        )
+
+        list_file = os.path.join(work_dir, "list.txt")
+        with open(list_file, "w", encoding="utf-8") as f:
+            for seg in segments:
+                f.write(f"file '{os.path.abspath(seg).replace(os.sep, '/')}'\n")
+
+        cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_file]
+        if audio_path:
+            cmd += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0?", "-c", "copy"]
+        else:
+            cmd += ["-map", "0:v:0", "-c", "copy", "-an"]
+        cmd.append(out_path)
+        run_ffmpeg(cmd, duration=end - start, error_prefix=error_prefix)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return _verify_output(out_path, end - start, fps)
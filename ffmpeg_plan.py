@@ -0,0 +1,500 @@
+import json
+import os
+
+from .ffmpeg_cache import file_fingerprint, lookup_result, make_cache_key, store_result
+from .ffmpeg_output import allocate_output_path, discard_output_path
+from .ffmpeg_encoders import (
+    audio_encoder_args,
+    clip_audio_filter,
+    delivery_pix_fmt_args,
+    silence_source,
+    video_encoder_args,
+)
+from .ffmpeg_probe import probe_media
+from .ffmpeg_runner import run_ffmpeg
+
+# 延迟执行的「渲染计划」：
+# - 剪切 / 叠加 / 拼接节点打开 lazy 后不编码，而是输出一个计划字符串（PLAN_PREFIX + JSON），
+#   沿原来的 STRING 端口传给下游；
+# - 计划是一棵图：source（输入文件）/ trim / overlay / concat，叶子记录文件大小和 mtime，
+#   输入文件变化时计划字符串随之变化，ComfyUI 缓存和结果缓存都能感知；
+# - 最终消费者（未开 lazy 的节点或 Render Plan 节点）把整条链编译成一个 filter_complex，
+#   只运行一次 ffmpeg：每个源只解码一次、输出只编码一次，没有中间文件；
+# - 只能读文件的节点（读帧 / 分段 / 多段剪切）用 render_input 先把计划渲染成文件；
+#   lazy 节点的 VIDEO 输出为 None，需要 VIDEO 的下游请先接 Render Plan。
+
+PLAN_PREFIX = "ffmpeg-plan:"
+PLAN_VERSION = 1
+
+
+def is_plan(value):
+    """value 是否是渲染计划字符串（而不是普通路径）。"""
+    return isinstance(value, str) and value.startswith(PLAN_PREFIX)
+
+
+def make_plan(graph, encoder_profile="default", node_default="balanced", fmt="mp4"):
+    """把计划图和编码设置序列化成计划字符串（同样的输入总是得到同样的字符串）。"""
+    plan = {
+        "version": PLAN_VERSION,
+        "graph": graph,
+        "encoder_profile": encoder_profile,
+        "node_default": node_default,
+        "format": fmt,
+    }
+    return PLAN_PREFIX + json.dumps(plan, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_plan(value):
+    """解析计划字符串，返回 dict。"""
+    try:
+        plan = json.loads(value[len(PLAN_PREFIX):])
+    except ValueError as e:
+        raise ValueError(f"无法解析渲染计划: {e}") from e
+    if not isinstance(plan, dict) or plan.get("version") != PLAN_VERSION:
+        raise ValueError("渲染计划版本不受支持，请重新运行上游节点。")
+    return plan
+
+
+# ----------------- 计划图节点 -----------------
+
+def source_node(path):
+    fp = file_fingerprint(path, hash_mode="none")
+    return {
+        "op": "source",
+        "path": fp["path"],
+        "size": fp.get("size"),
+        "mtime_ns": fp.get("mtime_ns"),
+    }
+
+
+def plan_input(value, label="视频"):
+    """
+    节点输入 -> 计划图节点：计划字符串取出其中的图，普通路径包装成 source。
+    """
+    if is_plan(value):
+        return load_plan(value)["graph"]
+    path = str(value).strip() if value is not None else ""
+    if not path or not os.path.exists(path):
+        raise FileNotFoundError(f"{label}文件不存在: {path}")
+    return source_node(path)
+
+
+def trim_node(src, start, duration, audio=True):
+    """从 start 秒起取 duration 秒（<= 0 表示到结尾）；audio=False 时丢弃音频。"""
+    return {
+        "op": "trim",
+        "input": src,
+        "start": round(float(start), 6),
+        "duration": round(float(duration), 6),
+        "audio": bool(audio),
+    }
+
+
+def overlay_node(bg, layers, shortest=True, audio="background", external_audio=None):
+    """
+    layers：[{"input", "x", "y", "width", "height"}]，依次叠加到 bg 上；
+    width / height 为 0 保持原尺寸。audio：background / foreground / mix / none。
+    """
+    return {
+        "op": "overlay",
+        "bg": bg,
+        "layers": [
+            {
+                "input": layer["input"],
+                "x": int(layer.get("x", 0)),
+                "y": int(layer.get("y", 0)),
+                "width": int(layer.get("width", 0)),
+                "height": int(layer.get("height", 0)),
+            }
+            for layer in layers
+        ],
+        "shortest": bool(shortest),
+        "audio": audio,
+        "external_audio": os.path.abspath(external_audio) if external_audio else None,
+    }
+
+
+def concat_node(
+    inputs, width=0, height=0, fps=0, external_audio=None, use_shortest=True, clip_audio=False
+):
+    """
+    按顺序拼接，统一分辨率 / 帧率（0 表示以第一个输入为准）。
+    clip_audio：没有外接音频时保留片段自身的音频（统一格式，没有音轨的片段补静音）。
+    """
+    return {
+        "op": "concat",
+        "inputs": list(inputs),
+        "width": int(width or 0),
+        "height": int(height or 0),
+        "fps": int(fps or 0),
+        "external_audio": os.path.abspath(external_audio) if external_audio else None,
+        "use_shortest": bool(use_shortest),
+        "clip_audio": bool(clip_audio),
+    }
+
+
+def _children(graph):
+    op = graph["op"]
+    if op == "trim":
+        return [graph["input"]]
+    if op == "overlay":
+        return [graph["bg"]] + [layer["input"] for layer in graph["layers"]]
+    if op == "concat":
+        return list(graph["inputs"])
+    return []
+
+
+def plan_sources(graph):
+    """计划用到的全部输入文件（含外接音频），用于结果缓存的输入指纹。"""
+    paths = []
+    if graph["op"] == "source":
+        paths.append(graph["path"])
+    if graph.get("external_audio"):
+        paths.append(graph["external_audio"])
+    for child in _children(graph):
+        paths.extend(plan_sources(child))
+    return paths
+
+
+# ----------------- 推算输出属性 -----------------
+
+def _has_audio(path):
+    info = probe_media(path)
+    return info is not None and info["audio"] is not None
+
+
+def describe(graph):
+    """
+    只用探测信息推算图节点输出的 {duration, fps, width, height, audio}，不运行 ffmpeg。
+    duration 未知时为 None。
+    """
+    op = graph["op"]
+
+    if op == "source":
+        info = probe_media(graph["path"])
+        if info is None or info["video"] is None:
+            raise RuntimeError(f"无法读取视频信息: {graph['path']}")
+        video = info["video"]
+        return {
+            "duration": video["duration"] or info["duration"],
+            "fps": video["r_fps"] or video["fps"],
+            "width": video["width"],
+            "height": video["height"],
+            "audio": info["audio"] is not None,
+        }
+
+    if op == "trim":
+        d = describe(graph["input"])
+        remain = None
+        if d["duration"] is not None:
+            remain = max(0.0, d["duration"] - graph["start"])
+        if graph["duration"] > 0:
+            remain = graph["duration"] if remain is None else min(graph["duration"], remain)
+        return dict(d, duration=remain, audio=d["audio"] and graph["audio"])
+
+    if op == "overlay":
+        bg = describe(graph["bg"])
+        layers = [describe(layer["input"]) for layer in graph["layers"]]
+        duration = bg["duration"]
+        if graph["shortest"]:
+            known = [x["duration"] for x in [bg] + layers if x["duration"]]
+            duration = min(known) if known else None
+        if graph["external_audio"]:
+            audio = _has_audio(graph["external_audio"])
+        elif graph["audio"] == "background":
+            audio = bg["audio"]
+        elif graph["audio"] == "foreground":
+            audio = bool(layers) and layers[0]["audio"]
+        elif graph["audio"] == "mix":
+            audio = any(x["audio"] for x in [bg] + layers)
+        else:
+            audio = False
+        return dict(bg, duration=duration, audio=audio)
+
+    if op == "concat":
+        parts = [describe(child) for child in graph["inputs"]]
+        first = parts[0]
+        if graph["width"] > 0 and graph["height"] > 0:
+            width, height = graph["width"], graph["height"]
+        else:
+            width, height = first["width"] or 1920, first["height"] or 1080
+        if graph["fps"] > 0:
+            fps = graph["fps"]
+        else:
+            fps = max(1, int(round(first["fps"]))) if first["fps"] else 30
+        durations = [p["duration"] for p in parts]
+        duration = sum(durations) if all(durations) else None
+        if graph["external_audio"]:
+            audio = _has_audio(graph["external_audio"])
+        else:
+            audio = graph.get("clip_audio", False) and any(p["audio"] for p in parts)
+        if audio and graph["external_audio"] and graph["use_shortest"] and duration is not None:
+            info = probe_media(graph["external_audio"])
+            if info is not None and info["duration"]:
+                duration = min(duration, info["duration"])
+        return {"duration": duration, "fps": fps, "width": width, "height": height, "audio": audio}
+
+    raise ValueError(f"未知的计划节点: {op}")
+
+
+# ----------------- 编译成一条 ffmpeg 命令 -----------------
+
+def _pad(ref):
+    """输入流（如 0:v:0）原样作为 -map 参数；滤镜输出标签加方括号。"""
+    return ref if ":" in ref else f"[{ref}]"
+
+
+class _Compiler:
+    """
+    把计划图编译成 ffmpeg 输入列表 + filter_complex。
+    每个节点编译成 (视频引用, 音频引用或 None)：引用是输入流（"3:v:0"）或滤镜标签（"v7"）。
+    want_audio=False 时不生成音频滤镜（filter_complex 里不能留下未使用的输出）。
+    """
+
+    def __init__(self):
+        self.inputs = []
+        self.filters = []
+        self.infos = []
+        self._labels = 0
+
+    def _label(self, prefix):
+        self._labels += 1
+        return f"{prefix}{self._labels}"
+
+    def _add_input(self, path, args=()):
+        self.inputs.append(list(args) + ["-i", path])
+        return len(self.inputs) - 1
+
+    def _source(self, graph, args=()):
+        path = graph["path"]
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"视频文件不存在: {path}")
+        info = probe_media(path)
+        self.infos.append(info)
+        idx = self._add_input(path, args)
+        audio = f"{idx}:a:0" if info is not None and info["audio"] is not None else None
+        return f"{idx}:v:0", audio
+
+    def _external_audio(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"外接音频文件不存在: {path}")
+        idx = self._add_input(path)
+        return f"{idx}:a:0" if _has_audio(path) else None
+
+    def build(self, graph, want_audio=True):
+        op = graph["op"]
+        if op == "source":
+            v, a = self._source(graph)
+        elif op == "trim":
+            v, a = self._trim(graph, want_audio)
+        elif op == "overlay":
+            v, a = self._overlay(graph, want_audio)
+        elif op == "concat":
+            v, a = self._concat(graph, want_audio)
+        else:
+            raise ValueError(f"未知的计划节点: {op}")
+        return v, (a if want_audio else None)
+
+    def _trim(self, graph, want_audio):
+        start, duration = graph["start"], graph["duration"]
+        if graph["input"]["op"] == "source":
+            # 直接剪源文件：用输入端 -ss / -t，只解码需要的部分
+            args = []
+            if start > 0:
+                args += ["-ss", f"{start}"]
+            if duration > 0:
+                args += ["-t", f"{duration}"]
+            v, a = self._source(graph["input"], args)
+        else:
+            v, a = self.build(graph["input"], want_audio and graph["audio"])
+            opts = f"start={start}" + (f":duration={duration}" if duration > 0 else "")
+            out_v = self._label("v")
+            self.filters.append(f"[{v}]trim={opts},setpts=PTS-STARTPTS[{out_v}]")
+            v = out_v
+            if a is not None and graph["audio"]:
+                out_a = self._label("a")
+                self.filters.append(f"[{a}]atrim={opts},asetpts=PTS-STARTPTS[{out_a}]")
+                a = out_a
+        return v, (a if graph["audio"] else None)
+
+    def _overlay(self, graph, want_audio):
+        mode = graph["audio"] if want_audio and not graph["external_audio"] else "none"
+        v, bg_a = self.build(graph["bg"], mode in ("background", "mix"))
+        if graph["shortest"]:
+            end_opt = ":shortest=1"
+        else:
+            end_opt = ":eof_action=pass"
+
+        layer_audio = []
+        for i, layer in enumerate(graph["layers"]):
+            fg_v, fg_a = self.build(
+                layer["input"], mode == "mix" or (mode == "foreground" and i == 0)
+            )
+            layer_audio.append(fg_a)
+            w, h = layer["width"], layer["height"]
+            if w > 0 or h > 0:
+                scaled = self._label("fg")
+                self.filters.append(
+                    f"[{fg_v}]scale={w if w > 0 else -2}:{h if h > 0 else -2}[{scaled}]"
+                )
+                fg_v = scaled
+            out_v = self._label("v")
+            self.filters.append(
+                f"[{v}][{fg_v}]overlay={layer['x']}:{layer['y']}{end_opt}[{out_v}]"
+            )
+            v = out_v
+
+        if graph["external_audio"] and want_audio:
+            return v, self._external_audio(graph["external_audio"])
+        if mode == "background":
+            return v, bg_a
+        if mode == "foreground":
+            return v, layer_audio[0] if layer_audio else None
+        if mode == "mix":
+            sources = [a for a in [bg_a] + layer_audio if a is not None]
+            if len(sources) <= 1:
+                return v, sources[0] if sources else None
+            out_a = self._label("a")
+            labels = "".join(f"[{a}]" for a in sources)
+            self.filters.append(f"{labels}amix=inputs={len(sources)}:normalize=0[{out_a}]")
+            return v, out_a
+        return v, None
+
+    def _concat(self, graph, want_audio):
+        target = describe(graph)
+        w, h, fps = target["width"], target["height"], target["fps"]
+        # 片段音频和画面在同一个 concat 里拼接
+        clip_audio = want_audio and not graph["external_audio"] and target["audio"]
+        parts = []
+        for child in graph["inputs"]:
+            child_v, child_a = self.build(child, clip_audio)
+            out_v = self._label("c")
+            self.filters.append(
+                f"[{child_v}]"
+                f"scale={w}:{h}:force_original_aspect_ratio=decrease,"
+                f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,"
+                f"setsar=1,"
+                f"fps={fps}"
+                f"[{out_v}]"
+            )
+            parts.append(f"[{out_v}]")
+            if clip_audio:
+                duration = describe(child)["duration"]
+                out_a = self._label("c")
+                if child_a is not None:
+                    self.filters.append(f"[{child_a}]{clip_audio_filter(duration)}[{out_a}]")
+                else:
+                    self.filters.append(f"{silence_source(duration)}[{out_a}]")
+                parts.append(f"[{out_a}]")
+        v = self._label("v")
+        if clip_audio:
+            a = self._label("a")
+            self.filters.append(
+                "".join(parts) + f"concat=n={len(graph['inputs'])}:v=1:a=1[{v}][{a}]"
+            )
+            return v, a
+        self.filters.append(
+            "".join(parts) + f"concat=n={len(parts)}:v=1:a=0[{v}]"
+        )
+
+        a = None
+        if graph["external_audio"] and want_audio:
+            a = self._external_audio(graph["external_audio"])
+            # use_shortest：外接音频截到视频长度（相当于 -shortest，但在图内完成）
+            if a is not None and graph["use_shortest"]:
+                video_duration = sum(describe(child)["duration"] or 0.0 for child in graph["inputs"])
+                if video_duration > 0:
+                    out_a = self._label("a")
+                    self.filters.append(f"[{a}]atrim=duration={video_duration:.6f}[{out_a}]")
+                    a = out_a
+        return v, a
+
+
+def compile_plan(plan, output_path, encoder_profile=None):
+    """
+    把计划编译成一条 ffmpeg 命令，返回 (cmd, 预计时长)。
+    encoder_profile 为 None 时使用计划里记录的档位。
+    """
+    graph = plan["graph"]
+    profile = encoder_profile or plan.get("encoder_profile", "default")
+    node_default = plan.get("node_default", "balanced")
+
+    compiler = _Compiler()
+    v, a = compiler.build(graph)
+
+    cmd = ["ffmpeg", "-y"]
+    for args in compiler.inputs:
+        cmd += args
+    if compiler.filters:
+        cmd += ["-filter_complex", ";".join(compiler.filters)]
+    cmd += ["-map", _pad(v)]
+    if a is not None:
+        cmd += ["-map", _pad(a)]
+    else:
+        cmd += ["-an"]
+
+    fmt = os.path.splitext(output_path)[1].lstrip(".").lower()
+    cmd += video_encoder_args(profile, fmt, node_default)
+    cmd += delivery_pix_fmt_args(compiler.infos)
+    if a is not None:
+        cmd += audio_encoder_args(profile, fmt, node_default)
+    cmd.append(output_path)
+
+    return cmd, describe(graph)["duration"]
+
+
+def execute_plan(
+    plan,
+    output_dir,
+    cache_name,
+    next_output_path,
+    use_cache=True,
+    encoder_profile=None,
+    error_prefix="ffmpeg 渲染失败",
+):
+    """
+    渲染计划（带结果缓存），返回输出路径。
+    next_output_path() 只在真正需要编码时调用，缓存命中时不会生成新的编号文件。
+    """
+    if isinstance(plan, str):
+        plan = load_plan(plan)
+
+    cache_key = None
+    if use_cache:
+        cache_key = make_cache_key(
+            cache_name,
+            {"plan": plan, "encoder_profile": encoder_profile},
+            plan_sources(plan["graph"]),
+        )
+        cached = lookup_result(output_dir, cache_key)
+        if cached is not None:
+            return cached
+
+    output_path = next_output_path()
+    try:
+        cmd, duration = compile_plan(plan, output_path, encoder_profile)
+        run_ffmpeg(cmd, duration=duration, outputs=[output_path], error_prefix=error_prefix)
+    except BaseException:
+        # 编译失败（如输入文件不存在）时删除编号占位文件
+        discard_output_path(output_path)
+        raise
+
+    if cache_key is not None:
+        store_result(output_dir, cache_key, output_path)
+    return output_path
+
+
+def render_input(value, output_dir, cache_name, filename_prefix="render"):
+    """
+    只能读文件的节点的输入：渲染计划先渲染成文件（带结果缓存）再返回路径，普通路径原样返回。
+    """
+    if not is_plan(value):
+        return value
+    plan = load_plan(value)
+    fmt = plan.get("format") or "mp4"
+    return execute_plan(
+        plan,
+        output_dir,
+        cache_name,
+        lambda: allocate_output_path(output_dir, filename_prefix, f".{fmt}", digits=5, sep="_"),
+    )
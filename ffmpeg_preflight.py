@@ -0,0 +1,213 @@
+import os
+from collections import Counter
+
+from .ffmpeg_probe import probe_media
+
+# 流拷贝拼接（concat demuxer + -c copy）前的兼容性预检：
+# - 比较所有输入的编码 / profile / level / extradata / pix_fmt / 分辨率 / SAR / 帧率，
+#   以及音频的编码 / 采样率 / 声道 / 采样格式 / extradata；
+# - 以多数派为参考，给每个片段一个处理方式：
+#     copy（直接拷贝）/ remux（只有容器或 time_base 不同，换封装即可）/
+#     reencode（必须重编码）/ unreadable（无法探测）；
+# - 返回结构化报告，供 fast / auto 拼接和 Concat Preflight 节点使用。
+
+# 不一致时必须重编码的视频字段
+VIDEO_FIELDS = (
+    "codec", "profile", "level", "width", "height", "sar",
+    "pix_fmt", "r_frame_rate", "extradata_hash",
+)
+
+# 不一致时必须重编码的音频字段
+AUDIO_FIELDS = (
+    "codec", "profile", "sample_rate", "channels",
+    "channel_layout", "sample_fmt", "extradata_hash",
+)
+
+# 可以在 remux 时设置 track timescale 的容器
+_TIMESCALE_EXTS = ("mp4", "mov", "m4v")
+
+
+def clip_spec(info):
+    """从 probe_media 结果中取出拼接兼容性相关的规格。"""
+    video = info["video"]
+    audio = info["audio"]
+    v_spec = {k: video.get(k) for k in VIDEO_FIELDS}
+    if v_spec["sar"] in (None, "0:1", "N/A"):
+        v_spec["sar"] = "1:1"
+    v_spec["time_base"] = video.get("time_base")
+    a_spec = None
+    if audio is not None:
+        a_spec = {k: audio.get(k) for k in AUDIO_FIELDS}
+    return {
+        "container": info.get("format_name"),
+        "video": v_spec,
+        "audio": a_spec,
+    }
+
+
+def _issue(stream, field, value, expected, fix):
+    return {"stream": stream, "field": field, "value": value, "expected": expected, "fix": fix}
+
+
+def compare_specs(spec, ref):
+    """
+    比较一个片段与参考规格，返回问题列表：
+    [{"stream", "field", "value", "expected", "fix": "remux" | "reencode"}]
+    """
+    issues = []
+    container_differs = spec["container"] != ref["container"]
+    if container_differs:
+        issues.append(_issue("format", "container", spec["container"], ref["container"], "remux"))
+
+    v, rv = spec["video"], ref["video"]
+    for field in VIDEO_FIELDS:
+        if v.get(field) == rv.get(field):
+            continue
+        fix = "reencode"
+        # 一方没有 extradata（如 MPEG-TS 的参数集在码流里）：换封装后再比较
+        if field == "extradata_hash" and container_differs and (
+            v.get(field) is None or rv.get(field) is None
+        ):
+            fix = "remux"
+        issues.append(_issue("video", field, v.get(field), rv.get(field), fix))
+    if v.get("time_base") != rv.get("time_base"):
+        issues.append(_issue("video", "time_base", v.get("time_base"), rv.get("time_base"), "remux"))
+
+    a, ra = spec["audio"], ref["audio"]
+    if (a is None) != (ra is None):
+        issues.append(_issue(
+            "audio", "present", a is not None, ra is not None, "reencode",
+        ))
+    elif a is not None:
+        for field in AUDIO_FIELDS:
+            if a.get(field) != ra.get(field):
+                issues.append(_issue("audio", field, a.get(field), ra.get(field), "reencode"))
+    return issues
+
+
+def _copy_key(spec):
+    """决定多数派用的键（remux 能解决的字段不参与）。"""
+    v_key = tuple(spec["video"].get(k) for k in VIDEO_FIELDS)
+    a = spec["audio"]
+    a_key = None if a is None else tuple(a.get(k) for k in AUDIO_FIELDS)
+    return (v_key, a_key)
+
+
+def analyze_concat(videos, infos=None, overrides=None):
+    """
+    预检一组待拼接的视频，返回报告：
+      {
+        "compatible": 是否可以不重编码完成拼接（可能需要 remux），
+        "strategy": "copy" / "remux" / "reencode"，
+        "reference": {"index", "path", "container", "video", "audio"} 或 None，
+        "clips": [{"index", "path", "action", "issues"}],
+        "counts": {"copy", "remux", "reencode", "unreadable"},
+      }
+    infos：已有的 probe_media 结果（可选）；
+    overrides：覆盖参考规格的视频字段（如 auto 模式用户指定的 width / height / r_frame_rate）。
+    """
+    if infos is None:
+        infos = [probe_media(v) for v in videos]
+
+    specs = [
+        clip_spec(info) if info is not None and info["video"] is not None else None
+        for info in infos
+    ]
+    readable = [i for i, spec in enumerate(specs) if spec is not None]
+
+    reference = None
+    if readable:
+        # 多数派规格；票数相同时以先出现的为准
+        keys = {i: _copy_key(specs[i]) for i in readable}
+        counts = Counter(keys.values())
+        best = max(counts.values())
+        ref_idx = next(i for i in readable if counts[keys[i]] == best)
+        ref_spec = specs[ref_idx]
+        reference = {
+            "index": ref_idx,
+            "path": videos[ref_idx],
+            "container": ref_spec["container"],
+            "video": dict(ref_spec["video"], **(overrides or {})),
+            "audio": ref_spec["audio"],
+        }
+
+    clips = []
+    for i, path in enumerate(videos):
+        if specs[i] is None:
+            clips.append({"index": i, "path": path, "action": "unreadable", "issues": []})
+            continue
+        issues = compare_specs(specs[i], reference)
+        if any(issue["fix"] == "reencode" for issue in issues):
+            action = "reencode"
+        elif issues:
+            action = "remux"
+        else:
+            action = "copy"
+        clips.append({"index": i, "path": path, "action": action, "issues": issues})
+
+    counts = Counter(c["action"] for c in clips)
+    counts = {k: counts.get(k, 0) for k in ("copy", "remux", "reencode", "unreadable")}
+    if counts["reencode"]:
+        strategy = "reencode"
+    elif counts["remux"]:
+        strategy = "remux"
+    else:
+        strategy = "copy"
+
+    return {
+        "compatible": strategy != "reencode" and not counts["unreadable"],
+        "strategy": strategy,
+        "reference": reference,
+        "clips": clips,
+        "counts": counts,
+    }
+
+
+def remux_target_ext(reference):
+    """remux 输出的扩展名：与参考片段相同的容器。"""
+    ext = os.path.splitext(reference["path"])[1].lstrip(".").lower()
+    return ext or "mp4"
+
+
+def build_remux_cmd(src, reference, output_path):
+    """
+    只换封装：流拷贝到参考片段的容器，mp4 / mov 同时对齐视频 track timescale。
+    """
+    cmd = ["ffmpeg", "-y", "-i", src, "-map", "0:v:0"]
+    if reference["audio"] is not None:
+        cmd += ["-map", "0:a:0"]
+    else:
+        cmd += ["-an"]
+    cmd += ["-c", "copy"]
+
+    ext = os.path.splitext(output_path)[1].lstrip(".").lower()
+    tb = reference["video"].get("time_base") or ""
+    if ext in _TIMESCALE_EXTS and "/" in tb:
+        den = tb.split("/", 1)[1]
+        if den.isdigit():
+            cmd += ["-video_track_timescale", den]
+    cmd.append(output_path)
+    return cmd
+
+
+def format_report(report):
+    """报告的文字版（用于报错信息）。"""
+    lines = []
+    counts = report["counts"]
+    lines.append(
+        f"strategy={report['strategy']}  copy={counts['copy']}  remux={counts['remux']}  "
+        f"reencode={counts['reencode']}  unreadable={counts['unreadable']}"
+    )
+    ref = report["reference"]
+    if ref is not None:
+        lines.append(f"参考片段: #{ref['index']} {ref['path']}")
+    for clip in report["clips"]:
+        if clip["action"] == "copy":
+            continue
+        lines.append(f"#{clip['index']} {clip['action']}: {clip['path']}")
+        for issue in clip["issues"]:
+            lines.append(
+                f"    {issue['stream']}.{issue['field']}: {issue['value']} "
+                f"(参考 {issue['expected']}) -> {issue['fix']}"
+            )
+    return "\n".join(lines)
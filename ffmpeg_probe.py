@@ -0,0 +1,326 @@
+import json
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+
+from .ffmpeg_metrics import CallRecord
+
+# 所有节点共用的 ffprobe 探测层：
+# - 每个文件只跑一次 JSON 格式的 ffprobe，拿到流 / 容器信息（只读文件头，不扫描数据包）；
+# - 关键帧列表单独按需扫描（probe_keyframes），只有 copy / smart 剪切、分段并行、分割节点才用到；
+# - 结果按 (绝对路径, 文件大小, mtime) 缓存在进程内 LRU 中；
+# - 可选写入旁路文件 <video>.ffprobe.json，ComfyUI 重启后仍可复用。
+
+# 进程内 LRU 容量（条目数）
+PROBE_CACHE_SIZE = int(os.environ.get("FFMPEG_CONCAT_PROBE_CACHE_SIZE", "512") or 512)
+
+# 是否启用磁盘旁路缓存（默认关闭，避免在用户素材目录里写文件）
+PROBE_SIDECAR = os.environ.get("FFMPEG_CONCAT_PROBE_SIDECAR", "").strip().lower() in (
+    "1", "true", "yes", "on",
+)
+SIDECAR_SUFFIX = ".ffprobe.json"
+
+# 探测结果结构变化时递增，旧的旁路文件会自动失效
+_PROBE_VERSION = 4
+
+_lock = threading.Lock()
+_cache = OrderedDict()
+
+
+def _file_key(path):
+    """
+    缓存键：(绝对路径, 文件大小, mtime_ns)。文件被覆盖或修改后自动失效。
+    """
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+def _to_float(value):
+    try:
+        f = float(value)
+    except (TypeError, ValueError):
+        return None
+    if f != f:  # NaN
+        return None
+    return f
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_rate(text):
+    """
+    解析 "30000/1001" / "25/1" / "25" 形式的帧率，无效时返回 None。
+    """
+    if not text:
+        return None
+    text = str(text).strip()
+    if "/" in text:
+        num_str, den_str = text.split("/", 1)
+        num = _to_float(num_str)
+        den = _to_float(den_str)
+        if not num or not den or num <= 0 or den <= 0:
+            return None
+        return num / den
+    f = _to_float(text)
+    if f is None or f <= 0:
+        return None
+    return f
+
+
+def _run_ffprobe(path):
+    """
+    一次 ffprobe 调用拿到 format + 全部 streams（含 extradata 哈希）。
+    """
+    return _ffprobe_json([
+        "ffprobe",
+        "-v", "error",
+        "-show_data_hash", "CRC32",
+        "-show_format",
+        "-show_streams",
+        "-of", "json",
+        path,
+    ])
+
+
+def _run_keyframe_scan(path):
+    """
+    只读第一路视频流、只解码关键帧，列出关键帧时间。
+    """
+    return _ffprobe_json([
+        "ffprobe",
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-skip_frame", "nokey",
+        "-show_entries", "frame=pts_time,best_effort_timestamp_time",
+        "-of", "json",
+        path,
+    ])
+
+
+def _ffprobe_json(cmd):
+    with CallRecord(cmd, kind="ffprobe") as call:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        with proc.stdout:
+            out = proc.stdout.read()
+        if call.wait(proc) != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd)
+    return json.loads(out.decode("utf-8", errors="ignore") or "{}")
+
+
+def _pick_stream(streams, codec_type):
+    for s in streams:
+        if s.get("codec_type") != codec_type:
+            continue
+        # 跳过 mp3/m4a 里的封面图
+        if (s.get("disposition") or {}).get("attached_pic"):
+            continue
+        return s
+    return None
+
+
+def _normalize(raw, key):
+    streams = raw.get("streams") or []
+    fmt = raw.get("format") or {}
+
+    video = None
+    v = _pick_stream(streams, "video")
+    if v is not None:
+        r_fps = parse_rate(v.get("r_frame_rate"))
+        avg_fps = parse_rate(v.get("avg_frame_rate"))
+        video = {
+            "index": _to_int(v.get("index")),
+            "codec": v.get("codec_name"),
+            "profile": v.get("profile"),
+            "level": _to_int(v.get("level")),
+            "codec_tag": v.get("codec_tag_string"),
+            # 编码器私有数据（H.264 的 SPS / PPS 等），不同时不能直接流拷贝拼接
+            "extradata_hash": v.get("extradata_hash"),
+            "width": _to_int(v.get("width")) or 0,
+            "height": _to_int(v.get("height")) or 0,
+            "sar": v.get("sample_aspect_ratio") or "1:1",
+            "pix_fmt": v.get("pix_fmt"),
+            "time_base": v.get("time_base"),
+            "r_frame_rate": v.get("r_frame_rate"),
+            "avg_frame_rate": v.get("avg_frame_rate"),
+            "r_fps": r_fps,
+            "fps": avg_fps or r_fps,
+            "duration": _to_float(v.get("duration")),
+            "nb_frames": _to_int(v.get("nb_frames")),
+        }
+
+    audio = None
+    a = _pick_stream(streams, "audio")
+    if a is not None:
+        audio = {
+            "index": _to_int(a.get("index")),
+            "codec": a.get("codec_name"),
+            "profile": a.get("profile"),
+            "sample_rate": _to_int(a.get("sample_rate")),
+            "channels": _to_int(a.get("channels")),
+            "channel_layout": a.get("channel_layout"),
+            "sample_fmt": a.get("sample_fmt"),
+            "extradata_hash": a.get("extradata_hash"),
+            "time_base": a.get("time_base"),
+            "bit_rate": _to_int(a.get("bit_rate")),
+            "duration": _to_float(a.get("duration")),
+        }
+
+    duration = _to_float(fmt.get("duration"))
+    if duration is None and video is not None:
+        duration = video["duration"]
+    if duration is None and audio is not None:
+        duration = audio["duration"]
+
+    return {
+        "path": key[0],
+        "size": key[1],
+        "mtime_ns": key[2],
+        "format_name": fmt.get("format_name"),
+        "duration": duration,
+        "start_time": _to_float(fmt.get("start_time")) or 0.0,
+        "bit_rate": _to_int(fmt.get("bit_rate")),
+        "tags": fmt.get("tags") or {},
+        "video": video,
+        "audio": audio,
+        "streams": streams,
+    }
+
+
+def _sidecar_path(path):
+    return path + SIDECAR_SUFFIX
+
+
+def _load_sidecar(path, key):
+    try:
+        with open(_sidecar_path(path), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (
+        data.get("version") != _PROBE_VERSION
+        or data.get("size") != key[1]
+        or data.get("mtime_ns") != key[2]
+    ):
+        return None
+    info = data.get("info")
+    return info if isinstance(info, dict) else None
+
+
+def _save_sidecar(path, key, info):
+    sidecar = _sidecar_path(path)
+    tmp = f"{sidecar}.{os.getpid()}.tmp"
+    data = {
+        "version": _PROBE_VERSION,
+        "size": key[1],
+        "mtime_ns": key[2],
+        "info": info,
+    }
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, sidecar)
+    except OSError:
+        # 只读目录等情况：旁路缓存写不进去不影响主流程
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def _cache_get(key):
+    with _lock:
+        info = _cache.get(key)
+        if info is not None:
+            _cache.move_to_end(key)
+        return info
+
+
+def _cache_put(key, info):
+    with _lock:
+        _cache[key] = info
+        _cache.move_to_end(key)
+        while len(_cache) > max(1, PROBE_CACHE_SIZE):
+            _cache.popitem(last=False)
+
+
+def probe_media(path):
+    """
+    探测媒体文件，返回归一化后的信息字典；文件不存在或 ffprobe 失败时返回 None。
+
+    返回字典（请勿修改，内容在各节点间共享）：
+      path / size / mtime_ns / format_name / duration / start_time / bit_rate / tags
+      video: {codec, profile, level, codec_tag, extradata_hash, width, height, sar, pix_fmt,
+              time_base, r_fps, fps, duration, nb_frames, ...} 或 None
+      audio: {codec, sample_rate, channels, channel_layout, sample_fmt, extradata_hash, ...} 或 None
+      streams: ffprobe 原始 streams 列表
+    关键帧列表不在这里，需要时用 probe_keyframes。
+    """
+    if not path:
+        return None
+    try:
+        key = _file_key(path)
+    except OSError:
+        return None
+
+    info = _cache_get(key)
+    if info is not None:
+        return info
+
+    if PROBE_SIDECAR:
+        info = _load_sidecar(path, key)
+        if info is not None:
+            _cache_put(key, info)
+            return info
+
+    try:
+        raw = _run_ffprobe(path)
+    except Exception:
+        return None
+
+    info = _normalize(raw, key)
+    _cache_put(key, info)
+
+    if PROBE_SIDECAR:
+        _save_sidecar(path, key, info)
+
+    return info
+
+
+def probe_keyframes(info):
+    """
+    第一路视频流的关键帧时间点列表（秒，升序，未减去 start_time）；
+    info 为 probe_media 的结果。第一次调用时扫描文件，之后走同一个缓存；失败时返回 []。
+    """
+    if info is None or info["video"] is None:
+        return []
+    key = ("keyframes", info["path"], info["size"], info["mtime_ns"])
+    keyframes = _cache_get(key)
+    if keyframes is not None:
+        return keyframes
+
+    try:
+        raw = _run_keyframe_scan(info["path"])
+    except Exception:
+        return []
+    keyframes = []
+    for frame in raw.get("frames") or []:
+        t = _to_float(frame.get("pts_time"))
+        if t is None:
+            t = _to_float(frame.get("best_effort_timestamp_time"))
+        if t is not None:
+            keyframes.append(t)
+    keyframes.sort()
+    _cache_put(key, keyframes)
+    return keyframes
+
+
+def clear_probe_cache():
+    """清空进程内探测缓存（不删除磁盘旁路文件）。"""
+    with _lock:
+        _cache.clear()
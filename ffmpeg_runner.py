@@ -0,0 +1,274 @@
+import os
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from .ffmpeg_metrics import CallRecord
+from .ffmpeg_scheduler import SCHEDULER, budget_cmd, launch_cmd, popen_kwargs, requested_threads
+
+# 所有节点共用的 ffmpeg 执行器：
+# - 自动加上 -progress pipe:1，实时解析 frame / out_time / speed，并同步到 ComfyUI 进度条；
+# - 轮询 ComfyUI 的中断标志，被取消时终止 ffmpeg 并删除未完成的输出文件；
+# - stderr 只保留末尾若干行，用于报错信息，避免长时间编码占满内存；
+# - 每个 ffmpeg 都先向进程级调度器（ffmpeg_scheduler）申请名额和线程预算；
+# - 每次调用的耗时 / CPU / 输入输出大小等写入性能日志（ffmpeg_metrics）。
+
+STDERR_TAIL_LINES = 200
+
+# 轮询中断 / 刷新进度条的间隔（秒）
+POLL_INTERVAL = 0.2
+
+# ensure_ffmpeg 找到的 ffmpeg 路径（进程内只查一次）
+_ffmpeg_path = None
+
+
+def ensure_ffmpeg():
+    """
+    检测 ffmpeg 是否可用：只在 PATH 里查找可执行文件，不启动进程；
+    找到后在进程内缓存，之后每次执行节点不再检查。
+    """
+    global _ffmpeg_path
+    if _ffmpeg_path is None:
+        _ffmpeg_path = shutil.which("ffmpeg")
+        if _ffmpeg_path is None:
+            raise RuntimeError("无法调用 ffmpeg，请确认已安装并加入系统 PATH。")
+    return _ffmpeg_path
+
+
+def processing_interrupted():
+    """ComfyUI 用户是否点了取消；不在 ComfyUI 环境中时恒为 False。"""
+    try:
+        import comfy.model_management as mm
+    except Exception:
+        return False
+    try:
+        return bool(mm.processing_interrupted())
+    except Exception:
+        return False
+
+
+def raise_interrupted():
+    """抛出 ComfyUI 的中断异常（会同时清掉中断标志）；不在 ComfyUI 环境中时抛 RuntimeError。"""
+    try:
+        import comfy.model_management as mm
+        mm.throw_exception_if_processing_interrupted()
+    except ImportError:
+        pass
+    raise RuntimeError("ffmpeg 已被用户中断。")
+
+
+def _make_progress_bar(total):
+    try:
+        import comfy.utils
+        return comfy.utils.ProgressBar(total)
+    except Exception:
+        return None
+
+
+def _remove_outputs(paths):
+    for p in paths:
+        try:
+            if p and os.path.isfile(p):
+                os.remove(p)
+        except OSError:
+            pass
+
+
+def _parse_out_time(value):
+    """
+    -progress 输出的 out_time_us / out_time_ms 实际单位都是微秒。
+    """
+    try:
+        return int(value) / 1_000_000.0
+    except (TypeError, ValueError):
+        return None
+
+
+def _with_progress_args(cmd):
+    """在 ffmpeg 后面插入全局参数 -progress pipe:1 -nostats。"""
+    if "-progress" in cmd:
+        return list(cmd)
+    return [cmd[0], "-progress", "pipe:1", "-nostats"] + list(cmd[1:])
+
+
+def terminate_process(proc, timeout=5.0):
+    """先温和终止 ffmpeg，超时再强杀。"""
+    if proc.poll() is not None:
+        return
+    try:
+        proc.terminate()
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+    except OSError:
+        pass
+
+
+class FFmpegCancelled(RuntimeError):
+    """ffmpeg 被调用方主动取消（cancel_event），例如并行任务中有其他任务失败。"""
+
+
+@contextmanager
+def ffmpeg_slot(cmd, cancel_event=None):
+    """
+    向调度器申请一个 ffmpeg 名额（排队期间可被中断 / 取消），
+    yield 本次调用的 CallRecord：call.cmd 是加好线程预算和优先级前缀的命令，
+    等待进程用 call.poll(proc) / call.wait(proc)（记录子进程 CPU 时间）；
+    退出时写入性能日志并归还名额。
+    自己用 Popen 读写管道的节点也通过它启动 ffmpeg（配合 popen_kwargs()）。
+    """
+    def _abort():
+        if cancel_event is not None and cancel_event.is_set():
+            return True
+        return processing_interrupted()
+
+    queued_at = time.monotonic()
+    threads = SCHEDULER.acquire(requested_threads(cmd), abort=_abort)
+    if threads is None:
+        if cancel_event is not None and cancel_event.is_set():
+            raise FFmpegCancelled("ffmpeg 已取消。")
+        raise_interrupted()
+    try:
+        with CallRecord(
+            launch_cmd(budget_cmd(cmd, threads)),
+            queue_s=time.monotonic() - queued_at,
+            threads=threads,
+        ) as call:
+            yield call
+    finally:
+        SCHEDULER.release(threads)
+
+
+def run_ffmpeg(
+    cmd,
+    duration=None,
+    outputs=(),
+    error_prefix="ffmpeg 执行失败",
+    progress=None,
+    cancel_event=None,
+):
+    """
+    执行一条 ffmpeg 命令（非阻塞读取进度），返回统计信息字典：
+      {"frame", "out_time", "speed", "returncode", "stderr_tail"}
+
+    - duration：预计输出时长（秒），用于换算进度百分比；未知时只在结束时更新进度条；
+    - outputs：失败或被中断时需要删除的输出文件；
+    - error_prefix：失败时 RuntimeError 的开头文字；
+    - progress：回调 progress(out_time)。给出时不再单独创建进度条，由调用方汇总
+      （并行执行多条命令时使用）；
+    - cancel_event：threading.Event，被置位时终止 ffmpeg 并抛 FFmpegCancelled。
+    """
+    with ffmpeg_slot(_with_progress_args(cmd), cancel_event) as call:
+        return _run_in_slot(
+            call, cmd, duration, outputs, error_prefix, progress, cancel_event
+        )
+
+
+def _run_in_slot(call, cmd, duration, outputs, error_prefix, progress, cancel_event):
+    proc = subprocess.Popen(
+        call.cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        **popen_kwargs(),
+    )
+
+    stats = {"frame": None, "out_time": None, "speed": None}
+    stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+
+    def _read_progress():
+        for raw in proc.stdout:
+            line = raw.decode("utf-8", errors="ignore").strip()
+            if "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            if key == "frame":
+                try:
+                    stats["frame"] = int(value)
+                except ValueError:
+                    pass
+            elif key in ("out_time_us", "out_time_ms"):
+                t = _parse_out_time(value)
+                if t is not None:
+                    stats["out_time"] = t
+            elif key == "speed":
+                value = value.strip().rstrip("x")
+                try:
+                    stats["speed"] = float(value)
+                except ValueError:
+                    pass
+
+    def _read_stderr():
+        for raw in proc.stderr:
+            stderr_tail.append(raw.decode("utf-8", errors="ignore"))
+
+    readers = [
+        threading.Thread(target=_read_progress, daemon=True),
+        threading.Thread(target=_read_stderr, daemon=True),
+    ]
+    for t in readers:
+        t.start()
+
+    bar_total = 1000
+    bar = _make_progress_bar(bar_total) if progress is None else None
+    last_step = 0
+    last_time = None
+
+    try:
+        while call.poll(proc) is None:
+            readers[0].join(POLL_INTERVAL)
+
+            if processing_interrupted():
+                terminate_process(proc)
+                for t in readers:
+                    t.join()
+                _remove_outputs(outputs)
+                raise_interrupted()
+
+            if cancel_event is not None and cancel_event.is_set():
+                terminate_process(proc)
+                for t in readers:
+                    t.join()
+                _remove_outputs(outputs)
+                raise FFmpegCancelled("ffmpeg 已取消。")
+
+            if progress is not None and stats["out_time"] != last_time:
+                last_time = stats["out_time"]
+                if last_time is not None:
+                    progress(last_time)
+
+            if bar is not None and duration and stats["out_time"] is not None:
+                step = int(min(1.0, stats["out_time"] / duration) * bar_total)
+                if step > last_step:
+                    bar.update_absolute(step, bar_total)
+                    last_step = step
+    except BaseException:
+        # 任何异常（包括中断）都不能留下孤儿 ffmpeg 进程
+        terminate_process(proc)
+        raise
+
+    for t in readers:
+        t.join()
+
+    call.frames, call.speed, call.out_time = stats["frame"], stats["speed"], stats["out_time"]
+    returncode = proc.returncode
+    stats["returncode"] = returncode
+    stats["stderr_tail"] = "".join(stderr_tail)
+
+    if returncode != 0:
+        _remove_outputs(outputs)
+        raise RuntimeError(
+            f"{error_prefix}：\n"
+            f"命令: {' '.join(cmd)}\n\n"
+            f"stderr:\n{stats['stderr_tail']}"
+        )
+
+    if bar is not None:
+        bar.update_absolute(bar_total, bar_total)
+    if progress is not None and duration:
+        progress(duration)
+    return stats
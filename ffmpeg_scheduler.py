@@ -0,0 +1,163 @@
+import os
+import shutil
+import subprocess
+import threading
+
+# 进程级 ffmpeg 调度器（所有节点启动的 ffmpeg 都经过这里）：
+# - 同时运行的 ffmpeg 数量有上限，多个 prompt / 并行分支同时执行时排队，而不是一起抢 CPU 和内存；
+# - 把 CPU 核数分成每个进程的线程预算，写进命令的 -threads / -filter_threads /
+#   -filter_complex_threads（命令里已经有 -threads 的，按其数值记账，不再改写）；
+# - 可选 nice / ionice 降低 ffmpeg 的优先级，保证 ComfyUI 本身和 GPU 推理的响应。
+
+# 同时运行的 ffmpeg 进程上限；0 表示自动（约每 4 个核一个，至少 2 个）
+MAX_PROCS = int(os.environ.get("FFMPEG_CONCAT_MAX_PROCS", "0") or 0)
+
+# 分给 ffmpeg 的总线程数；0 表示当前进程可用的 CPU 数
+TOTAL_THREADS = int(os.environ.get("FFMPEG_CONCAT_THREADS", "0") or 0)
+
+# nice 值（0 = 不调整，最大 19）；Windows 上 > 0 时使用 BELOW_NORMAL，>= 15 时使用 IDLE
+NICE = int(os.environ.get("FFMPEG_CONCAT_NICE", "0") or 0)
+
+# ionice 类别：空 = 不调整，idle，best-effort 或 best-effort:<0-7>（仅 Linux）
+IONICE = os.environ.get("FFMPEG_CONCAT_IONICE", "").strip().lower()
+
+# 自动上限时每个进程大致占用的核数
+_THREADS_PER_PROC = 4
+
+# 排队时轮询中断 / 取消的间隔（秒）
+_POLL_INTERVAL = 0.2
+
+
+def available_cpus():
+    """当前进程可用的 CPU 数（考虑 CPU 亲和性 / 容器限制）。"""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except (AttributeError, OSError):
+        return max(1, os.cpu_count() or 1)
+
+
+class FFmpegScheduler:
+    """
+    ffmpeg 进程名额 + 线程预算。
+    - acquire(requested)：排队直到有空闲名额，返回分到的线程数；
+      requested 为 None 时按当前负载分配：只有一个进程时可用全部核，
+      并发时平分，但每个进程至少分到 total_threads / max_procs；
+    - release(threads)：进程结束后归还。
+    """
+
+    def __init__(self, max_procs=0, total_threads=0):
+        self.total_threads = total_threads if total_threads > 0 else available_cpus()
+        if max_procs > 0:
+            self.max_procs = max_procs
+        else:
+            self.max_procs = max(2, self.total_threads // _THREADS_PER_PROC)
+        self._min_share = max(1, self.total_threads // self.max_procs)
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._used = 0
+
+    def acquire(self, requested=None, abort=None):
+        """
+        申请一个名额，返回线程预算；排队期间 abort() 为真时放弃并返回 None。
+        """
+        with self._cond:
+            self._waiting += 1
+            try:
+                while self._active >= self.max_procs:
+                    if abort is not None and abort():
+                        return None
+                    self._cond.wait(_POLL_INTERVAL)
+            finally:
+                self._waiting -= 1
+
+            if requested:
+                threads = int(requested)
+            else:
+                free = self.total_threads - self._used
+                share = self.total_threads // (self._active + 1 + self._waiting)
+                threads = max(self._min_share, min(free, share))
+            self._active += 1
+            self._used += threads
+            return threads
+
+    def release(self, threads):
+        with self._cond:
+            self._active -= 1
+            self._used -= threads
+            self._cond.notify_all()
+
+    def snapshot(self):
+        """当前状态：{max_procs, total_threads, active, waiting, threads_in_use}。"""
+        with self._cond:
+            return {
+                "max_procs": self.max_procs,
+                "total_threads": self.total_threads,
+                "active": self._active,
+                "waiting": self._waiting,
+                "threads_in_use": self._used,
+            }
+
+
+SCHEDULER = FFmpegScheduler(MAX_PROCS, TOTAL_THREADS)
+
+
+def requested_threads(cmd):
+    """命令里已经写好的 -threads 数值（调用方自己规划过并行度）；没有时返回 None。"""
+    for i, arg in enumerate(cmd[:-1]):
+        if arg == "-threads":
+            try:
+                return max(1, int(cmd[i + 1]))
+            except ValueError:
+                return None
+    return None
+
+
+def budget_cmd(cmd, threads):
+    """
+    按线程预算改写命令：滤镜图线程（全局参数）、每个输入的解码线程、输出的编码线程。
+    命令里已有 -threads 时原样返回。
+    """
+    cmd = list(cmd)
+    if "-threads" in cmd or len(cmd) < 2:
+        return cmd
+    n = str(threads)
+    out = [cmd[0], "-filter_complex_threads", n, "-filter_threads", n]
+    for arg in cmd[1:-1]:
+        if arg == "-i":
+            out += ["-threads", n]
+        out.append(arg)
+    out += ["-threads", n, cmd[-1]]
+    return out
+
+
+def _ionice_args():
+    if not IONICE or os.name != "posix" or shutil.which("ionice") is None:
+        return []
+    cls, _, level = IONICE.partition(":")
+    if cls == "idle":
+        return ["ionice", "-c", "3"]
+    if cls in ("best-effort", "besteffort", "be"):
+        args = ["ionice", "-c", "2"]
+        if level.isdigit():
+            args += ["-n", level]
+        return args
+    return []
+
+
+def launch_cmd(cmd):
+    """POSIX 上按 NICE / IONICE 给命令加 nice / ionice 前缀。"""
+    prefix = []
+    if os.name == "posix" and NICE > 0 and shutil.which("nice") is not None:
+        prefix += ["nice", "-n", str(min(NICE, 19))]
+    prefix += _ionice_args()
+    return prefix + list(cmd)
+
+
+def popen_kwargs():
+    """Windows 上用进程优先级类代替 nice；其它平台返回空字典。"""
+    if os.name != "nt" or NICE <= 0:
+        return {}
+    if NICE >= 15:
+        return {"creationflags": getattr(subprocess, "IDLE_PRIORITY_CLASS", 0)}
+    return {"creationflags": getattr(subprocess, "BELOW_NORMAL_PRIORITY_CLASS", 0)}
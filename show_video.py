@@ -6,6 +6,8 @@ from typing_extensions import override
 
 from comfy_api.latest import io, ui, ComfyExtension
 
+from .ffmpeg_plan import is_plan
+
 
 class ShowVideo(io.ComfyNode):
     @classmethod
@@ -46,6 +48,11 @@ class ShowVideo(io.ComfyNode):
         path = video_path.strip()
         if not path:
             raise ValueError("video_path must not be empty.")
+        if is_plan(path):
+            raise ValueError(
+                "video_path is a render plan from a node with lazy enabled; "
+                "connect it to a Render Plan node first."
+            )
 
         # 统一分隔符
         path = path.replace("\\", "/")
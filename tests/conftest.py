@@ -0,0 +1,90 @@
+"""
+单元测试的公共设置：和 benchmarks 一样用 stubs/ 下的替身模块（folder_paths / comfy_api）
+离线加载本仓库，不需要 ComfyUI、ffmpeg、torch。
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(REPO_ROOT, "benchmarks")
+
+# 替身 folder_paths 的输出目录放到临时目录；测试不写性能日志
+os.environ.setdefault("FFMPEG_CONCAT_BENCH_DIR", tempfile.mkdtemp(prefix="ffmpeg_concat_tests_"))
+os.environ["FFMPEG_CONCAT_METRICS"] = "0"
+
+if BENCH_DIR not in sys.path:
+    sys.path.insert(0, BENCH_DIR)
+
+import _loader  # noqa: E402
+
+_loader.install_stubs()
+
+
+@pytest.fixture(scope="session")
+def load():
+    """按模块名导入本仓库的模块，例如 load("ffmpeg_output")。"""
+    return _loader.load_node_module
+
+
+def make_info(
+    path="clip.mp4",
+    container="mov,mp4,m4a,3gp,3g2,mj2",
+    codec="h264",
+    width=1920,
+    height=1080,
+    fps="30/1",
+    time_base="1/15360",
+    extradata="CRC32:aaaa",
+    pix_fmt="yuv420p",
+    audio=True,
+    sample_rate=48000,
+    duration=10.0,
+    start_time=0.0,
+):
+    """构造与 probe_media 结果同结构的探测信息（只填测试用到的字段）。"""
+    num, den = (float(x) for x in fps.split("/"))
+    video = {
+        "codec": codec,
+        "profile": "High",
+        "level": 40,
+        "extradata_hash": extradata,
+        "width": width,
+        "height": height,
+        "sar": "1:1",
+        "pix_fmt": pix_fmt,
+        "time_base": time_base,
+        "r_frame_rate": fps,
+        "avg_frame_rate": fps,
+        "r_fps": num / den,
+        "fps": num / den,
+        "duration": duration,
+        "nb_frames": None,
+    }
+    a = None
+    if audio:
+        a = {
+            "codec": "aac",
+            "profile": "LC",
+            "sample_rate": sample_rate,
+            "channels": 2,
+            "channel_layout": "stereo",
+            "sample_fmt": "fltp",
+            "extradata_hash": "CRC32:bbbb",
+            "time_base": f"1/{sample_rate}",
+            "duration": duration,
+        }
+    return {
+        "path": path,
+        "size": 1,
+        "mtime_ns": 1,
+        "format_name": container,
+        "duration": duration,
+        "start_time": start_time,
+        "video": video,
+        "audio": a,
+        "tags": {},
+        "streams": [],
+    }
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+
+@pytest.fixture
+def a2p(load):
+    return load("audiotopath").AudioToPath
+
+
+def test_digest_names_by_content_and_format(a2p):
+    def digest(blocks, fmt="wav", rate=48000):
+        return a2p._waveform_digest(blocks, 2, 4, rate, fmt)
+
+    base = digest([b"\x00" * 16, b"\x01" * 16])
+    # 与分块方式无关，只取决于内容
+    assert digest([b"\x00" * 16 + b"\x01" * 16]) == base
+    assert digest([b"\x00" * 16, b"\x02" * 16]) != base
+    assert digest([b"\x00" * 16, b"\x01" * 16], fmt="flac") != base
+    assert digest([b"\x00" * 16, b"\x01" * 16], rate=44100) != base
+
+
+def test_encode_cmd_format_args(a2p):
+    cmd = a2p._build_encode_cmd(2, 44100, "aac", "out.m4a")
+    assert cmd[:11] == [
+        "ffmpeg", "-y", "-f", "f32le", "-ar", "44100", "-ac", "2", "-i", "pipe:0", "-c:a",
+    ]
+    assert cmd[-3:] == ["-f", "ipod", "out.m4a"]
+
+    # libopus 不支持的采样率重采样到 48 kHz
+    opus = a2p._build_encode_cmd(1, 44100, "opus", "out.opus")
+    assert opus[opus.index("libopus"):] == [
+        "libopus", "-b:a", "128k", "-ar", "48000", "-f", "ogg", "out.opus",
+    ]
+    assert "48000" not in a2p._build_encode_cmd(1, 24000, "opus", "out.opus")
+
+
+def test_write_once_renames_part_file(a2p, tmp_path):
+    out = tmp_path / "audio_x.wav"
+    parts = []
+
+    def write(part_path):
+        parts.append(part_path)
+        with open(part_path, "wb") as f:
+            f.write(b"RIFF")
+
+    assert a2p._write_once(str(out), write) == str(out)
+    assert out.read_bytes() == b"RIFF"
+    assert parts[0].endswith(".part") and not os.path.exists(parts[0])
+
+    # 已有非空文件时直接复用，不再写
+    assert a2p._write_once(str(out), write) == str(out)
+    assert len(parts) == 1
+
+
+def test_write_once_removes_part_on_failure(a2p, tmp_path):
+    out = tmp_path / "audio_y.wav"
+
+    def write(part_path):
+        with open(part_path, "wb") as f:
+            f.write(b"half")
+        raise RuntimeError("ffmpeg failed")
+
+    with pytest.raises(RuntimeError):
+        a2p._write_once(str(out), write)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,98 @@
+import pytest
+
+from conftest import make_info
+
+
+@pytest.fixture
+def auto(load, monkeypatch, tmp_path):
+    """ConcatVideos 的 auto 模式；ffmpeg 调用全部换成记录命令的假实现。"""
+    module = load("concat_videos_path")
+    node = module.ConcatVideos()
+    calls = {"run": [], "parallel": [], "fast": [], "fallback": []}
+    infos = {}
+
+    def fake_probe(path):
+        if path in infos:
+            return infos[path]
+        # 中间片段：与参考规格一致，但 MPEG-TS 里的参数集和参考片段不同
+        return make_info(path, container="mpegts", extradata="CRC32:ffff", time_base="1/90000")
+
+    monkeypatch.setattr(module, "probe_media", fake_probe)
+    monkeypatch.setattr(module, "run_ffmpeg", lambda cmd, **kw: calls["run"].append(cmd))
+    monkeypatch.setattr(
+        module, "run_ffmpeg_parallel", lambda cmds, jobs, **kw: calls["parallel"].extend(cmds)
+    )
+    monkeypatch.setattr(node, "_get_output_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(
+        node, "_run_fast_concat", lambda parts, *args: calls["fast"].append(list(parts))
+    )
+    monkeypatch.setattr(node, "_run", lambda cmd, *args: calls["fallback"].append(cmd))
+    node.calls = calls
+    node.infos = infos
+    return node
+
+
+def _concat(node, videos):
+    return node._auto_concat(videos, "", "/out/result.mp4", 0, 0, 0, "mp4", False)
+
+
+def test_conform_piece_ext(load):
+    concat = load("concat_videos_path").ConcatVideos
+    h264 = make_info()
+    assert concat._conform_piece_ext(h264, "mp4") == "ts"
+
+    vp9 = make_info(codec="vp9", extradata=None)
+    vp9["audio"]["codec"] = "opus"
+    assert concat._conform_piece_ext(vp9, "webm") == "webm"
+    vp9["video"]["extradata_hash"] = "CRC32:cccc"
+    assert concat._conform_piece_ext(vp9, "webm") is None
+
+    assert concat._conform_piece_ext(make_info(codec="prores"), "mov") is None
+    flac = make_info()
+    flac["audio"]["codec"] = "flac"
+    assert concat._conform_piece_ext(flac, "mp4") is None
+
+
+def test_auto_conform_uses_ts_pieces(auto):
+    videos = ["/in/a.mp4", "/in/b.mp4", "/in/c.mp4"]
+    auto.infos.update({
+        "/in/a.mp4": make_info("/in/a.mp4"),
+        "/in/b.mp4": make_info("/in/b.mp4", width=1280, height=720, extradata="CRC32:dddd"),
+        "/in/c.mp4": make_info("/in/c.mp4"),
+    })
+    assert _concat(auto, videos) == "conform"
+
+    # 只重编码一次不一致的片段，直接输出 MPEG-TS
+    (conform,) = auto.calls["run"]
+    assert conform[conform.index("-i") + 1] == "/in/b.mp4"
+    assert conform[-1].endswith("part_00001.ts")
+    assert "-video_track_timescale" not in conform
+    # 其余片段流拷贝成 MPEG-TS
+    assert [cmd[cmd.index("-i") + 1] for cmd in auto.calls["parallel"]] == ["/in/a.mp4", "/in/c.mp4"]
+    assert all("copy" in cmd for cmd in auto.calls["parallel"])
+    (parts,) = auto.calls["fast"]
+    assert [p.rsplit("/", 1)[1] for p in parts] == ["part_00000.ts", "part_00001.ts", "part_00002.ts"]
+    assert auto.calls["fallback"] == []
+
+
+def test_auto_unreproducible_reference_skips_conform(auto):
+    videos = ["/in/a.webm", "/in/b.webm", "/in/c.webm"]
+    for path, width in zip(videos, (1920, 1280, 1920)):
+        info = make_info(path, container="matroska,webm", codec="vp9", width=width)
+        info["audio"]["codec"] = "opus"
+        auto.infos[path] = info
+    assert auto._auto_concat(videos, "", "/out/result.webm", 0, 0, 0, "webm", False) == "reencode"
+
+    # 参考片段带 extradata 的 vp9：不先做一次注定失败的对齐编码
+    assert auto.calls["run"] == []
+    assert auto.calls["parallel"] == []
+    assert auto.calls["fast"] == []
+    assert len(auto.calls["fallback"]) == 1
+
+
+def test_auto_copy_when_all_match(auto):
+    videos = ["/in/a.mp4", "/in/b.mp4"]
+    auto.infos.update({v: make_info(v) for v in videos})
+    assert _concat(auto, videos) == "fast"
+    assert auto.calls["fast"] == [videos]
+    assert auto.calls["run"] == []
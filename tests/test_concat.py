@@ -0,0 +1,105 @@
+import pytest
+
+from conftest import make_info
+
+
+@pytest.fixture
+def concat(load, monkeypatch):
+    """concat_videos_path 模块；探测结果按路径从 infos 里取，不运行 ffprobe。"""
+    module = load("concat_videos_path")
+    infos = {}
+    monkeypatch.setattr(module, "probe_media", lambda path: infos.get(path))
+    module.infos = infos
+    yield module
+    del module.infos
+
+
+def test_split_path_list(load):
+    concat = load("concat_videos_path")
+    text = '/a/one.mp4\n\n  # 注释\n"/b/two words.mp4"\n  \'/c/three.mp4\'  \n'
+    assert concat.split_path_list(text) == ["/a/one.mp4", "/b/two words.mp4", "/c/three.mp4"]
+    assert concat.split_path_list(None) == []
+    assert concat.split_path_list(["/a.mp4", ("/b.mp4\n/c.mp4", None)]) == [
+        "/a.mp4", "/b.mp4", "/c.mp4",
+    ]
+
+
+def test_reencode_keeps_clip_audio(concat):
+    concat.infos.update({
+        "a.mp4": make_info("a.mp4", duration=4.0),
+        "b.mp4": make_info("b.mp4", audio=False, duration=3.0),
+    })
+    node = concat.ConcatVideos()
+    cmd = node._build_filter_concat_cmd(
+        ["a.mp4", "b.mp4"], "", "out.mp4", 0, 0, 0, False, keep_clip_audio=True,
+    )
+    graph = cmd[cmd.index("-filter_complex") + 1].split("; ")
+    # 有音轨的片段统一格式并对齐到画面长度，没有音轨的片段补同样长度的静音
+    assert graph[1] == (
+        "[0:a:0]aresample=48000,aformat=sample_fmts=fltp:sample_rates=48000"
+        ":channel_layouts=stereo,apad,atrim=duration=4.000000[a0]"
+    )
+    assert graph[3] == "anullsrc=r=48000:cl=stereo,atrim=duration=3.000000[a1]"
+    assert graph[4] == "[v0][a0][v1][a1]concat=n=2:v=1:a=1[outv][outa]"
+    assert cmd[cmd.index("[outv]") + 1:cmd.index("[outv]") + 3] == ["-map", "[outa]"]
+    assert "-c:a" in cmd and "-an" not in cmd
+
+
+def test_reencode_clip_audio_disabled(concat, tmp_path):
+    concat.infos["a.mp4"] = make_info("a.mp4")
+    node = concat.ConcatVideos()
+
+    cmd = node._build_filter_concat_cmd(["a.mp4"], "", "out.mp4", 0, 0, 0, False)
+    assert cmd[cmd.index("-filter_complex") + 1].endswith("concat=n=1:v=1:a=0[outv]")
+    assert "-an" in cmd and "-c:a" not in cmd
+
+    # 外部音频优先于片段音频
+    music = str(tmp_path / "music.m4a")
+    cmd = node._build_filter_concat_cmd(
+        ["a.mp4"], music, "out.mp4", 0, 0, 0, True, keep_clip_audio=True,
+    )
+    assert "[a0]" not in cmd[cmd.index("-filter_complex") + 1]
+    assert ["-map", "1:a:0", "-shortest"] == cmd[cmd.index("[outv]") + 1:cmd.index("[outv]") + 4]
+
+
+def test_external_audio_copy_or_transcode(concat):
+    def audio(path, codec):
+        info = make_info(path)
+        info["audio"]["codec"] = codec
+        concat.infos[path] = info
+        return path
+
+    node = concat.ConcatVideos()
+    assert node._external_audio_args(audio("music.m4a", "aac"), "out.mp4") == ["-c:a", "copy"]
+    assert node._external_audio_args(audio("voice.opus", "opus"), "out.webm") == ["-c:a", "copy"]
+    # AudioToPath 的 WAV 放不进 mp4 / webm：只转码音频
+    wav = audio("audio.wav", "pcm_f32le")
+    assert node._external_audio_args(wav, "out.mp4")[:2] == ["-c:a", "aac"]
+    assert node._external_audio_args(wav, "out.webm")[:2] == ["-c:a", "libopus"]
+    assert node._external_audio_args("missing.wav", "out.mp4")[:2] == ["-c:a", "aac"]
+
+
+def test_opus_and_flac_are_not_copied_into_mp4(concat):
+    assert concat.audio_copy_fits("aac", "mp4")
+    for codec in ("opus", "flac"):
+        assert not concat.audio_copy_fits(codec, "mp4")
+        assert concat.audio_copy_fits(codec, "mkv")
+        info = make_info(f"audio.{codec}")
+        info["audio"]["codec"] = codec
+        concat.infos[info["path"]] = info
+        args = concat.ConcatVideos()._external_audio_args(info["path"], "out.mp4")
+        assert args[:2] == ["-c:a", "aac"]
+
+
+def test_concat_without_inputs(concat, monkeypatch):
+    def no_probe(path):
+        raise AssertionError("不应在检查输入之前探测")
+
+    monkeypatch.setattr(concat, "probe_media", no_probe)
+    node = concat.ConcatVideos()
+    with pytest.raises(ValueError, match="video_path1 ~ video_path4.*video_paths"):
+        node.concat("reencode", 0, 0, 0, "out_", "mp4", video_path1=" ", video_paths="\n# 注释\n")
+    with pytest.raises(ValueError, match="video_paths"):
+        node._auto_concat([], "", "out.mp4", 0, 0, 0, "mp4", False)
+    with pytest.raises(ValueError, match="video_paths"):
+        concat.ConcatPreflight().preflight()
@@ -0,0 +1,89 @@
+import os
+
+import pytest
+
+from conftest import make_info
+
+
+@pytest.fixture
+def cut(load, monkeypatch, tmp_path):
+    """CutVideo；关键帧每 2 秒一个，ffmpeg 调用换成记录命令的假实现。"""
+    module = load("FFmpegCutVideo")
+    node = module.CutVideo()
+    commands = []
+    lists = []
+
+    def fake_run(cmd, duration=None, outputs=()):
+        commands.append(cmd)
+        if "concat" in cmd:
+            with open(cmd[cmd.index("-i") + 1], encoding="utf-8") as f:
+                lists.append([os.path.basename(line.split("'")[1]) for line in f])
+
+    monkeypatch.setattr(module, "probe_keyframes", lambda info: [float(k) for k in range(0, 20, 2)])
+    monkeypatch.setattr(node, "_run_ffmpeg", fake_run)
+    monkeypatch.setattr(node, "_get_output_dir", lambda: str(tmp_path))
+    node.commands = commands
+    node.lists = lists
+    return node
+
+
+def test_smart_cut_pieces(cut):
+    info = make_info(duration=20.0)
+    assert cut._cut_smart("in.mp4", info, 1.0, 10.0, "yes", "out.mp4") is True
+
+    head, middle, tail, final = cut.commands
+    # 首尾段按源规格重编码成 MPEG-TS（参数集在码流里），不带 mp4 专用的 timescale
+    assert head[head.index("-ss") + 1] == "1.0" and head[head.index("-t") + 1] == "1.0"
+    assert tail[tail.index("-ss") + 1] == "10.0"
+    for cmd in (head, tail):
+        assert cmd[cmd.index("-c:v") + 1] == "libx264"
+        assert cmd[-1].endswith(".ts")
+        assert "-video_track_timescale" not in cmd
+    # 中间段从第一个关键帧开始流拷贝到最后一个关键帧之前
+    assert middle[middle.index("-c:v") + 1] == "copy"
+    assert 2.0 < float(middle[middle.index("-ss") + 1]) < 2.1
+    assert middle[-1].endswith("middle.ts")
+    assert cut.lists == [["head.ts", "middle.ts", "tail.ts"]]
+    # 最后封装成 mp4 时对齐 timescale，音频整段单独编码
+    assert final[final.index("-video_track_timescale") + 1] == "15360"
+    assert final[final.index("-map", final.index("-map") + 1) + 1] == "1:a:0"
+    assert final[-1] == "out.mp4"
+
+
+def test_smart_cut_vp9_uses_mkv_pieces(cut):
+    info = make_info(codec="vp9", duration=20.0)
+    assert cut._cut_smart("in.webm", info, 1.0, 10.0, "no", "out.mp4") is True
+    assert cut.lists == [["head.mkv", "middle.mkv", "tail.mkv"]]
+    assert "-an" in cut.commands[-1]
+
+
+def test_smart_cut_without_full_gop(cut):
+    # 范围里没有完整的 GOP：交给调用方整段重编码，不运行 ffmpeg
+    info = make_info(duration=20.0)
+    assert cut._cut_smart("in.mp4", info, 2.5, 1.0, "yes", "out.mp4") is False
+    assert cut.commands == []
+
+
+def test_split_cmd_threads_per_output(load):
+    scheduler = load("ffmpeg_scheduler")
+    node = load("FFmpegCutVideo").CutVideoMulti()
+    segments = [(1.0, 2.0, "o0.mp4"), (5.0, 3.0, "o1.mp4")]
+    cmd, duration = node._build_split_cmd("in.mp4", make_info(), segments, "yes", "default", 8)
+
+    assert duration == 7.0
+    assert cmd[:10] == [
+        "ffmpeg", "-y", "-filter_complex_threads", "8", "-threads", "8",
+        "-ss", "1.0", "-i", "in.mp4",
+    ]
+    assert cmd[cmd.index("-t") + 1] == "7.0"
+    # 解码 / 滤镜用整份预算，两个输出的编码器平分
+    for label in ("[v0]", "[v1]"):
+        i = cmd.index(label)
+        assert cmd[i + 1:i + 3] == ["-threads", "4"]
+    assert cmd.count("-threads") == 3
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert "[s1]trim=start=4.000000:duration=3.000000,setpts=PTS-STARTPTS[v1]" in graph
+    assert "[sa0]atrim=start=0.000000:duration=2.000000" in graph
+    # 调度器按第一个 -threads 计预算，不再改写命令
+    assert scheduler.requested_threads(cmd) == 8
+    assert scheduler.budget_cmd(cmd, 2) == cmd
@@ -0,0 +1,83 @@
+import io
+
+import pytest
+
+from conftest import make_info
+
+
+def test_frame_limit_is_capped_by_the_clip(load):
+    frames = load("FFmpegLoadFrames").LoadVideoFrames
+    # 3 秒、30fps 的 1080p 短片：帧数模式要 100000 帧也只预分配实际存在的 90 帧
+    info = make_info(width=1920, height=1080, duration=3.0)
+    limit = frames._frame_limit(info, "frame", 100_000, 0.0, 100_000 / 30.0, 30.0, 1, 0)
+    assert limit == 90
+    # 抽帧 / 起点 / max_frames 都在实际帧数之内再缩小
+    assert frames._frame_limit(info, "frame", 100_000, 0.0, 100_000 / 30.0, 30.0, 2, 0) == 45
+    assert frames._frame_limit(info, "frame", 100_000, 2.0, 100_000 / 30.0, 30.0, 1, 0) == 30
+    assert frames._frame_limit(info, "frame", 100_000, 0.0, 100_000 / 30.0, 30.0, 1, 10) == 10
+
+
+def test_frame_limit_keeps_smaller_requests(load):
+    frames = load("FFmpegLoadFrames").LoadVideoFrames
+    info = make_info(duration=60.0)
+    assert frames._frame_limit(info, "frame", 12, 0.0, 12 / 30.0, 30.0, 1, 0) == 12
+    assert frames._frame_limit(info, "frame", 12, 0.0, 12 / 30.0, 30.0, 5, 0) == 3
+    assert frames._frame_limit(info, "time", 0, 10.0, 2.0, 30.0, 1, 0) == 60
+    # 探测到的总帧数比按时长推算的少时以总帧数为准
+    info["video"]["nb_frames"] = 50
+    assert frames._frame_limit(info, "time", 0, 0.0, 0.0, 30.0, 1, 0) == 50
+
+
+def test_decode_cmd(load):
+    frames = load("FFmpegLoadFrames").LoadVideoFrames
+    src = {"width": 1920, "height": 1080}
+    cmd = frames._build_decode_cmd("in.mp4", src, 1.5, 2.0, 2, 960, 540, 30)
+    assert cmd[:7] == ["ffmpeg", "-v", "error", "-ss", "1.5", "-t", "2.0"]
+    assert cmd[cmd.index("-vf") + 1] == "select=not(mod(n\\,2)),scale=960:540:flags=area"
+    assert cmd[-7:] == ["-frames:v", "30", "-pix_fmt", "rgb24", "-f", "rawvideo", "pipe:1"]
+    # 原尺寸、不抽帧时不加滤镜
+    cmd = frames._build_decode_cmd("in.mp4", src, 0.0, 0.0, 1, 1920, 1080, 5)
+    assert "-vf" not in cmd and "-ss" not in cmd and "-t" not in cmd
+
+
+def test_output_size(load):
+    frames = load("FFmpegLoadFrames").LoadVideoFrames
+    assert frames._output_size(1920, 1080, 0, 0) == (1920, 1080)
+    assert frames._output_size(1920, 1080, 640, 0) == (640, 360)
+    assert frames._output_size(1920, 1080, 0, 720) == (1280, 720)
+    assert frames._output_size(1920, 1080, 100, 100) == (100, 100)
+
+
+def test_reads_fewer_frames_than_expected(load, tmp_path, monkeypatch):
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("numpy")
+    module = load("FFmpegLoadFrames")
+    clip = tmp_path / "a.mp4"
+    clip.write_bytes(b"x")
+    info = make_info(path=str(clip), width=2, height=2, duration=0.1)
+    monkeypatch.setattr(module, "probe_media", lambda path: info)
+
+    class FakeProc:
+        def __init__(self, *args, **kwargs):
+            # 预计 3 帧，ffmpeg 只输出了 2 帧
+            self.stdout = io.BytesIO(bytes(range(24)))
+            self.stderr = io.BytesIO(b"")
+            self.returncode = 0
+            self.pid = 0
+
+        def poll(self):
+            return 0
+
+        def wait(self, timeout=None):
+            return 0
+
+    monkeypatch.setattr(module.subprocess, "Popen", FakeProc)
+    frames, count, fps = module.LoadVideoFrames().load_frames(
+        str(clip), "time", 0.0, 0.0, 0, 0, True, 30.0,
+    )
+    assert count == 2
+    assert tuple(frames.shape) == (2, 2, 2, 3)
+    # 返回的是复制出来的张量，不再引用按预计帧数分配的存储
+    assert frames.untyped_storage().nbytes() == 2 * 2 * 2 * 3 * 4
+    assert torch.isclose(frames[1, 1, 1, 2], torch.tensor(23 / 255.0))
+    assert fps == 30.0
@@ -0,0 +1,90 @@
+import json
+import time
+
+import pytest
+
+
+def _record(node, mode, wall, cpu, status="ok", speed=None, output_bytes=0, ts=None):
+    return {
+        "ts": ts if ts is not None else time.time(),
+        "node": node,
+        "mode": mode,
+        "wall_s": wall,
+        "cpu_user_s": cpu,
+        "cpu_sys_s": 0.0,
+        "speed": speed,
+        "status": status,
+        "output_bytes": output_bytes,
+    }
+
+
+def test_percentile_interpolates(load):
+    metrics = load("ffmpeg_metrics")
+    assert metrics._percentile([], 50) is None
+    assert metrics._percentile([3.0], 95) == 3.0
+    assert metrics._percentile([4.0, 1.0, 3.0, 2.0], 50) == 2.5
+    assert metrics._percentile([1.0, 2.0, 3.0, 4.0, 5.0], 95) == pytest.approx(4.8)
+
+
+def test_summarize_groups_and_sorts_by_wall_time(load):
+    metrics = load("ffmpeg_metrics")
+    records = [
+        _record("CutVideo", "copy", 1.0, 0.5, speed=20.0),
+        _record("ConcatVideos", "reencode", 100.0, 300.0, speed=2.0, output_bytes=1024 ** 3),
+        _record("ConcatVideos", "reencode", 200.0, 500.0, status="error", speed=1.0),
+        _record("CutVideo", None, 2.0, 1.0),
+    ]
+    rows = metrics.summarize(records)
+    assert [(r["node"], r["mode"]) for r in rows] == [
+        ("ConcatVideos", "reencode"), ("CutVideo", "-"), ("CutVideo", "copy"),
+    ]
+    top = rows[0]
+    assert top["calls"] == 2
+    assert top["errors"] == 1
+    assert top["wall_p50_s"] == 150.0
+    assert top["wall_total_h"] == pytest.approx(300.0 / 3600)
+    assert top["cpu_total_h"] == pytest.approx(800.0 / 3600)
+    assert top["speed_p50"] == 1.5
+    assert top["output_gb"] == 1.0
+
+    by_node = metrics.summarize(records, group_by=("node",))
+    assert [r["calls"] for r in by_node] == [2, 2]
+    table = metrics.format_summary(by_node, group_by=("node",))
+    assert table.splitlines()[0].split()[:3] == ["node", "calls", "errors"]
+    assert "ConcatVideos" in table.splitlines()[1]
+
+
+def test_load_records_skips_old_and_broken_lines(load, tmp_path):
+    metrics = load("ffmpeg_metrics")
+    path = tmp_path / "metrics.jsonl"
+    old = _record("CutVideo", "copy", 1.0, 0.5, ts=time.time() - 7200)
+    new = _record("CutVideo", "copy", 2.0, 0.5)
+    path.write_text(json.dumps(old) + "\nnot json\n" + json.dumps(new) + "\n", encoding="utf-8")
+    assert len(metrics.load_records(str(path))) == 2
+    assert [r["wall_s"] for r in metrics.load_records(str(path), since_hours=1)] == [2.0]
+
+
+def test_call_record_status(load, monkeypatch):
+    metrics = load("ffmpeg_metrics")
+    seen = []
+    monkeypatch.setattr(metrics.CallRecord, "finish", lambda self, status: seen.append(status))
+
+    with metrics.CallRecord(["ffmpeg"]) as call:
+        call.returncode = 0
+    with metrics.CallRecord(["ffmpeg"]) as call:
+        call.returncode = -15
+    with pytest.raises(KeyboardInterrupt):
+        with metrics.CallRecord(["ffmpeg"]):
+            raise KeyboardInterrupt
+    assert seen == ["ok", "error", "interrupted"]
+
+
+def test_call_record_status_override(load, monkeypatch):
+    metrics = load("ffmpeg_metrics")
+    seen = []
+    monkeypatch.setattr(metrics.CallRecord, "finish", lambda self, status: seen.append(status))
+    with metrics.CallRecord(["ffmpeg"]) as call:
+        # 调用方主动终止时填写的状态优先于退出码
+        call.returncode = -15
+        call.status = "interrupted"
+    assert seen == ["interrupted"]
@@ -0,0 +1,75 @@
+import os
+import threading
+
+
+def test_allocate_numbers_sequentially(load, tmp_path):
+    output = load("ffmpeg_output")
+    first = output.allocate_output_path(str(tmp_path), "concat", ".mp4")
+    second = output.allocate_output_path(str(tmp_path), "concat", ".mp4")
+    assert os.path.basename(first) == "concat_00001.mp4"
+    assert os.path.basename(second) == "concat_00002.mp4"
+    # 占位文件已创建且为空
+    assert os.path.getsize(first) == 0
+
+
+def test_allocate_continues_after_existing_files(load, tmp_path):
+    output = load("ffmpeg_output")
+    (tmp_path / "cut_07.mp4").write_bytes(b"x")
+    (tmp_path / "cut_notes.mp4").write_bytes(b"x")
+    path = output.allocate_output_path(str(tmp_path), "cut", ".mp4", digits=2)
+    assert os.path.basename(path) == "cut_08.mp4"
+
+
+def test_allocate_skips_numbers_taken_by_other_processes(load, tmp_path):
+    output = load("ffmpeg_output")
+    output.allocate_output_path(str(tmp_path), "ov", ".mp4")
+    # 另一个进程抢先用掉了下一个编号
+    (tmp_path / "ov_00002.mp4").write_bytes(b"x")
+    path = output.allocate_output_path(str(tmp_path), "ov", ".mp4")
+    assert os.path.basename(path) == "ov_00003.mp4"
+
+
+def test_allocate_is_unique_across_threads(load, tmp_path):
+    output = load("ffmpeg_output")
+    paths = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(10):
+            p = output.allocate_output_path(str(tmp_path), "race", ".mp4")
+            with lock:
+                paths.append(p)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(paths) == 80
+    assert len(set(paths)) == 80
+
+
+def test_index_lives_in_hidden_subdirectory(load, tmp_path):
+    output = load("ffmpeg_output")
+    output.allocate_output_path(str(tmp_path), "idx", ".mp4")
+    assert os.path.exists(tmp_path / ".ffmpeg_concat" / "counters.json")
+    assert sorted(os.listdir(tmp_path)) == [".ffmpeg_concat", "idx_00001.mp4"]
+
+    # 进程内计数器丢失（重启）后按索引继续编号，而不是重新扫描目录
+    output._counters.clear()
+    os.remove(tmp_path / "idx_00001.mp4")
+    path = output.allocate_output_path(str(tmp_path), "idx", ".mp4")
+    assert os.path.basename(path) == "idx_00002.mp4"
+
+
+def test_discard_removes_only_empty_placeholders(load, tmp_path):
+    output = load("ffmpeg_output")
+    empty = output.allocate_output_path(str(tmp_path), "d", ".mp4")
+    written = output.allocate_output_path(str(tmp_path), "d", ".mp4")
+    with open(written, "wb") as f:
+        f.write(b"data")
+    output.discard_output_path(empty)
+    output.discard_output_path(written)
+    output.discard_output_path(str(tmp_path / "missing.mp4"))
+    assert not os.path.exists(empty)
+    assert os.path.exists(written)
@@ -0,0 +1,45 @@
+import pytest
+
+
+@pytest.fixture
+def parallel(load, monkeypatch):
+    module = load("ffmpeg_parallel")
+    monkeypatch.setattr(module, "MIN_CHUNK_SECONDS", 10.0)
+    monkeypatch.setattr(module, "MAX_JOBS", 0)
+    monkeypatch.setattr(module.SCHEDULER, "total_threads", 16)
+    monkeypatch.setattr(module.SCHEDULER, "max_procs", 4)
+    return module
+
+
+def test_plan_jobs_auto(parallel):
+    # 约每 4 个线程一个任务，不超过调度器的进程上限和任务数
+    assert parallel.plan_jobs(10) == (4, 4)
+    assert parallel.plan_jobs(2) == (2, 8)
+    assert parallel.plan_jobs(0) == (1, 16)
+
+
+def test_plan_jobs_requested_and_env(parallel, monkeypatch):
+    assert parallel.plan_jobs(10, 3) == (3, 5)
+    assert parallel.plan_jobs(10, 64) == (4, 4)
+    monkeypatch.setattr(parallel, "MAX_JOBS", 1)
+    assert parallel.plan_jobs(10) == (1, 16)
+
+
+def test_keyframe_chunks_snaps_to_nearest_keyframes(parallel):
+    keyframes = [float(k) for k in range(0, 61, 2)]
+    bounds = parallel.keyframe_chunks(keyframes, 0.0, 60.0, 3, tol=0.001)
+    assert bounds == [0.0, 20.0005, 40.0005, 60.0]
+
+
+def test_keyframe_chunks_respects_min_chunk_length(parallel):
+    keyframes = [float(k) for k in range(0, 31)]
+    # 30 秒最多切 3 段（每段至少 10 秒）
+    bounds = parallel.keyframe_chunks(keyframes, 0.0, 30.0, 8)
+    assert len(bounds) == 4
+    assert all(b - a >= 9.9 for a, b in zip(bounds, bounds[1:]))
+
+
+def test_keyframe_chunks_without_usable_keyframes(parallel):
+    assert parallel.keyframe_chunks([], 5.0, 65.0, 4) == [5.0, 65.0]
+    assert parallel.keyframe_chunks([0.0, 64.999], 5.0, 65.0, 4) == [5.0, 65.0]
+    assert parallel.keyframe_chunks([10.0, 20.0], 0.0, 8.0, 4) == [0.0, 8.0]
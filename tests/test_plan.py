@@ -0,0 +1,146 @@
+import pytest
+
+from conftest import make_info
+
+
+@pytest.fixture
+def plan(load, tmp_path, monkeypatch):
+    """ffmpeg_plan 模块；探测结果按文件名从 infos 里取，不运行 ffprobe。"""
+    module = load("ffmpeg_plan")
+    infos = {}
+
+    def fake_probe(path):
+        return infos.get(str(path))
+
+    monkeypatch.setattr(module, "probe_media", fake_probe)
+
+    def add(name, **kwargs):
+        path = tmp_path / name
+        path.write_bytes(b"x")
+        infos[str(path)] = make_info(path=str(path), **kwargs)
+        return str(path)
+
+    module.add_source = add
+    yield module
+    del module.add_source
+
+
+def test_plan_string_round_trip(plan):
+    src = plan.add_source("a.mp4")
+    value = plan.make_plan(plan.trim_node(plan.source_node(src), 1, 2), "preview")
+    assert plan.is_plan(value)
+    assert not plan.is_plan(src)
+    assert plan.make_plan(plan.load_plan(value)["graph"], "preview") == value
+    assert plan.plan_input(value)["op"] == "trim"
+    assert plan.plan_input(src)["op"] == "source"
+
+
+def test_load_plan_rejects_other_versions(plan):
+    value = plan.make_plan({"op": "source", "path": "a.mp4"}).replace('"version":1', '"version":99')
+    with pytest.raises(ValueError):
+        plan.load_plan(value)
+
+
+def test_plan_input_missing_file(plan, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        plan.plan_input(str(tmp_path / "missing.mp4"))
+
+
+def test_trim_of_source_seeks_on_input(plan):
+    src = plan.add_source("a.mp4", duration=10.0)
+    graph = plan.trim_node(plan.source_node(src), 2.5, 3)
+    cmd, duration = plan.compile_plan(plan.load_plan(plan.make_plan(graph)), "out.mp4")
+    assert cmd[:8] == ["ffmpeg", "-y", "-ss", "2.5", "-t", "3.0", "-i", src]
+    assert "-filter_complex" not in cmd
+    assert cmd[cmd.index("-map") + 1] == "0:v:0"
+    assert "0:a:0" in cmd
+    assert cmd[-1] == "out.mp4"
+    assert duration == 3.0
+
+
+def test_concat_compiles_to_one_filtergraph(plan):
+    a = plan.add_source("a.mp4", width=1280, height=720, duration=4.0)
+    b = plan.add_source("b.mp4", width=1920, height=1080, fps="25/1", duration=6.0, audio=False)
+    graph = plan.concat_node(
+        [plan.source_node(a), plan.source_node(b)], clip_audio=True
+    )
+    cmd, duration = plan.compile_plan(plan.load_plan(plan.make_plan(graph)), "out.mp4")
+    assert cmd.count("-i") == 2
+    fc = cmd[cmd.index("-filter_complex") + 1]
+    # 以第一个输入的分辨率 / 帧率为准
+    assert "scale=1280:720:force_original_aspect_ratio=decrease" in fc
+    assert "fps=30" in fc
+    # 没有音轨的片段补静音
+    assert "concat=n=2:v=1:a=1" in fc
+    assert "anullsrc" in fc
+    assert duration == 10.0
+
+
+def test_trim_of_concat_uses_trim_filter(plan):
+    a = plan.add_source("a.mp4", duration=4.0, audio=False)
+    b = plan.add_source("b.mp4", duration=6.0, audio=False)
+    graph = plan.trim_node(plan.concat_node([plan.source_node(a), plan.source_node(b)]), 3, 5)
+    cmd, duration = plan.compile_plan(plan.load_plan(plan.make_plan(graph)), "out.mp4")
+    fc = cmd[cmd.index("-filter_complex") + 1]
+    assert "trim=start=3.0:duration=5.0,setpts=PTS-STARTPTS" in fc
+    assert "-an" in cmd
+    assert duration == 5.0
+
+
+def test_overlay_and_sources(plan, tmp_path):
+    bg = plan.add_source("bg.mp4", duration=8.0)
+    fg = plan.add_source("fg.mp4", duration=5.0)
+    music = plan.add_source("music.m4a")
+    graph = plan.overlay_node(
+        plan.source_node(bg),
+        [{"input": plan.source_node(fg), "x": 10, "y": 20, "width": 320}],
+        external_audio=music,
+    )
+    assert plan.plan_sources(graph) == [music, bg, fg]
+    cmd, duration = plan.compile_plan(plan.load_plan(plan.make_plan(graph)), "out.mp4")
+    fc = cmd[cmd.index("-filter_complex") + 1]
+    assert "scale=320:-2" in fc
+    assert "overlay=10:20:shortest=1" in fc
+    assert "2:a:0" in cmd
+    assert duration == 5.0
+
+
+def test_render_input_renders_plans_once(plan, tmp_path, monkeypatch):
+    src = plan.add_source("a.mp4", duration=10.0)
+    assert plan.render_input(src, str(tmp_path), "Test") == src
+
+    commands = []
+    monkeypatch.setattr(plan, "run_ffmpeg", lambda cmd, **kw: commands.append(cmd))
+    value = plan.make_plan(plan.trim_node(plan.source_node(src), 1, 2))
+    out = plan.render_input(value, str(tmp_path), "Test", "render")
+    assert out.startswith(str(tmp_path / "render_")) and out.endswith(".mp4")
+    assert commands[0][-1] == out
+    # 同一个计划第二次直接命中结果缓存
+    assert plan.render_input(value, str(tmp_path), "Test", "render") == out
+    assert len(commands) == 1
+
+
+def test_path_nodes_render_plans_first(load, plan, tmp_path, monkeypatch):
+    split = load("FFmpegSplitVideo")
+    src = plan.add_source("a.mp4")
+    rendered = []
+
+    def fake_render(value, output_dir, cache_name, filename_prefix="render"):
+        rendered.append(cache_name)
+        return src if plan.is_plan(value) else value
+
+    monkeypatch.setattr(split, "render_input", fake_render)
+    monkeypatch.setattr(split, "probe_media", lambda path: None)
+    monkeypatch.setattr(split.SplitVideo, "_get_output_dir", staticmethod(lambda: str(tmp_path)))
+    value = plan.make_plan(plan.source_node(src))
+    # 计划被渲染成文件后才探测（这里探测失败，说明拿到的已经是文件路径）
+    with pytest.raises(ValueError, match="无法读取视频信息"):
+        split.SplitVideo().split(value, "length", 60.0, 2, "")
+    assert rendered == ["SplitVideo"]
+
+
+def test_preflight_rejects_plans(load, plan):
+    concat = load("concat_videos_path")
+    value = plan.make_plan(plan.source_node(plan.add_source("a.mp4")))
+    with pytest.raises(ValueError, match="Render Plan"):
+        concat.ConcatPreflight().preflight(video_path1=value)
@@ -0,0 +1,87 @@
+from conftest import make_info
+
+
+def _fixes(issues):
+    return {(i["stream"], i["field"]): i["fix"] for i in issues}
+
+
+def test_identical_specs_have_no_issues(load):
+    preflight = load("ffmpeg_preflight")
+    spec = preflight.clip_spec(make_info())
+    assert preflight.compare_specs(spec, spec) == []
+
+
+def test_container_and_time_base_only_need_remux(load):
+    preflight = load("ffmpeg_preflight")
+    ref = preflight.clip_spec(make_info())
+    spec = preflight.clip_spec(make_info(container="matroska,webm", time_base="1/1000"))
+    assert _fixes(preflight.compare_specs(spec, ref)) == {
+        ("format", "container"): "remux",
+        ("video", "time_base"): "remux",
+    }
+
+
+def test_missing_extradata_in_other_container_is_remux(load):
+    preflight = load("ffmpeg_preflight")
+    ref = preflight.clip_spec(make_info())
+    # MPEG-TS 的参数集在码流里，没有 extradata
+    spec = preflight.clip_spec(make_info(container="mpegts", extradata=None))
+    assert _fixes(preflight.compare_specs(spec, ref))[("video", "extradata_hash")] == "remux"
+
+
+def test_encoding_differences_need_reencode(load):
+    preflight = load("ffmpeg_preflight")
+    ref = preflight.clip_spec(make_info())
+    spec = preflight.clip_spec(make_info(width=1280, extradata="CRC32:cccc", sample_rate=44100))
+    fixes = _fixes(preflight.compare_specs(spec, ref))
+    assert fixes[("video", "width")] == "reencode"
+    assert fixes[("video", "extradata_hash")] == "reencode"
+    assert fixes[("audio", "sample_rate")] == "reencode"
+
+
+def test_audio_presence_mismatch_needs_reencode(load):
+    preflight = load("ffmpeg_preflight")
+    ref = preflight.clip_spec(make_info())
+    spec = preflight.clip_spec(make_info(audio=False))
+    assert _fixes(preflight.compare_specs(spec, ref)) == {("audio", "present"): "reencode"}
+
+
+def test_analyze_uses_majority_as_reference(load):
+    preflight = load("ffmpeg_preflight")
+    videos = ["a.mp4", "b.mp4", "c.mp4"]
+    infos = [make_info(width=1280), make_info(), make_info()]
+    report = preflight.analyze_concat(videos, infos=infos)
+    assert report["reference"]["index"] == 1
+    assert [c["action"] for c in report["clips"]] == ["reencode", "copy", "copy"]
+    assert report["strategy"] == "reencode"
+    assert not report["compatible"]
+
+
+def test_analyze_remux_and_unreadable(load):
+    preflight = load("ffmpeg_preflight")
+    videos = ["a.mp4", "b.mkv", "c.mp4"]
+    infos = [make_info(), make_info(container="matroska,webm"), None]
+    report = preflight.analyze_concat(videos, infos=infos)
+    assert [c["action"] for c in report["clips"]] == ["copy", "remux", "unreadable"]
+    assert report["counts"] == {"copy": 1, "remux": 1, "reencode": 0, "unreadable": 1}
+    assert report["strategy"] == "remux"
+    # 有无法探测的片段时不保证能流拷贝
+    assert not report["compatible"]
+    assert "#1 remux: b.mkv" in preflight.format_report(report)
+
+
+def test_analyze_overrides_reference(load):
+    preflight = load("ffmpeg_preflight")
+    report = preflight.analyze_concat(
+        ["a.mp4", "b.mp4"], infos=[make_info(), make_info()], overrides={"width": 1280}
+    )
+    assert report["strategy"] == "reencode"
+    assert all(c["action"] == "reencode" for c in report["clips"])
+
+
+def test_remux_cmd_sets_track_timescale(load):
+    preflight = load("ffmpeg_preflight")
+    report = preflight.analyze_concat(["a.mp4"], infos=[make_info(path="a.mp4")])
+    cmd = preflight.build_remux_cmd("b.mkv", report["reference"], "out.mp4")
+    assert cmd[-3:] == ["-video_track_timescale", "15360", "out.mp4"]
+    assert "-an" not in cmd
@@ -0,0 +1,84 @@
+import pytest
+
+
+@pytest.fixture
+def probe(load, monkeypatch):
+    """ffmpeg_probe 模块；ffprobe 调用换成记录次数的假实现。"""
+    module = load("ffmpeg_probe")
+    module.clear_probe_cache()
+    calls = {"probe": 0, "keyframes": 0}
+
+    def fake_ffprobe(path):
+        calls["probe"] += 1
+        return {
+            "format": {"format_name": "mov,mp4", "duration": "10.0", "start_time": "0.5"},
+            "streams": [
+                {"codec_type": "video", "disposition": {"attached_pic": 1}, "codec_name": "mjpeg"},
+                {
+                    "index": 0, "codec_type": "video", "codec_name": "h264",
+                    "width": 1280, "height": 720, "r_frame_rate": "30000/1001",
+                    "avg_frame_rate": "0/0", "time_base": "1/30000",
+                    "extradata_hash": "CRC32:1234", "nb_frames": "300",
+                },
+                {"index": 1, "codec_type": "audio", "codec_name": "aac", "sample_rate": "48000"},
+            ],
+        }
+
+    def fake_scan(path):
+        calls["keyframes"] += 1
+        return {"frames": [
+            {"pts_time": "4.5"}, {"pts_time": "0.5"},
+            {"pts_time": "N/A", "best_effort_timestamp_time": "2.5"}, {},
+        ]}
+
+    monkeypatch.setattr(module, "_run_ffprobe", fake_ffprobe)
+    monkeypatch.setattr(module, "_run_keyframe_scan", fake_scan)
+    monkeypatch.setattr(module, "PROBE_SIDECAR", False)
+    module.calls = calls
+    yield module
+    module.clear_probe_cache()
+    del module.calls
+
+
+def test_parse_rate(probe):
+    assert probe.parse_rate("30000/1001") == pytest.approx(29.97, abs=0.01)
+    assert probe.parse_rate("25") == 25.0
+    assert probe.parse_rate("0/0") is None
+    assert probe.parse_rate("") is None
+
+
+def test_probe_media_normalizes_and_caches(probe, tmp_path):
+    clip = tmp_path / "a.mp4"
+    clip.write_bytes(b"x")
+    info = probe.probe_media(str(clip))
+    # 跳过封面图，取真正的视频流
+    assert info["video"]["codec"] == "h264"
+    assert info["video"]["fps"] == pytest.approx(29.97, abs=0.01)
+    assert info["video"]["nb_frames"] == 300
+    assert info["audio"]["sample_rate"] == 48000
+    assert info["duration"] == 10.0
+    assert "keyframes" not in info
+    assert probe.probe_media(str(clip)) is info
+    assert probe.calls == {"probe": 1, "keyframes": 0}
+
+    # 文件内容变化后缓存失效
+    clip.write_bytes(b"xy")
+    probe.probe_media(str(clip))
+    assert probe.calls["probe"] == 2
+
+
+def test_probe_media_missing_file(probe, tmp_path):
+    assert probe.probe_media(str(tmp_path / "missing.mp4")) is None
+    assert probe.probe_media("") is None
+    assert probe.calls["probe"] == 0
+
+
+def test_keyframes_are_scanned_lazily_once(probe, tmp_path):
+    clip = tmp_path / "a.mp4"
+    clip.write_bytes(b"x")
+    info = probe.probe_media(str(clip))
+    assert probe.calls["keyframes"] == 0
+    assert probe.probe_keyframes(info) == [0.5, 2.5, 4.5]
+    assert probe.probe_keyframes(info) == [0.5, 2.5, 4.5]
+    assert probe.calls["keyframes"] == 1
+    assert probe.probe_keyframes(None) == []
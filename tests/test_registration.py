@@ -0,0 +1,23 @@
+import os
+
+from conftest import REPO_ROOT
+
+import _loader
+
+
+def test_display_names_come_from_modules(load):
+    load("ffmpeg_output")
+    path = os.path.join(REPO_ROOT, "__init__.py")
+    ns = {"__name__": _loader.PACKAGE_NAME, "__package__": _loader.PACKAGE_NAME}
+    with open(path, encoding="utf-8") as f:
+        exec(compile(f.read(), path, "exec"), ns)
+
+    classes = ns["NODE_CLASS_MAPPINGS"]
+    names = ns["NODE_DISPLAY_NAME_MAPPINGS"]
+    assert set(names) == set(classes)
+    assert names["LoadVideoFrames"] == "Load Video Frames (FFmpeg)"
+    assert names["SplitVideo"] == "Split Video (FFmpeg, stream copy)"
+    assert names["ConcatPreflight"] == "Concat Preflight (FFmpeg)"
+    assert names["FFmpegMetricsSummary"] == "FFmpeg Metrics Summary"
+    # 模块里没有写显示名的节点仍用类名
+    assert names["ConcatVideos"] == "ConcatVideos"
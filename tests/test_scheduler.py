@@ -0,0 +1,37 @@
+def test_budget_cmd_threads_inputs_and_output(load):
+    scheduler = load("ffmpeg_scheduler")
+    cmd = ["ffmpeg", "-y", "-i", "a.mp4", "-i", "b.mp4", "-c:v", "libx264", "out.mp4"]
+    assert scheduler.budget_cmd(cmd, 6) == [
+        "ffmpeg", "-filter_complex_threads", "6", "-filter_threads", "6",
+        "-y", "-threads", "6", "-i", "a.mp4", "-threads", "6", "-i", "b.mp4",
+        "-c:v", "libx264", "-threads", "6", "out.mp4",
+    ]
+
+
+def test_budget_cmd_keeps_explicit_threads(load):
+    scheduler = load("ffmpeg_scheduler")
+    cmd = ["ffmpeg", "-threads", "3", "-i", "a.mp4", "out.mp4"]
+    assert scheduler.budget_cmd(cmd, 8) == cmd
+    assert scheduler.budget_cmd(["ffmpeg"], 8) == ["ffmpeg"]
+
+
+def test_requested_threads(load):
+    scheduler = load("ffmpeg_scheduler")
+    assert scheduler.requested_threads(["ffmpeg", "-i", "a.mp4", "out.mp4"]) is None
+    assert scheduler.requested_threads(["ffmpeg", "-threads", "3", "-i", "a.mp4", "o.mp4"]) == 3
+    assert scheduler.requested_threads(["ffmpeg", "-threads", "0", "o.mp4"]) == 1
+    assert scheduler.requested_threads(["ffmpeg", "-threads", "auto", "o.mp4"]) is None
+
+
+def test_scheduler_acquire_and_release(load):
+    scheduler = load("ffmpeg_scheduler")
+    sched = scheduler.FFmpegScheduler(max_procs=2, total_threads=8)
+    first = sched.acquire()
+    assert first == 8
+    second = sched.acquire(3)
+    assert second == 3
+    # 名额用完时 abort 为真直接放弃
+    assert sched.acquire(abort=lambda: True) is None
+    sched.release(first)
+    sched.release(second)
+    assert sched.acquire() == 8
@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from conftest import make_info
+
+
+def test_parse_times(load):
+    split = load("FFmpegSplitVideo")
+    parse = split.SplitVideo._parse_times
+    assert parse("30, 10\n20 10.0  0 -5") == [10.0, 20.0, 30.0]
+    assert parse("") == []
+    assert parse(None) == []
+    with pytest.raises(ValueError):
+        parse("10, abc")
+
+
+@pytest.fixture
+def count_times(load, monkeypatch):
+    split = load("FFmpegSplitVideo")
+    cut = load("FFmpegCutVideo")
+    keyframes = {}
+    monkeypatch.setattr(cut, "probe_keyframes", lambda info: keyframes.get(info["path"], []))
+
+    def run(info, count, frames):
+        keyframes[info["path"]] = frames
+        return split.SplitVideo._count_split_times(info, count)
+
+    return run
+
+
+def test_count_split_times_nearest_keyframes(count_times):
+    info = make_info(duration=60.0)
+    frames = [float(k) for k in range(0, 60, 4)]
+    assert count_times(info, 3, frames) == [20.0, 40.0]
+    assert count_times(info, 4, frames) == [16.0, 28.0, 44.0]
+
+
+def test_count_split_times_relative_to_start_time(count_times):
+    info = make_info(path="offset.mp4", duration=30.0, start_time=1.4)
+    frames = [1.4, 11.4, 21.4]
+    assert count_times(info, 3, frames) == pytest.approx([10.0, 20.0])
+
+
+def test_count_split_times_edge_cases(count_times):
+    info = make_info(duration=60.0)
+    assert count_times(info, 1, [0.0, 30.0]) == []
+    assert count_times(make_info(duration=0.0), 4, [0.0, 30.0]) == []
+    # 只有第一个关键帧 / 关键帧扫描失败：交给调用方按均分时长切
+    assert count_times(info, 4, [0.0]) is None
+    assert count_times(info, 4, []) is None
+    # 关键帧太稀疏时多个均分点落到同一个关键帧上，去重
+    assert count_times(info, 4, [0.0, 30.0]) == [30.0]
+
+
+@pytest.fixture
+def splitter(load, monkeypatch, tmp_path):
+    """SplitVideo；ffmpeg 调用换成记录命令、写出一个片段和列表文件的假实现。"""
+    split = load("FFmpegSplitVideo")
+    cut = load("FFmpegCutVideo")
+    src = tmp_path / "in.mp4"
+    src.write_bytes(b"x")
+    commands = []
+
+    def fake_run(cmd, duration=None, outputs=(), error_prefix=""):
+        commands.append(cmd)
+        segment = cmd[-1] % 0
+        open(segment, "wb").close()
+        with open(outputs[0], "w", encoding="utf-8") as f:
+            f.write(f"{os.path.basename(segment)},0.000000,60.000000\n")
+
+    monkeypatch.setattr(split, "probe_media", lambda path: make_info(str(src), duration=60.0))
+    monkeypatch.setattr(split, "run_ffmpeg", fake_run)
+    monkeypatch.setattr(cut, "probe_keyframes", lambda info: [0.0])
+    monkeypatch.setattr(split.SplitVideo, "_get_output_dir", staticmethod(lambda: str(tmp_path)))
+    node = split.SplitVideo()
+    node.src = str(src)
+    node.commands = commands
+    return node
+
+
+def test_split_without_split_points_returns_source(splitter):
+    for args in (("count", 60.0, 1, ""), ("keyframes", 60.0, 4, "")):
+        paths, starts, path_list = splitter.split(splitter.src, *args, use_cache=False)
+        assert paths == [splitter.src] and starts == [0.0] and path_list == splitter.src
+    assert splitter.commands == []
+
+
+def test_split_count_without_keyframes_uses_segment_time(splitter, caplog):
+    with caplog.at_level("WARNING"):
+        paths, starts, _ = splitter.split(splitter.src, "count", 60.0, 4, "", use_cache=False)
+    (cmd,) = splitter.commands
+    assert cmd[cmd.index("-segment_time") + 1] == "15.0"
+    assert "-segment_times" not in cmd
+    assert len(paths) == 1 and starts == [0.0]
+    assert "关键帧" in caplog.text
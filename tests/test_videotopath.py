@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+
+
+class _Stdin:
+    """记录写入内容的假 stdin；fail_after 次写入后模拟 ffmpeg 提前退出。"""
+
+    def __init__(self, fail_after=None):
+        self.data = bytearray()
+        self.writes = 0
+        self.fail_after = fail_after
+
+    def write(self, buf):
+        if self.fail_after is not None and self.writes >= self.fail_after:
+            raise BrokenPipeError("ffmpeg exited")
+        self.writes += 1
+        self.data += bytes(buf)
+
+
+@pytest.fixture
+def v2p(load, monkeypatch):
+    module = load("videotopath")
+    monkeypatch.setattr(module, "processing_interrupted", lambda: False)
+    return module
+
+
+def _blocks(count, produced):
+    for i in range(count):
+        produced.append(i)
+        yield bytes([i % 256]) * 4
+
+
+def test_feed_stdin_writes_all_blocks(v2p):
+    stdin = _Stdin()
+    produced = []
+    error, interrupted = v2p.VideoToPath._feed_stdin(stdin, _blocks(3, produced))
+    assert (error, interrupted) == (None, False)
+    assert bytes(stdin.data) == b"\x00" * 4 + b"\x01" * 4 + b"\x02" * 4
+
+
+def test_feed_stdin_stops_producer_on_broken_pipe(v2p):
+    stdin = _Stdin(fail_after=1)
+    produced = []
+    before = threading.active_count()
+    error, interrupted = v2p.VideoToPath._feed_stdin(stdin, _blocks(1000, produced))
+    assert isinstance(error, BrokenPipeError)
+    assert not interrupted
+    # 生产者最多领先队列长度个块，并且在返回前已经退出
+    assert len(produced) <= 1 + v2p.VideoToPath._QUEUE_CHUNKS + 2
+    assert threading.active_count() == before
+
+
+def test_feed_stdin_reports_conversion_errors(v2p):
+    def broken():
+        yield b"ok"
+        raise ValueError("bad frame")
+
+    stdin = _Stdin()
+    error, interrupted = v2p.VideoToPath._feed_stdin(stdin, broken())
+    assert isinstance(error, ValueError)
+    assert bytes(stdin.data) == b"ok"
+
+
+def test_feed_stdin_interrupted(v2p, monkeypatch):
+    monkeypatch.setattr(v2p, "processing_interrupted", lambda: True)
+    stdin = _Stdin()
+    produced = []
+    error, interrupted = v2p.VideoToPath._feed_stdin(stdin, _blocks(1000, produced))
+    assert (error, interrupted) == (None, True)
+    assert stdin.writes == 0
+    assert len(produced) <= v2p.VideoToPath._QUEUE_CHUNKS + 2
@@ -1,21 +1,23 @@
 import os
+import queue
+import shutil
+import subprocess
 import tempfile
-from typing import Any
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Any
 
-import cv2
-import numpy as np
-import torch
 import folder_paths
 
-try:
-    # 新版 ComfyUI
-    from comfy_api.input_impl import VideoFromFile  # type: ignore
-except Exception:
-    try:
-        # 有些 nightly 把它挪到了这里
-        from comfy_api.latest_input_impl.video_types import VideoFromFile  # type: ignore
-    except Exception:
-        VideoFromFile = None  # type: ignore
+from .comfy_compat import video_from_file_class
+from .ffmpeg_encoders import INTERMEDIATE_NAMES, intermediate_args
+from .ffmpeg_metrics import node_metrics
+from .ffmpeg_runner import ffmpeg_slot, processing_interrupted, raise_interrupted, terminate_process
+from .ffmpeg_scheduler import popen_kwargs
+
+# cv2 / numpy / torch 只在第一次执行转换时导入，节点注册阶段保持轻量
+if TYPE_CHECKING:
+    import numpy as np
 
 
 class VideoToPath:
@@ -43,6 +45,23 @@ class VideoToPath:
                     "max": 120,
                     "step": 1,
                 }),
+                # 帧合成方式：ffmpeg 管道多线程编码（默认）或 OpenCV mp4v
+                "encoder": (["ffmpeg", "opencv"], {"default": "ffmpeg"}),
+                # 以下三个参数只在 encoder = ffmpeg 时生效
+                "codec": (["libx264", "libx265", "mpeg4"], {"default": "libx264"}),
+                "preset": ([
+                    "ultrafast", "superfast", "veryfast", "faster", "fast",
+                    "medium", "slow", "slower", "veryslow",
+                ], {"default": "veryfast"}),
+                "crf": ("INT", {
+                    "default": 18,
+                    "min": 0,
+                    "max": 51,
+                    "step": 1,
+                }),
+                # 无损中间格式（mkv）：输出交给拼接 / 剪切 / 叠加节点继续处理时使用，
+                # 由最后一个节点做唯一一次正式编码；none = 按 codec / preset / crf 正常编码
+                "intermediate": (INTERMEDIATE_NAMES, {"default": "none"}),
             },
         }
 
@@ -71,6 +90,7 @@ class VideoToPath:
             return VideoToPath._extract_path_from_video(video[0])
 
         # 3. 原生 VideoFromFile
+        VideoFromFile = video_from_file_class()
         if VideoFromFile is not None and isinstance(video, VideoFromFile):
             for attr in ("video_path", "path", "file_path", "filename", "file"):
                 value = getattr(video, attr, None)
@@ -104,10 +124,13 @@ class VideoToPath:
     # ====== frames -> mp4 path ======
 
     @staticmethod
-    def _tensor_to_bgr_uint8(frame: Any) -> np.ndarray:
+    def _tensor_to_bgr_uint8(frame: Any) -> "np.ndarray":
         """
         将 Comfy 的 IMAGE Tensor / 数组转换成 OpenCV 可写入的 BGR uint8 图像。
         """
+        import numpy as np
+        import torch
+
         if isinstance(frame, torch.Tensor):
             img = frame
         else:
@@ -132,6 +155,9 @@ class VideoToPath:
         """
         把 IMAGE 序列写成一个临时 mp4，返回该文件路径。
         """
+        import cv2
+        import torch
+
         if isinstance(frames, torch.Tensor):
             # 假设形状为 (N, H, W, C)
             frame_list = [frames[i] for i in range(frames.shape[0])]
@@ -141,17 +167,8 @@ class VideoToPath:
         if not frame_list:
             raise ValueError("VideoToPath: frames input is empty, cannot create video.")
 
-        # 根临时目录
-        if hasattr(folder_paths, "get_temp_directory"):
-            root_tmp = folder_paths.get_temp_directory()
-        else:
-            root_tmp = os.path.join(folder_paths.get_output_directory(), "tmp_videos")
-
-        os.makedirs(root_tmp, exist_ok=True)
-
         # 创建临时 mp4 文件名
-        fd, video_path = tempfile.mkstemp(prefix="frames_", suffix=".mp4", dir=root_tmp)
-        os.close(fd)
+        video_path = VideoToPath._temp_video_path(".mp4")
 
         # 用第一帧确定尺寸
         first = VideoToPath._tensor_to_bgr_uint8(frame_list[0])
@@ -177,13 +194,253 @@ class VideoToPath:
 
         return video_path
 
+    # ====== frames -> mp4 path（ffmpeg 管道） ======
+
+    # 每个转换块的目标大小（字节）
+    _CHUNK_BYTES = 32 * 1024 * 1024
+    # 转换线程最多领先编码多少个块
+    _QUEUE_CHUNKS = 4
+
+    @staticmethod
+    def _temp_video_path(suffix: str = ".mp4") -> str:
+        # 根临时目录
+        if hasattr(folder_paths, "get_temp_directory"):
+            root_tmp = folder_paths.get_temp_directory()
+        else:
+            root_tmp = os.path.join(folder_paths.get_output_directory(), "tmp_videos")
+
+        os.makedirs(root_tmp, exist_ok=True)
+
+        # 创建临时文件名
+        fd, video_path = tempfile.mkstemp(prefix="frames_", suffix=suffix, dir=root_tmp)
+        os.close(fd)
+        return video_path
+
+    @staticmethod
+    def _iter_uint8_chunks(frames, chunk: int, h: int, w: int):
+        """
+        按块把 IMAGE 批量转换成连续的 (n, H, W, C) uint8 数组（RGB），向量化处理整块。
+        """
+        import numpy as np
+        import torch
+
+        if isinstance(frames, torch.Tensor):
+            n = frames.shape[0]
+            for i in range(0, n, chunk):
+                block = frames[i:i + chunk]
+                block = (block.clamp(0.0, 1.0) * 255.0).to(torch.uint8)
+                yield block.cpu().contiguous().numpy()
+            return
+
+        # list 输入：逐帧补齐 batch 维 / 尺寸后再成块转换
+        buf = []
+        for f in frames:
+            img = f if isinstance(f, torch.Tensor) else torch.from_numpy(np.array(f))
+            if img.dim() == 4 and img.shape[0] == 1:
+                img = img[0]
+            if img.shape[0] != h or img.shape[1] != w:
+                img = torch.nn.functional.interpolate(
+                    img.permute(2, 0, 1).unsqueeze(0).float(),
+                    size=(h, w),
+                    mode="bilinear",
+                    align_corners=False,
+                )[0].permute(1, 2, 0)
+            buf.append(img)
+            if len(buf) >= chunk:
+                block = (torch.stack(buf).clamp(0.0, 1.0) * 255.0).to(torch.uint8)
+                yield block.cpu().contiguous().numpy()
+                buf = []
+        if buf:
+            block = (torch.stack(buf).clamp(0.0, 1.0) * 255.0).to(torch.uint8)
+            yield block.cpu().contiguous().numpy()
+
+    @staticmethod
+    def _feed_stdin(stdin, blocks):
+        """
+        生产者线程迭代 blocks（转换好的帧块）放进有界队列，当前线程写入 ffmpeg 的 stdin，
+        转换与编码写入重叠进行。返回 (error, interrupted)：
+        写入失败 / 转换出错 / 用户取消时提前退出，生产者不会卡在满队列上，返回前已结束。
+        """
+        chunks = queue.Queue(maxsize=VideoToPath._QUEUE_CHUNKS)
+        stop = threading.Event()
+        done = object()
+
+        def _put(item):
+            """可被 stop 打断的 put：消费者提前退出时生产者不会卡在满队列上。"""
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def _produce():
+            try:
+                for block in blocks:
+                    if not _put(block):
+                        return
+                _put(done)
+            except BaseException as e:  # 转换出错时交给主线程抛出
+                _put(e)
+
+        producer = threading.Thread(target=_produce, daemon=True)
+        producer.start()
+
+        error = None
+        interrupted = False
+        try:
+            while True:
+                # 用户在 ComfyUI 里点了取消：停止送帧
+                if processing_interrupted():
+                    interrupted = True
+                    break
+                item = chunks.get()
+                if item is done:
+                    break
+                if isinstance(item, BaseException):
+                    error = item
+                    break
+                stdin.write(memoryview(item))
+        except (BrokenPipeError, OSError) as e:
+            error = e
+        finally:
+            stop.set()
+            producer.join()
+        return error, interrupted
+
+    @staticmethod
+    def _frames_to_video_ffmpeg(
+        frames, fps: int, codec: str, preset: str, crf: int, intermediate: str = "none"
+    ) -> str:
+        """
+        把 IMAGE 序列通过 stdin 以 rawvideo 流式送给 ffmpeg 编码，返回 mp4 路径。
+        intermediate 不为 none 时改为输出带标记的无损中间文件（mkv）。
+        转换（生产者线程）与编码写入（当前线程）通过有界队列重叠进行（见 _feed_stdin）。
+        """
+        import numpy as np
+        import torch
+
+        if isinstance(frames, torch.Tensor):
+            if frames.dim() == 3:
+                frames = frames.unsqueeze(0)
+            if frames.shape[0] == 0:
+                raise ValueError("VideoToPath: frames input is empty, cannot create video.")
+            first = frames[0]
+        else:
+            frames = list(frames)
+            if not frames:
+                raise ValueError("VideoToPath: frames input is empty, cannot create video.")
+            first = frames[0]
+            if not isinstance(first, torch.Tensor):
+                first = torch.from_numpy(np.array(first))
+            if first.dim() == 4 and first.shape[0] == 1:
+                first = first[0]
+
+        h, w, c = int(first.shape[0]), int(first.shape[1]), int(first.shape[2])
+        pix_fmt_in = {1: "gray", 3: "rgb24", 4: "rgba"}.get(c)
+        if pix_fmt_in is None:
+            raise ValueError(f"VideoToPath: unsupported channel count {c}.")
+
+        chunk = max(1, VideoToPath._CHUNK_BYTES // max(1, h * w * c))
+        lossless = intermediate_args(intermediate)
+        video_path = VideoToPath._temp_video_path(lossless[0] if lossless else ".mp4")
+
+        cmd = [
+            "ffmpeg", "-y",
+            "-f", "rawvideo",
+            "-pix_fmt", pix_fmt_in,
+            "-s", f"{w}x{h}",
+            "-r", str(fps),
+            "-i", "pipe:0",
+            "-an",
+            # yuv420p 需要偶数宽高
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+        ]
+        if lossless:
+            cmd += lossless[1]
+        else:
+            cmd += ["-c:v", codec]
+            if codec in ("libx264", "libx265"):
+                cmd += ["-preset", preset, "-crf", str(crf)]
+            else:
+                cmd += ["-q:v", "2"]
+            cmd += ["-pix_fmt", "yuv420p"]
+        # 编码线程数由调度器按当前负载分配
+        cmd.append(video_path)
+
+        with ffmpeg_slot(cmd) as call:
+            proc = subprocess.Popen(
+                call.cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                **popen_kwargs(),
+            )
+
+            # 只保留 stderr 末尾若干行，避免长时间编码占用内存
+            stderr_tail = deque(maxlen=50)
+
+            def _drain_stderr():
+                for line in proc.stderr:
+                    stderr_tail.append(line.decode("utf-8", errors="ignore"))
+
+            stderr_thread = threading.Thread(target=_drain_stderr, daemon=True)
+            stderr_thread.start()
+
+            error = None
+            interrupted = False
+            try:
+                error, interrupted = VideoToPath._feed_stdin(
+                    proc.stdin, VideoToPath._iter_uint8_chunks(frames, chunk, h, w)
+                )
+            finally:
+                if interrupted:
+                    terminate_process(proc)
+                try:
+                    proc.stdin.close()
+                except OSError:
+                    pass
+                returncode = call.wait(proc)
+                stderr_thread.join()
+
+        if interrupted or error is not None or returncode != 0:
+            try:
+                os.remove(video_path)
+            except OSError:
+                pass
+        if interrupted:
+            raise_interrupted()
+        if error is not None and not isinstance(error, OSError):
+            raise error
+        if returncode != 0 or error is not None:
+            raise RuntimeError(
+                f"VideoToPath: ffmpeg failed to encode frames (exit code {returncode}).\n"
+                + "".join(stderr_tail)
+            )
+
+        return video_path
+
     # ====== 主逻辑 ======
 
-    def convert(self, video=None, frames=None, fps=25):
+    @node_metrics("VideoToPath", "intermediate")
+    def convert(
+        self,
+        video=None,
+        frames=None,
+        fps=25,
+        encoder="ffmpeg",
+        codec="libx264",
+        preset="veryfast",
+        crf=18,
+        intermediate="none",
+    ):
         """
         逻辑：
         - 若 video 不为空 -> 只用 video，忽略 frames 和 fps，输出视频文件路径。
         - 若 video 为空且 frames 有值 -> 把帧合成为 mp4，输出该 mp4 路径。
+          encoder = ffmpeg（且系统里有 ffmpeg）时走管道多线程编码，否则用 OpenCV mp4v；
+          intermediate 不为 none 时输出无损中间文件（mkv，仅 ffmpeg）。
         - 若都没有 -> 报错。
         """
         # 两个都连上 -> 按要求以 video 为准
@@ -193,12 +450,19 @@ class VideoToPath:
 
         # 只有 frames
         if frames is not None:
-            video_path = self._frames_to_video(frames, int(fps))
+            if encoder == "ffmpeg" and shutil.which("ffmpeg"):
+                video_path = self._frames_to_video_ffmpeg(
+                    frames, int(fps), codec, preset, int(crf), intermediate
+                )
+            else:
+                video_path = self._frames_to_video(frames, int(fps))
             return (video_path,)
 
-        # 都没输入
+        # 都没输入（lazy 节点的 VIDEO 输出也是 None）
         raise ValueError(
-            "VideoToPath: no input provided. Please connect either 'video' or 'frames'."
+            "VideoToPath: no input provided. Please connect either 'video' or 'frames'.\n"
+            "If 'video' comes from a Cut / Overlay / Concat node with lazy enabled, its VIDEO "
+            "output is empty: connect its path output to a Render Plan node first."
         )
 
 